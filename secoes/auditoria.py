@@ -0,0 +1,47 @@
+"""
+Auditoria de Dados - Aplicação AposeniorGestao
+
+Este módulo apresenta o relatório de qualidade dos dados de todas as folhas
+(valores inválidos, campos obrigatórios em falta, valores repetidos e
+referências a registos inexistentes), calculado por utils.audit.
+"""
+
+import streamlit as st
+
+from utils.ui import titulo_secao
+from utils.audit import AUDIT_SHEETS, get_audit_report
+
+
+def mostrar_pagina() -> None:
+    """Renderiza a página de auditoria da qualidade dos dados."""
+    st.title("🩺 Auditoria de Dados")
+    st.caption("Verificação automática de todas as folhas. O relatório é refeito sempre que os dados mudam.")
+
+    relatorio = get_audit_report()
+
+    por_folha = relatorio['Folha'].value_counts()
+    cols = st.columns(len(AUDIT_SHEETS))
+    for col, folha in zip(cols, AUDIT_SHEETS):
+        col.metric(folha, int(por_folha.get(folha, 0)), help="Problemas encontrados")
+
+    if relatorio.empty:
+        st.success("Não foram encontrados problemas nos dados. ✅")
+        return
+
+    titulo_secao("Problemas encontrados", "⚠️")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        folhas = st.multiselect("Folha", options=list(por_folha.index), key="auditoria_folhas")
+    with col2:
+        tipos = st.multiselect("Tipo de problema", options=sorted(relatorio['Erro'].unique()), key="auditoria_tipos")
+
+    filtrado = relatorio
+    if folhas:
+        filtrado = filtrado[filtrado['Folha'].isin(folhas)]
+    if tipos:
+        filtrado = filtrado[filtrado['Erro'].isin(tipos)]
+
+    st.dataframe(filtrado, hide_index=True, use_container_width=True)
+    st.download_button("📥 Descarregar relatório (CSV)", data=filtrado.to_csv(index=False).encode('utf-8'),
+                       file_name="auditoria_dados.csv", mime="text/csv")
@@ -0,0 +1,124 @@
+"""
+Diagnóstico - Aplicação AposeniorGestao
+
+Este módulo apresenta os tempos medidos por utils.metrics (arranque,
+execuções, leituras do Google Sheets, validações e páginas) e a utilização
+da quota da API do Google Sheets contada por utils.sheets. O acesso é
+protegido pela palavra-passe definida em st.secrets["diagnostico"]["password"];
+sem ela configurada, a página fica desativada.
+"""
+
+import hmac
+
+import streamlit as st
+
+from utils.ui import titulo_secao
+from utils.metrics import LOGGER_NAME, get_timing_report
+from utils.profiling import ADMIN_ACCESS_KEY, PROFILING_KEY, PROFILING_QUERY_PARAM, pyinstrument_available
+from utils.state import get_session_memory_report
+from utils.sheets import QUOTA_WARNING_RATIO, get_api_usage, get_api_usage_per_minute, get_quota_status
+
+
+def _palavra_passe() -> str:
+    """Palavra-passe configurada nos segredos (vazia se não existir)."""
+    try:
+        return str(st.secrets["diagnostico"]["password"])
+    except Exception:
+        return ""
+
+
+def _autorizado() -> bool:
+    """Pede a palavra-passe uma vez por sessão e indica se o acesso foi concedido."""
+    esperada = _palavra_passe()
+    if not esperada:
+        st.warning("A página de diagnóstico está desativada. Defina [diagnostico] password nos segredos da aplicação.")
+        return False
+
+    if st.session_state.get(ADMIN_ACCESS_KEY):
+        return True
+
+    with st.form("diagnostico_login"):
+        tentativa = st.text_input("Palavra-passe", type="password")
+        entrar = st.form_submit_button("Entrar")
+    if entrar:
+        if hmac.compare_digest(tentativa.encode('utf-8'), esperada.encode('utf-8')):
+            st.session_state[ADMIN_ACCESS_KEY] = True
+            return True
+        st.error("Palavra-passe incorreta.")
+    return False
+
+
+def mostrar_pagina() -> None:
+    """Renderiza a página de diagnóstico de desempenho."""
+    st.title("📈 Diagnóstico")
+    st.caption("Tempos e pedidos ao Google Sheets medidos nesta instância da aplicação desde o arranque do processo.")
+
+    if not _autorizado():
+        return
+
+    render_perfil()
+    render_quota()
+    render_tempos()
+    render_estado_sessao()
+
+
+def _alternar_perfil() -> None:
+    st.session_state[PROFILING_KEY] = st.session_state["diagnostico_perfil"]
+
+
+def render_perfil() -> None:
+    """Interruptor do modo de perfil das páginas para esta sessão."""
+    titulo_secao("Perfil das páginas", "🔬")
+    perfilador = "pyinstrument" if pyinstrument_available() else "cProfile"
+    # Guardado numa chave própria: o estado do widget perde-se ao mudar de página
+    st.toggle("Perfilar as páginas nesta sessão", value=bool(st.session_state.get(PROFILING_KEY)),
+              key="diagnostico_perfil", on_change=_alternar_perfil,
+              help=f"Cada página é executada com o {perfilador} e as funções mais pesadas "
+                   f"aparecem no fim da página.")
+    st.caption(f"Também pode ativar o perfil de uma única visita acrescentando ?{PROFILING_QUERY_PARAM}=1 ao endereço.")
+
+
+def render_quota() -> None:
+    """Pedidos à API do Google Sheets: último minuto face ao limite, por minuto e por origem."""
+    titulo_secao("Quota do Google Sheets", "📡")
+
+    quota = get_quota_status()
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.metric("Pedidos no último minuto", f"{quota['usados']} / {quota['limite']}",
+                  help="Limite de pedidos por minuto da API do Google Sheets")
+    with col2:
+        st.progress(min(quota['fracao'], 1.0), text=f"{quota['fracao']:.0%} da quota por minuto")
+        if quota['alerta']:
+            st.warning(f"⚠️ Acima de {QUOTA_WARNING_RATIO:.0%} da quota: novos pedidos podem ser recusados pelo Google.")
+
+    por_minuto = get_api_usage_per_minute()
+    if por_minuto.empty:
+        st.info("Ainda não foram feitos pedidos à API nesta instância.")
+        return
+    st.bar_chart(por_minuto, height=220)
+
+    st.markdown("##### Pedidos por folha, operação e secção")
+    st.dataframe(get_api_usage(), hide_index=True, use_container_width=True)
+
+
+def render_tempos() -> None:
+    """Percentis dos tempos medidos por operação."""
+    titulo_secao("Tempos por operação", "⏱️")
+    relatorio = get_timing_report()
+    if relatorio.empty:
+        st.info("Ainda não há medições.")
+        return
+
+    st.dataframe(relatorio, hide_index=True, use_container_width=True)
+    st.caption(f"Percentis das últimas medições de cada operação. "
+               f"Cada medição é também registada em JSON no logger '{LOGGER_NAME}'.")
+
+
+def render_estado_sessao() -> None:
+    """Memória ocupada pelo estado desta sessão."""
+    titulo_secao("Estado desta sessão", "🧠")
+    relatorio = get_session_memory_report()
+    st.dataframe(relatorio, hide_index=True, use_container_width=True)
+    st.caption(f"Total: {relatorio['Tamanho (KB)'].sum():.1f} KB. "
+               f"O estado de cada secção é limpo ao mudar de página.")
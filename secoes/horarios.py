@@ -1,72 +1,167 @@
 import streamlit as st
-import pandas as pd
-from utils.sheets import get_worksheet
+import plotly.graph_objects as go
+import streamlit.components.v1 as components
 from utils.ui import titulo_secao
+from utils.components import render_export_buttons
+from utils.timetable import get_weekly_timetable, get_occupancy, slot_label, timetable_frame
+from utils.enrollments import get_enrollment_index
+from utils.printing import PRINT_FORMATS, print_formats, get_timetable_document, get_roster_document
 
 # Ordem dos dias da semana para a visualização
 DIAS_SEMANA_ORDEM = [
-    "Segunda-feira", "Terça-feira", "Quarta-feira", 
+    "Segunda-feira", "Terça-feira", "Quarta-feira",
     "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"
 ]
 
-@st.cache_data(ttl=60)
-def carregar_dados_turmas():
-    """
-    Carrega e processa os dados das turmas da folha de cálculo.
-
-    Returns:
-        pd.DataFrame: DataFrame com os dados das turmas ativas, 
-                      ou um DataFrame vazio em caso de erro.
-    """
-    try:
-        sheet_turmas = get_worksheet("Turmas")
-        dados = sheet_turmas.get_all_records()
-        if not dados:
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(dados)
-        
-        # Filtrar apenas turmas ativas, se a coluna 'Estado' existir
-        if 'Estado' in df.columns:
-            df = df[df['Estado'] == 'Ativa']
-            
-        # Ordenar por hora de início para uma visualização cronológica
-        if 'Hora de Inicio' in df.columns:
-            df = df.sort_values(by='Hora de Inicio')
-            
-        return df
-    except Exception as e:
-        st.error(f"Não foi possível carregar os horários: {e}")
-        return pd.DataFrame()
+# Vistas disponíveis: rótulo -> chave da vista em utils.timetable (None = horário geral)
+VISTAS = {
+    "Geral": None,
+    "Por professor": 'professor',
+    "Por sala": 'sala',
+    "Por disciplina": 'disciplina',
+}
 
 def mostrar_pagina():
     """Renderiza a página de visualização de horários."""
     st.title("🗓️ Horário Semanal das Turmas")
 
-    df_turmas = carregar_dados_turmas()
+    # Horário materializado (agrupado por dia e ordenado), em cache por geração dos dados
+    horario = get_weekly_timetable()
 
-    if df_turmas.empty:
+    if horario['total'] == 0:
         st.info("Não existem turmas ativas para apresentar no horário.")
         return
 
-    # Criar colunas para cada dia da semana
+    tab_horario, tab_ocupacao, tab_impressao = st.tabs(["🗓️ Horário", "📊 Ocupação", "🖨️ Impressão"])
+
+    with tab_horario:
+        render_vistas(horario)
+
+    with tab_ocupacao:
+        render_ocupacao()
+
+    with tab_impressao:
+        render_impressao(horario)
+
+
+def render_vistas(horario):
+    """Renderiza o seletor de vista (geral, professor, sala, disciplina) e o horário."""
+    col_vista, col_grupo = st.columns([2, 3])
+    with col_vista:
+        vista = VISTAS[st.radio("Vista", list(VISTAS.keys()), horizontal=True, key="horario_vista")]
+
+    filtro = ""
+    if vista is not None:
+        # Índices pré-construídos: mudar de vista é apenas uma consulta ao dicionário
+        grupos = horario['vistas'][vista]
+        if not grupos:
+            st.info("Não existem turmas ativas para esta vista.")
+            return
+        with col_grupo:
+            grupo = st.selectbox("Selecione", list(grupos.keys()), key=f"horario_grupo_{vista}")
+        horario = grupos[grupo]
+        filtro = f"{vista}={grupo}"
+
+    render_export_buttons(timetable_frame(horario), "Turmas", filtro=filtro, file_name="horario", key="exportar_horario")
+    render_horario(horario)
+
+
+def render_horario(horario):
+    """Renderiza um horário materializado, com um único bloco HTML por dia."""
     cols = st.columns(len(DIAS_SEMANA_ORDEM))
 
     for i, dia in enumerate(DIAS_SEMANA_ORDEM):
         with cols[i]:
-            st.markdown(f"##### {dia}")
-            turmas_dia = df_turmas[df_turmas['Dia da Semana'] == dia]
-
-            if turmas_dia.empty:
-                st.markdown("_Sem aulas_")
-            else:
-                for _, turma in turmas_dia.iterrows():
-                    with st.container(border=True):
-                        st.markdown(f"**{turma.get('Nome da Turma', 'N/A')}**")
-                        st.markdown(f"🕒 `{turma.get('Hora de Inicio', '')} - {turma.get('Hora de Fim', '')}`")
-                        st.markdown(f"👨‍🏫 {turma.get('Professor', 'N/A')}")
-                        
-                        sala = turma.get('Sala', 'N/A')
-                        if sala == "Outro":
-                            sala = turma.get('Outro_Local', 'Outro')
-                        st.markdown(f"🚪 {sala}")
+            st.markdown(horario['html'][dia], unsafe_allow_html=True)
+
+
+def render_ocupacao():
+    """Renderiza o mapa de calor de ocupação das salas e dos professores."""
+    titulo_secao("Ocupação semanal", "📊")
+    ocupacao = get_occupancy()
+    inicio, fim = ocupacao['janela']
+    if fim <= inicio:
+        st.info("Não existem turmas ativas com horário válido.")
+        return
+
+    col_recurso, col_item = st.columns([2, 3])
+    with col_recurso:
+        recurso = st.radio("Recurso", ["Salas", "Professores"], horizontal=True, key="ocupacao_recurso")
+    array, recursos = ocupacao['sala' if recurso == "Salas" else 'professor']
+
+    opcoes = (["Todas as salas"] if recurso == "Salas" else []) + recursos
+    with col_item:
+        item = st.selectbox("Selecione", opcoes, key=f"ocupacao_item_{recurso}")
+
+    if item == "Todas as salas":
+        # Percentagem das salas (excluindo 'Outro') ocupadas em cada slot
+        salas_reais = [i for i, sala in enumerate(recursos) if sala != "Outro"]
+        z = (array[:, inicio:fim, salas_reais] > 0).mean(axis=2).T * 100
+        titulo_escala = "% salas"
+    else:
+        z = array[:, inicio:fim, recursos.index(item)].T
+        titulo_escala = "Turmas"
+
+    fig = go.Figure(go.Heatmap(
+        z=z,
+        x=DIAS_SEMANA_ORDEM,
+        y=[slot_label(slot) for slot in range(inicio, fim)],
+        colorscale="Blues",
+        colorbar=dict(title=titulo_escala),
+        hovertemplate="%{x} %{y}<br>%{z}<extra></extra>",
+    ))
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(height=max(400, 12 * (fim - inicio)), margin=dict(l=10, r=10, t=10, b=10))
+    st.plotly_chart(fig, use_container_width=True)
+
+    if item != "Todas as salas" and z.max() > 1:
+        st.warning("Há turmas sobrepostas neste recurso (valores acima de 1).")
+
+
+# Documentos imprimíveis: rótulo -> chave da vista em utils.printing ('lista' = lista de inscritos)
+DOCUMENTOS = {
+    "Horário geral": None,
+    "Horário por professor": 'professor',
+    "Horário por sala": 'sala',
+    "Lista de inscritos da turma": 'lista',
+}
+
+
+def render_impressao(horario):
+    """Gera horários e listas de inscritos prontos a imprimir (HTML ou PDF)."""
+    titulo_secao("Documentos para impressão", "🖨️")
+
+    col_doc, col_grupo, col_formato = st.columns([2, 3, 1])
+    with col_doc:
+        documento = DOCUMENTOS[st.selectbox("Documento", list(DOCUMENTOS.keys()), key="impressao_documento")]
+    with col_formato:
+        formato = st.radio("Formato", print_formats(), key="impressao_formato")
+
+    if documento == 'lista':
+        indice = get_enrollment_index()
+        turmas = indice.turmas
+        if turmas.empty:
+            st.info("Não existem turmas.")
+            return
+        with col_grupo:
+            id_turma = st.selectbox("Turma", list(turmas.index), key="impressao_turma",
+                                    format_func=lambda t: f"{turmas.loc[t].get('Nome turma', t)} ({t})")
+        dados = get_roster_document(id_turma, formato)
+        nome_ficheiro = f"inscritos_{id_turma}"
+    else:
+        grupo = ""
+        if documento is not None:
+            with col_grupo:
+                grupo = st.selectbox("Selecione", list(horario['vistas'][documento].keys()),
+                                     key=f"impressao_grupo_{documento}")
+        dados = get_timetable_document(documento, grupo, formato)
+        nome_ficheiro = "horario" + (f"_{grupo}" if grupo else "")
+
+    extensao, mime = PRINT_FORMATS[formato]
+    st.download_button(f"📥 Descarregar {formato}", data=dados, file_name=f"{nome_ficheiro}.{extensao}".replace(" ", "_"),
+                       mime=mime, type="primary", key="impressao_download")
+    if formato == 'HTML':
+        st.caption("Abra o ficheiro no navegador e use Imprimir (Ctrl+P); o documento já está formatado para A4.")
+        with st.expander("👀 Pré-visualização"):
+            # Num iframe: o CSS de impressão (body, table, @page) não se aplica à aplicação
+            components.html(dados.decode('utf-8'), height=600, scrolling=True)
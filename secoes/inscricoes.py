@@ -0,0 +1,133 @@
+"""
+Gestão de Inscrições - Aplicação AposeniorGestao
+
+Este módulo permite inscrever utentes em turmas, consultar a lista de inscritos
+de cada turma e as turmas de cada utente, e cancelar inscrições. A lotação e os
+conflitos de horário são verificados com os índices de utils.enrollments.
+"""
+
+import streamlit as st
+import pandas as pd
+
+from utils.ui import titulo_secao
+from utils.crud import get_sheet_data
+from utils.enrollments import get_enrollment_index, enroll_utente, cancel_enrollment
+
+
+def _rotulo_utente(utentes: pd.DataFrame, id_utente: str) -> str:
+    """Nome e ID de um utente para apresentar nas listas."""
+    if id_utente in utentes.index:
+        return f"{utentes.loc[id_utente, 'Nome']} ({id_utente})"
+    return id_utente
+
+
+def _rotulo_turma(turmas: pd.DataFrame, id_turma: str) -> str:
+    """Nome, disciplina e horário de uma turma para apresentar nas listas."""
+    if id_turma not in turmas.index:
+        return id_turma
+    turma = turmas.loc[id_turma]
+    return (f"{turma.get('Nome turma', id_turma)} — {turma.get('Disciplina', '')} · "
+            f"{turma.get('Dia da Semana', '')} {turma.get('Hora de Inicio', '')}-{turma.get('Hora de Fim', '')}")
+
+
+def mostrar_pagina() -> None:
+    """Renderiza a página de gestão de inscrições."""
+    st.title("🎟️ Gestão de Inscrições")
+
+    indice = get_enrollment_index()
+    utentes = get_sheet_data("Utentes")
+    if not utentes.empty and 'ID' in utentes.columns:
+        utentes = utentes.set_axis(utentes['ID'].astype(str).str.strip().tolist())
+        utentes = utentes[~utentes.index.duplicated()]
+    turmas = indice.turmas
+
+    if utentes.empty or turmas.empty:
+        st.info("É necessário existirem utentes e turmas para gerir inscrições.")
+        return
+
+    tab_nova, tab_turma, tab_utente = st.tabs(["➕ Nova inscrição", "👥 Por turma", "🧍 Por utente"])
+
+    with tab_nova:
+        render_nova_inscricao(indice, utentes, turmas)
+
+    with tab_turma:
+        render_por_turma(indice, utentes, turmas)
+
+    with tab_utente:
+        render_por_utente(indice, utentes, turmas)
+
+
+def render_nova_inscricao(indice, utentes: pd.DataFrame, turmas: pd.DataFrame) -> None:
+    """Formulário de nova inscrição, com a lotação e os conflitos da turma escolhida."""
+    titulo_secao("Nova inscrição", "➕")
+
+    ativos = utentes.index[utentes['Estado'] == 'Ativo'] if 'Estado' in utentes.columns else utentes.index
+    turmas_ativas = turmas.index[turmas['Estado'] == 'Ativa'] if 'Estado' in turmas.columns else turmas.index
+
+    col1, col2 = st.columns(2)
+    with col1:
+        id_utente = st.selectbox("🧍 **Utente**", options=list(ativos),
+                                 format_func=lambda u: _rotulo_utente(utentes, u), key="inscricao_utente")
+    with col2:
+        id_turma = st.selectbox("🏫 **Turma**", options=list(turmas_ativas),
+                                format_func=lambda t: f"{_rotulo_turma(turmas, t)} · {indice.vagas_livres(t)} vagas livres",
+                                key="inscricao_turma")
+
+    if id_utente is None or id_turma is None:
+        st.info("Não existem utentes ou turmas ativas.")
+        return
+
+    # Verificação imediata (lookups nos índices, sem ler a folha)
+    erros = indice.validate(id_utente, id_turma)
+    st.caption(f"Lotação: {indice.ocupadas(id_turma)}/{indice.vagas.get(id_turma, 0)}")
+    if erros:
+        st.warning("\n".join(f"- {erro}" for erro in erros))
+
+    if st.button("Inscrever", type="primary", disabled=bool(erros), key="inscricao_guardar"):
+        if enroll_utente(id_utente, id_turma):
+            st.rerun()
+
+
+def render_por_turma(indice, utentes: pd.DataFrame, turmas: pd.DataFrame) -> None:
+    """Lista de inscritos de uma turma, com a lotação e o cancelamento de inscrições."""
+    titulo_secao("Inscritos por turma", "👥")
+
+    id_turma = st.selectbox("🏫 Turma", options=list(turmas.index),
+                            format_func=lambda t: _rotulo_turma(turmas, t), key="inscricoes_turma")
+    ocupadas, vagas = indice.ocupadas(id_turma), indice.vagas.get(id_turma, 0)
+    st.progress(min(ocupadas / vagas, 1.0) if vagas else 0.0, text=f"{ocupadas}/{vagas} vagas ocupadas")
+
+    inscritos = indice.roster(id_turma)
+    if not inscritos:
+        st.info("Ainda não existem inscrições nesta turma.")
+        return
+
+    colunas = [c for c in ['Nome', 'Contacto_telefónico', 'Email'] if c in utentes.columns]
+    lista = utentes.reindex(inscritos)[colunas].rename_axis('ID').reset_index()
+    st.dataframe(lista, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        id_utente = st.selectbox("Cancelar inscrição de", options=inscritos,
+                                 format_func=lambda u: _rotulo_utente(utentes, u), key="inscricoes_cancelar_utente")
+    with col2:
+        st.write("")
+        if st.button("Cancelar inscrição", key="inscricoes_cancelar"):
+            if cancel_enrollment(id_utente, id_turma):
+                st.rerun()
+
+
+def render_por_utente(indice, utentes: pd.DataFrame, turmas: pd.DataFrame) -> None:
+    """Turmas em que um utente está inscrito."""
+    titulo_secao("Turmas por utente", "🧍")
+
+    id_utente = st.selectbox("🧍 Utente", options=list(utentes.index),
+                             format_func=lambda u: _rotulo_utente(utentes, u), key="inscricoes_utente")
+    ids_turmas = [t for t in indice.turmas_do_utente(id_utente) if t in turmas.index]
+    if not ids_turmas:
+        st.info("O utente não está inscrito em nenhuma turma.")
+        return
+
+    colunas = [c for c in ['Nome turma', 'Disciplina', 'Professor', 'Sala', 'Dia da Semana',
+                           'Hora de Inicio', 'Hora de Fim'] if c in turmas.columns]
+    st.dataframe(turmas.loc[ids_turmas, colunas], hide_index=True, use_container_width=True)
@@ -12,11 +12,13 @@ from typing import Dict, Any
 
 # Importações das utilities centralizadas
 from utils.ui import titulo_secao
+from utils.schema import is_missing
 from utils.crud import (
     get_sheet_data,
     SheetConfig,
     create_record,
     update_record,
+    render_conflict_resolution,
     delete_record as delete_record_crud,
     search_and_filter_dataframe
 )
@@ -27,11 +29,14 @@ from utils.validation import (
     normalize_string
 )
 from utils.components import (
-    render_confirmation_dialog,
+    confirm_delete_dialog,
     render_data_display_card,
     render_search_and_filter,
+    render_export_buttons,
     render_error_message
 )
+from utils.state import resolve_record, section_state
+from utils.write_queue import FAILED, PENDING, STATUS_LABELS, write_status
 
 # ===== CONFIGURAÇÃO DA ENTIDADE =====
 
@@ -41,7 +46,8 @@ PROFESSOR_CONFIG = SheetConfig(
     id_prefix="P",
     required_columns=['Nome Completo', 'Telefone'],
     unique_columns=['Nome Completo'],
-    conflict_rules={}
+    conflict_rules={},
+    async_writes=True
 )
 
 PROFESSOR_VALIDATION_RULES = {
@@ -69,34 +75,32 @@ def mostrar_pagina() -> None:
     """
     st.title("👨‍🏫 Gestão de Professores")
 
-    # Obter dados com cache
-    professor_df = get_sheet_data("Professores")
-
     tab_adicionar, tab_gerir = st.tabs(["➕ Adicionar professor", "📋 Gerir professores"])
 
+    # Cada separador é um fragmento que lê os dados (com cache): as interações
+    # locais (abrir a edição, limpar o formulário) só o reexecutam a ele
+    # (st.rerun(scope="fragment")). Depois de gravar ou apagar, a aplicação inteira
+    # é reexecutada (st.rerun(scope="app")), para o outro separador mostrar os dados novos.
     with tab_adicionar:
-        render_add_form(professor_df)
+        render_add_form()
 
     with tab_gerir:
-        render_management_section(professor_df)
+        render_management_section()
 
 
-def render_add_form(professor_df: pd.DataFrame) -> None:
+@st.fragment
+def render_add_form() -> None:
     """
     Renderiza formulário para adicionar novo professor.
-
-    Args:
-        professor_df (pd.DataFrame): Dados existentes dos professores para validações.
     """
     titulo_secao("Adicionar novo professor", "➕")
+    professor_df = get_sheet_data("Professores")
 
-    # Initialize form key if it doesn't exist
-    if 'form_prof_key' not in st.session_state:
-        st.session_state.form_prof_key = 0
+    estado_secao = section_state("Professores")
 
     # Container com classe para destacar
     st.markdown('<div class="form-container">', unsafe_allow_html=True)
-    with st.form(f"form_professor_{st.session_state.form_prof_key}"):
+    with st.form(f"form_professor_{estado_secao.form_version}"):
         form_data = {}
 
         # Configuração de campos com validações
@@ -130,17 +134,14 @@ def render_add_form(professor_df: pd.DataFrame) -> None:
 
         # using the same working approach from disciplinas.py
         if limpar:
-            st.session_state.form_prof_key += 1
-            st.rerun()
+            estado_secao.reset_form()
+            st.rerun(scope="fragment")
 
         if submetido:
             if salvar_professor(form_data, professor_df):
                 # Limpar formulário após sucesso
-                for key in st.session_state:
-                    if key.startswith('form_professor') or key in form_data:
-                        if key in st.session_state:
-                            del st.session_state[key]
-                st.rerun()
+                estado_secao.reset_form()
+                st.rerun(scope="app")
 
     # Fechar o container destaque
     st.markdown('</div>', unsafe_allow_html=True)
@@ -179,18 +180,15 @@ def salvar_professor(form_data: Dict[str, Any], professor_df: pd.DataFrame) -> b
     return success
 
 
-def render_management_section(professor_df: pd.DataFrame) -> None:
+@st.fragment
+def render_management_section() -> None:
     """
     Renderiza seção de gestão dos professores existentes.
-
-    Args:
-        professor_df (pd.DataFrame): Dados dos professores para exibição.
     """
-    # Verificar vistas específicas (edição/apagamento)
-    if verificar_vista_edicao(professor_df):
-        return
+    professor_df = get_sheet_data("Professores")
 
-    if verificar_vista_apagamento(professor_df):
+    # Verificar vista de edição
+    if verificar_vista_edicao(professor_df):
         return
 
     # Vista de lista padrão
@@ -207,24 +205,29 @@ def verificar_vista_edicao(professor_df: pd.DataFrame) -> bool:
     Returns:
         bool: True se vista de edição foi renderizada.
     """
-    if 'edit_prof_index' not in st.session_state:
+    estado_secao = section_state("Professores")
+    if estado_secao.edit_id is None:
         return False
 
-    idx = st.session_state['edit_prof_index']
-    if idx >= len(professor_df):
-        del st.session_state['edit_prof_index']
+    # O professor é localizado pelo ID (a posição pode ter mudado desde que foi escolhido)
+    idx = resolve_record(professor_df, 'ID_professor', estado_secao.edit_id)
+    if idx is None:
+        st.warning("O professor selecionado já não existe.")
+        estado_secao.back_to_list()
         return False
 
     if st.button("⬅️ Voltar à lista", key="voltar_lista_prof"):
-        del st.session_state['edit_prof_index']
-        st.rerun()
+        estado_secao.back_to_list()
+        st.rerun(scope="fragment")
         return True
 
-    # Add form key initialization for edition form too
-    if 'form_editar_prof_key' not in st.session_state:
-        st.session_state.form_editar_prof_key = 0
+    # Conflito pendente de uma gravação anterior (edição concorrente)
+    if render_conflict_resolution(PROFESSOR_CONFIG):
+        estado_secao.back_to_list()
+        st.rerun(scope="app")
+        return True
 
-    professor_atual = professor_df.iloc[idx]
+    professor_atual = professor_df.loc[idx]
     render_edit_form_professor(professor_atual, idx)
     return True
 
@@ -238,8 +241,9 @@ def render_edit_form_professor(professor_data: pd.Series, index: int) -> None:
         index (int): Índice do professor no DataFrame.
     """
     st.subheader(f"Editar professor: {professor_data['Nome Completo']}")
+    estado_secao = section_state("Professores")
 
-    with st.form(f"form_editar_prof_{st.session_state.form_editar_prof_key}"):
+    with st.form(f"form_editar_prof_{estado_secao.edit_form_version}"):
         form_data = {}
 
         col1, col2 = st.columns(2)
@@ -261,9 +265,10 @@ def render_edit_form_professor(professor_data: pd.Series, index: int) -> None:
                 "💳 NIB",
                 value=str(professor_data.get('NIB', ''))
             )
+            valor_hora = professor_data.get('Valor Hora')
             form_data['Valor Hora'] = st.number_input(
                 "💰 Valor hora (€)",
-                value=float(professor_data.get('Valor Hora', 0.0)),
+                value=0.0 if is_missing(valor_hora) else valor_hora,
                 min_value=0.0,
                 step=0.5,
                 format="%.2f"
@@ -277,13 +282,13 @@ def render_edit_form_professor(professor_data: pd.Series, index: int) -> None:
         with col_guardar_alteracoes:
             if st.form_submit_button("✅ Guardar Alterações", type="primary"):
                 if atualizar_professor(form_data, index):
-                    del st.session_state['edit_prof_index']
-                    st.rerun()
+                    estado_secao.back_to_list()
+                    st.rerun(scope="app")
 
         with col_limpar_alteracoes:
             if st.form_submit_button("🗑️ Limpar Alterações"):
-                st.session_state.form_editar_prof_key += 1
-                st.rerun()
+                estado_secao.reset_edit_form()
+                st.rerun(scope="fragment")
 
 
 def atualizar_professor(form_data: Dict[str, Any], index: int) -> bool:
@@ -311,49 +316,24 @@ def atualizar_professor(form_data: Dict[str, Any], index: int) -> bool:
     return success
 
 
-def verificar_vista_apagamento(professor_df: pd.DataFrame) -> bool:
+def apagar_professor(id_professor: str) -> bool:
     """
-    Verifica e renderiza vista de apagamento se ativada.
+    Apaga o professor com o ID indicado (confirmado no diálogo).
 
     Args:
-        professor_df (pd.DataFrame): Dados dos professores.
+        id_professor (str): ID do professor a apagar.
 
     Returns:
-        bool: True se vista de apagamento foi renderizada.
+        bool: True se apagado com sucesso ou se já não existia.
     """
-    if 'delete_prof_index' not in st.session_state:
-        return False
-
-    idx = st.session_state['delete_prof_index']
-    if idx >= len(professor_df):
-        del st.session_state['delete_prof_index']
-        return False
-
-    professor_atual = professor_df.iloc[idx]
-
-    if st.button("⬅️ Voltar à lista", key="voltar_lista_prof_delete"):
-        del st.session_state['delete_prof_index']
-        st.rerun()
+    professor_df = get_sheet_data("Professores")
+    idx = resolve_record(professor_df, 'ID_professor', id_professor)
+    if idx is None:
+        st.warning("O professor selecionado já não existe.")
         return True
 
-    st.subheader("Apagar professor")
-
-    def confirm_delete():
-        sucesso = delete_record_crud(PROFESSOR_CONFIG, idx,
-                                   success_message=f"Professor '{professor_atual['Nome Completo']}' apagado com sucesso!")
-        if sucesso:
-            del st.session_state['delete_prof_index']
-        return sucesso
-
-    def cancel_delete():
-        del st.session_state['delete_prof_index']
-        st.rerun()
-
-    confirm_message = f"Tens a certeza que queres apagar o professor **{professor_atual['Nome Completo']}**?\n\nEsta ação não pode ser desfeita."
-    render_confirmation_dialog('professor', str(professor_atual['Nome Completo']),
-                              confirm_delete, cancel_delete)
-
-    return True
+    return delete_record_crud(PROFESSOR_CONFIG, idx, confirmed=True,
+                              success_message=f"Professor '{professor_df.loc[idx, 'Nome Completo']}' apagado com sucesso!")
 
 
 def render_lista_professores(professor_df: pd.DataFrame) -> None:
@@ -388,6 +368,7 @@ def render_lista_professores(professor_df: pd.DataFrame) -> None:
 
     # Mostrar resultados
     st.write(f"**Mostrando {len(filtered_df)} de {len(professor_df)} professor(es)**")
+    render_export_buttons(filtered_df, "Professores", filtro=search_text)
 
     # Wrapper especial para ativar estilos azul-claro dos cartões e expanders
     st.markdown('<div class="card-container professor-cards-container">', unsafe_allow_html=True)
@@ -413,8 +394,16 @@ def render_professor_card(professor_data: pd.Series, index: int) -> None:
     nome_completo = professor_data.get('Nome Completo', 'Sem nome')
     id_professor = professor_data.get('ID_professor', f'idx_{index}')
 
+    # Estado da última gravação deste professor feita nesta sessão (gravações em segundo plano)
+    gravacao = write_status(PROFESSOR_CONFIG.name, id_professor)
+    estado_gravacao = ""
+    if gravacao and gravacao.status in (PENDING, FAILED):
+        estado_gravacao = f" · {STATUS_LABELS[gravacao.status]}"
+
     # Expander nativo do Streamlit para melhor compatibilidade
-    with st.expander(f"👨‍🏫 **{nome_completo}** ({id_professor})", expanded=False):
+    with st.expander(f"👨‍🏫 **{nome_completo}** ({id_professor}){estado_gravacao}", expanded=False):
+        if gravacao and gravacao.status == FAILED:
+            st.warning(f"A última alteração não foi gravada: {gravacao.error}")
 
         # Layout organizado
         col_info, col_actions = st.columns([4, 1])
@@ -431,10 +420,9 @@ def render_professor_card(professor_data: pd.Series, index: int) -> None:
                 if professor_data.get('NIB'):
                     st.write(f"**💳 NIB:** {professor_data.get('NIB')}")
             with col2:
-                if professor_data.get('Valor Hora'):
-                    valor_hora = float(professor_data.get('Valor Hora', 0))
-                    if valor_hora > 0:
-                        st.write(f"**💰 Valor/Hora:** {valor_hora:.2f}€")
+                valor_hora = professor_data.get('Valor Hora')
+                if not is_missing(valor_hora) and valor_hora > 0:
+                    st.write(f"**💰 Valor/Hora:** {valor_hora:.2f}€")
 
             if professor_data.get('Observacoes'):
                 st.write("**📝 Observações:**")
@@ -443,9 +431,9 @@ def render_professor_card(professor_data: pd.Series, index: int) -> None:
         with col_actions:
             # Botões funcionais
             if st.button("✏️ Editar", key=f"edit_prof_{index}", use_container_width=True):
-                st.session_state['edit_prof_index'] = index
-                st.rerun()
+                section_state("Professores").start_edit(professor_data.get('ID_professor'))
+                st.rerun(scope="fragment")
 
             if st.button("🗑️ Apagar", key=f"delete_prof_{index}", use_container_width=True):
-                st.session_state['delete_prof_index'] = index
-                st.rerun()
+                id_professor = professor_data.get('ID_professor')
+                confirm_delete_dialog('professor', str(nome_completo), lambda: apagar_professor(id_professor))
@@ -1,10 +1,29 @@
 import streamlit as st
 import pandas as pd
-import time
 import unicodedata
 from datetime import time as time_obj
 from utils.sheets import get_worksheet
-from utils.ui import titulo_secao
+from utils.ui import notificar, titulo_secao
+from utils.components import confirm_delete_dialog, render_export_buttons
+from utils.crud import (
+    SheetConfig, get_sheet_data, get_sheet_generation, generate_unique_id, notify_sheet_write,
+    update_record, delete_record, render_conflict_resolution
+)
+from utils.validation import SALA_OPCOES, DIAS_SEMANA, NIVEL_OPCOES, ESTADO_OPCOES
+from utils.schema import INICIO_MIN, FIM_MIN, minutes_to_time, to_int, is_missing
+from utils.timetable import get_free_interval_index, suggest_slots, minutes_label, overlapping_mask
+from utils.scheduler import TurmaRequest, solve_schedule
+from utils.state import resolve_record, section_state
+
+# Ordem das colunas na folha "Turmas"
+TURMA_COLUNAS = [
+    'ID_Turma', 'Nome turma', 'Disciplina', 'Professor', 'Sala', 'Outro_Local',
+    'Dia da Semana', 'Hora de Inicio', 'Hora de Fim', 'Numero de vagas',
+    'Nivel', 'Estado', 'Observacoes'
+]
+
+# Edições e remoções passam pelo crud (linha localizada pelo ID e versão verificada)
+TURMA_CONFIG = SheetConfig(name="Turmas", id_column="ID_Turma")
 
 # --- Funções Auxiliares ---
 
@@ -19,287 +38,459 @@ def check_time_overlap(start1, end1, start2, end2):
     """Verifica se dois intervalos de tempo se sobrepõem."""
     return start1 < end2 and start2 < end1
 
-# --- Constantes ---
+def hora_para_minutos(hora):
+    """Converte um datetime.time em minutos desde a meia-noite."""
+    return hora.hour * 60 + hora.minute
+
+def verificar_conflitos(df, nome, disciplina, professor, sala, dia, hora_inicio, hora_fim, ignorar_idx=None):
+    """Verifica conflitos de horário e de nome contra as turmas existentes.
+
+    Usa as colunas de minutos já calculadas no carregamento, de forma vetorizada.
+    """
+    conflitos = []
+    if df.empty:
+        return conflitos
+
+    outras = df.drop(index=ignorar_idx) if ignorar_idx is not None else df
+    sobrepostas = outras[overlapping_mask(outras, dia, hora_para_minutos(hora_inicio), hora_para_minutos(hora_fim))]
+    if sala != "Outro" and (sobrepostas['Sala'] == sala).any():
+        conflitos.append(f"Sala '{sala}' já está ocupada neste horário.")
+    if (sobrepostas['Professor'] == professor).any():
+        conflitos.append(f"Professor '{professor}' já tem uma aula neste horário.")
+
+    # Validar nome único por disciplina
+    mesmo_nome = outras['Nome turma'].map(normalize_string) == normalize_string(nome)
+    if (mesmo_nome & (outras['Disciplina'] == disciplina)).any():
+        conflitos.append(f"O nome '{nome}' já existe para a disciplina '{disciplina}'.")
+    return conflitos
+
+
+def render_sugestao_horarios(disciplinas, professores):
+    """Sugere horários livres (sem conflitos de sala ou professor) para uma nova turma."""
+    with st.expander("🔎 Sugerir horários livres"):
+        col1, col2 = st.columns(2)
+        with col1:
+            disciplina = st.selectbox("📚 Disciplina", options=disciplinas, key="sugestao_disciplina")
+            professor = st.selectbox("👨‍🏫 Professor", options=professores, key="sugestao_professor")
+            duracao = st.number_input("⏱️ Duração (minutos)", min_value=15, max_value=480, value=60, step=15, key="sugestao_duracao")
+        with col2:
+            salas = st.multiselect("🚪 Salas candidatas", options=SALA_OPCOES,
+                                   default=[s for s in SALA_OPCOES if s != "Outro"], key="sugestao_salas")
+            dias = st.multiselect("🗓️ Dias", options=DIAS_SEMANA, default=DIAS_SEMANA[:5], key="sugestao_dias")
+
+        if st.button("Procurar horários", key="sugestao_procurar"):
+            if professor == "-- Selecione --" or not salas:
+                st.warning("Selecione o professor e pelo menos uma sala.")
+                return
+            sugestoes = suggest_slots(get_free_interval_index(), disciplina, professor,
+                                      int(duracao), salas, dias)
+            if not sugestoes:
+                st.info("Não foram encontrados horários livres com estes critérios.")
+                return
+            st.dataframe(pd.DataFrame([
+                {'Dia': s['dia'], 'Início': minutes_label(s['inicio']), 'Fim': minutes_label(s['fim']), 'Sala': s['sala']}
+                for s in sugestoes
+            ]), hide_index=True, use_container_width=True)
+
+
+def _linhas_lote_vazias():
+    """DataFrame inicial do editor de agendamento em lote."""
+    return pd.DataFrame({
+        'Nome turma': pd.Series(dtype='str'),
+        'Disciplina': pd.Series(dtype='str'),
+        'Professor': pd.Series(dtype='str'),
+        'Duração (min)': pd.Series(dtype='int'),
+        'Vagas': pd.Series(dtype='int'),
+        'Nível': pd.Series(dtype='str'),
+        'Dia preferido': pd.Series(dtype='str'),
+        'Sala preferida': pd.Series(dtype='str'),
+    })
+
+
+def render_agendamento_lote(sheet_turmas, df_turmas, disciplinas, professores):
+    """Coloca um lote de novas turmas no horário sem conflitos e grava-as de uma só vez.
+
+    O horário proposto é calculado por utils.scheduler sobre as turmas existentes
+    e apresentado para revisão antes de ser gravado com um único append_rows.
+    """
+    titulo_secao("Agendamento em lote", "🧩")
+    st.caption("Indique as turmas a criar; o dia, a sala e a hora são escolhidos automaticamente sem conflitos.")
+
+    salas_reais = [s for s in SALA_OPCOES if s != "Outro"]
+    pedidos = st.data_editor(
+        _linhas_lote_vazias(),
+        num_rows="dynamic",
+        use_container_width=True,
+        key="lote_editor",
+        column_config={
+            'Nome turma': st.column_config.TextColumn(required=True),
+            'Disciplina': st.column_config.SelectboxColumn(options=disciplinas[1:], required=True),
+            'Professor': st.column_config.SelectboxColumn(options=professores[1:], required=True),
+            'Duração (min)': st.column_config.NumberColumn(min_value=15, max_value=480, step=15, default=60),
+            'Vagas': st.column_config.NumberColumn(min_value=1, step=1, default=10),
+            'Nível': st.column_config.SelectboxColumn(options=NIVEL_OPCOES, default=NIVEL_OPCOES[0]),
+            'Dia preferido': st.column_config.SelectboxColumn(options=DIAS_SEMANA),
+            'Sala preferida': st.column_config.SelectboxColumn(options=salas_reais),
+        },
+    )
+
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    with col1:
+        salas = st.multiselect("🚪 Salas a usar", options=salas_reais, default=salas_reais, key="lote_salas")
+    with col2:
+        janela_inicio = st.time_input("Das", value=time_obj(8, 0), key="lote_janela_inicio")
+    with col3:
+        janela_fim = st.time_input("Até", value=time_obj(20, 0), key="lote_janela_fim")
+    with col4:
+        tempo_maximo = st.number_input("⏱️ Tempo máx. (s)", min_value=1, max_value=30, value=3, key="lote_tempo")
+
+    estado_secao = section_state("Turmas")
+    if st.button("🧩 Calcular horário", key="lote_calcular"):
+        estado_secao.pop_extra('agendamento_lote')
+        pedidos = pedidos.dropna(subset=['Nome turma', 'Disciplina', 'Professor'])
+        erros = []
+        if pedidos.empty: erros.append("Adicione pelo menos uma turma completa (nome, disciplina e professor).")
+        if not salas: erros.append("Selecione pelo menos uma sala.")
+        if janela_fim <= janela_inicio: erros.append("O fim da janela deve ser posterior ao início.")
+
+        # Nomes únicos por disciplina, no lote e face às turmas existentes
+        nomes = pedidos['Nome turma'].map(normalize_string) + '|' + pedidos['Disciplina'].astype(str)
+        existentes = set()
+        if not df_turmas.empty:
+            existentes = set(df_turmas['Nome turma'].map(normalize_string) + '|' + df_turmas['Disciplina'].astype(str))
+        repetidos = pedidos.loc[nomes.duplicated(keep=False) | nomes.isin(existentes), 'Nome turma']
+        if not repetidos.empty:
+            erros.append(f"Nomes de turma repetidos para a mesma disciplina: {', '.join(sorted(set(repetidos)))}.")
+
+        if erros:
+            st.error("Por favor, corrija os seguintes erros:\n- " + "\n- ".join(erros))
+        else:
+            requests = [
+                TurmaRequest(
+                    str(p['Nome turma']).strip(), p['Disciplina'], p['Professor'],
+                    to_int(p['Duração (min)'], 60),
+                    [p['Dia preferido']] if not is_missing(p['Dia preferido']) else None,
+                    [p['Sala preferida']] if not is_missing(p['Sala preferida']) else None,
+                    dados={'vagas': to_int(p['Vagas'], 10),
+                           'nivel': NIVEL_OPCOES[0] if is_missing(p['Nível']) else p['Nível']},
+                )
+                for _, p in pedidos.iterrows()
+            ]
+            janela = (hora_para_minutos(janela_inicio), hora_para_minutos(janela_fim))
+            with st.spinner("A calcular o horário..."):
+                resultado = solve_schedule(get_free_interval_index(janela), requests, salas,
+                                           time_budget=float(tempo_maximo))
+
+            # IDs sequenciais reservados a partir do próximo ID livre
+            primeiro = int(generate_unique_id(df_turmas, 'ID_Turma', 'T')[1:])
+            linhas = []
+            for n, (i, (dia, sala, inicio, fim)) in enumerate(sorted(resultado['atribuicoes'].items())):
+                req = requests[i]
+                linhas.append([
+                    f"T{primeiro + n:04d}", req.nome, req.disciplina, req.professor, sala, "",
+                    dia, minutes_label(inicio), minutes_label(fim), req.dados['vagas'],
+                    req.dados['nivel'], "Ativa", ""
+                ])
+            estado_secao.set_extra('agendamento_lote', {
+                'linhas': linhas,
+                'por_colocar': [requests[i].nome for i in resultado['por_colocar']],
+                'tempo_esgotado': resultado['tempo_esgotado'],
+                'geracao': get_sheet_generation("Turmas"),
+            })
+
+    proposta = estado_secao.get_extra('agendamento_lote')
+    if not proposta:
+        return
+
+    if proposta['por_colocar']:
+        motivo = "o tempo máximo foi atingido" if proposta['tempo_esgotado'] else "não há horários livres compatíveis"
+        st.warning(f"Não foi possível colocar {len(proposta['por_colocar'])} turma(s) ({motivo}): "
+                   f"{', '.join(proposta['por_colocar'])}.")
+    if not proposta['linhas']:
+        return
+
+    st.markdown(f"**Pré-visualização** — {len(proposta['linhas'])} turma(s) a adicionar:")
+    st.dataframe(pd.DataFrame(proposta['linhas'], columns=TURMA_COLUNAS).drop(columns=['Outro_Local', 'Observacoes']),
+                 hide_index=True, use_container_width=True)
+
+    b_col1, b_col2, _ = st.columns([2, 1, 4])
+    with b_col1:
+        gravar = st.button(f"✅ Gravar {len(proposta['linhas'])} turma(s)", type="primary", key="lote_gravar")
+    with b_col2:
+        descartar = st.button("Descartar", key="lote_descartar")
+
+    if descartar:
+        estado_secao.pop_extra('agendamento_lote')
+        st.rerun()
+
+    if gravar:
+        if proposta['geracao'] != get_sheet_generation("Turmas"):
+            st.warning("As turmas foram alteradas desde o cálculo. Calcule o horário novamente.")
+            return
+        # Uma única escrita para todo o lote
+        sheet_turmas.append_rows(proposta['linhas'])
+        for linha in proposta['linhas']:
+            notify_sheet_write("Turmas", 'create', new_row=dict(zip(TURMA_COLUNAS, linha)))
+        estado_secao.pop_extra('agendamento_lote')
+        notificar(f"{len(proposta['linhas'])} turma(s) adicionada(s) com sucesso!")
+        st.rerun(scope="app")
 
-SALA_OPCOES = ["Sala 1", "Sala 2", "Sala 3", "Sala de Artes", "Sala Exterior", "Outro"]
-DIAS_SEMANA = ["Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"]
-NIVEL_OPCOES = ["Inicial", "Intermédio-Inicial", "Intermédio", "Intermédio-Avançado", "Avançado", "Outro"]
-ESTADO_OPCOES = ["Ativa", "Inativa"]
 
 def mostrar_pagina():
     st.title("🏫 Gestão de Turmas")
-    if 'form_turma_key' not in st.session_state:
-        st.session_state.form_turma_key = 0
 
     sheet_turmas = get_worksheet("Turmas")
-    sheet_disc = get_worksheet("Disciplinas")
-    sheet_prof = get_worksheet("Professores")
+    df_turmas = get_sheet_data("Turmas")
+    df_disc = get_sheet_data("Disciplinas")
+    df_prof = get_sheet_data("Professores")
 
     # Obter listas de opções
     try:
-        disciplinas = ["-- Selecione --"] + sheet_disc.col_values(2)[1:]  # Coluna B: Nome da Disciplina
-        professores = ["-- Selecione --"] + sheet_prof.col_values(2)[1:] # Coluna B: Nome Completo
+        disciplinas = ["-- Selecione --"] + df_disc['Nome da Disciplina'].tolist()
+        professores = ["-- Selecione --"] + df_prof['Nome Completo'].tolist()
     except Exception as e:
         st.error(f"Não foi possível carregar as listas de disciplinas ou professores: {e}")
         disciplinas = ["-- Selecione --"]
         professores = ["-- Selecione --"]
 
-    tab_adicionar, tab_gerir = st.tabs(["➕ Adicionar turma", "📋 Gerir turmas"])
+    tab_adicionar, tab_lote, tab_gerir = st.tabs(["➕ Adicionar turma", "🧩 Agendamento em lote", "📋 Gerir turmas"])
 
     with tab_adicionar:
-        titulo_secao("Adicionar nova turma", "➕")
-        with st.form(f"form_turma_{st.session_state.form_turma_key}"):
-            col1, col2 = st.columns(2)
-            with col1:
-                nome_turma = st.text_input("✍️ **Nome da turma**")
-                disciplina = st.selectbox("📚 **Disciplina**", options=disciplinas)
-                professor = st.selectbox("👨‍🏫 **Professor**", options=professores)
-                sala = st.selectbox("🚪 **Sala**", options=SALA_OPCOES)
-                outro_local = st.text_input("📍 **Especifique o local**", disabled=(sala != "Outro"))
-            with col2:
-                dia_semana = st.selectbox("🗓️ **Dia da Semana**", options=DIAS_SEMANA)
-                hora_inicio = st.time_input("⏰ **Hora de Início**")
-                hora_fim = st.time_input("🏁 **Hora de Fim**")
-                vagas = st.number_input("👥 **Número de vagas**", min_value=1, step=1)
-
-            nivel = st.selectbox("📶 **Nível**", options=NIVEL_OPCOES)
-            estado = st.selectbox("📊 **Estado**", options=ESTADO_OPCOES)
-            observacoes = st.text_area("📝 **Observações**")
-            
-            b_col1, b_col2, _ = st.columns([1, 1, 5])
-            with b_col1:
-                submit_guardar = st.form_submit_button("Guardar", type="primary")
-            with b_col2:
-                submit_limpar = st.form_submit_button("Limpar")
-
-        if submit_limpar:
-            st.session_state.form_turma_key += 1
-            st.rerun()
-
-        if submit_guardar:
-            # --- Validações ---
-            erros = []
-            if not nome_turma.strip(): erros.append("Nome da turma é obrigatório.")
-            if disciplina == "-- Selecione --": erros.append("Disciplina é obrigatória.")
-            if professor == "-- Selecione --": erros.append("Professor é obrigatório.")
-            if sala == "Outro" and not outro_local.strip(): erros.append("Especifique o local é obrigatório quando a sala é 'Outro'.")
-            if hora_fim <= hora_inicio: erros.append("A Hora de Fim deve ser posterior à Hora de Início.")
-
-            if erros:
-                st.error("Por favor, corrija os seguintes erros:\n- " + "\n- ".join(erros))
-            else:
-                dados_atuais = sheet_turmas.get_all_records()
-                conflitos = []
-                # Validar conflitos de horário
-                for turma in dados_atuais:
-                    if turma.get('Dia da Semana') == dia_semana:
-                        try:
-                            turma_inicio = time_obj.fromisoformat(turma.get('Hora de Inicio'))
-                            turma_fim = time_obj.fromisoformat(turma.get('Hora de Fim'))
-                            if check_time_overlap(hora_inicio, hora_fim, turma_inicio, turma_fim):
-                                if sala != "Outro" and turma.get('Sala') == sala:
-                                    conflitos.append(f"Sala '{sala}' já está ocupada neste horário.")
-                                if turma.get('Professor') == professor:
-                                    conflitos.append(f"Professor '{professor}' já tem uma aula neste horário.")
-                        except (ValueError, TypeError):
-                            continue # Ignora turmas com formato de hora inválido
-
-                # Validar nome único por disciplina
-                for turma in dados_atuais:
-                    if normalize_string(turma.get('Nome turma')) == normalize_string(nome_turma) and turma.get('Disciplina') == disciplina:
-                        conflitos.append(f"O nome '{nome_turma}' já existe para a disciplina '{disciplina}'.")
-                        break
-
-                if conflitos:
-                    st.error("Foram encontrados os seguintes conflitos:\n- " + "\n- ".join(conflitos))
-                else:
-                    # Gerar ID
-                    if not dados_atuais: proximo_id_num = 1
-                    else:
-                        max_id = 0
-                        for r in dados_atuais:
-                            try:
-                                id_num = int(r.get('ID_Turma', 'T0').split('T')[-1])
-                                if id_num > max_id: max_id = id_num
-                            except (ValueError, TypeError): continue
-                        proximo_id_num = max_id + 1
-                    novo_id = f"T{proximo_id_num:04d}"
-                    
-                    # Guardar dados
-                    nova_linha = [
-                        novo_id, nome_turma, disciplina, professor, sala, 
-                        outro_local if sala == "Outro" else "", dia_semana, 
-                        hora_inicio.strftime('%H:%M'), hora_fim.strftime('%H:%M'), vagas,
-                        nivel, estado, observacoes
-                    ]
-                    sheet_turmas.append_row(nova_linha)
-                    st.success(f"Turma '{nome_turma}' adicionada com sucesso!")
-                    st.session_state.form_turma_key += 1
-                    st.rerun()
+        _render_adicionar(sheet_turmas, disciplinas, professores)
+
+    with tab_lote:
+        render_agendamento_lote(sheet_turmas, df_turmas, disciplinas, professores)
 
     with tab_gerir:
-        dados = sheet_turmas.get_all_records()
-        if not dados:
-            st.info("Ainda não existem turmas registadas.")
+        _render_gerir(sheet_turmas, disciplinas, professores)
+
+
+# Os separadores de adicionar e gerir são fragmentos que leem as turmas (com cache):
+# as interações locais (abrir a edição, limpar o formulário) só os reexecutam a eles
+# (st.rerun(scope="fragment")). Depois de gravar ou apagar, a aplicação inteira é
+# reexecutada (st.rerun(scope="app")), para o outro separador mostrar os dados novos.
+
+@st.fragment
+def _render_adicionar(sheet_turmas, disciplinas, professores):
+    """Separador de adicionar turma."""
+    estado_secao = section_state("Turmas")
+    df_turmas = get_sheet_data("Turmas")
+    titulo_secao("Adicionar nova turma", "➕")
+    render_sugestao_horarios(disciplinas, professores)
+    with st.form(f"form_turma_{estado_secao.form_version}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            nome_turma = st.text_input("✍️ **Nome da turma**")
+            disciplina = st.selectbox("📚 **Disciplina**", options=disciplinas)
+            professor = st.selectbox("👨‍🏫 **Professor**", options=professores)
+            sala = st.selectbox("🚪 **Sala**", options=SALA_OPCOES)
+            outro_local = st.text_input("📍 **Especifique o local**", disabled=(sala != "Outro"))
+        with col2:
+            dia_semana = st.selectbox("🗓️ **Dia da Semana**", options=DIAS_SEMANA)
+            hora_inicio = st.time_input("⏰ **Hora de Início**")
+            hora_fim = st.time_input("🏁 **Hora de Fim**")
+            vagas = st.number_input("👥 **Número de vagas**", min_value=1, step=1)
+
+        nivel = st.selectbox("📶 **Nível**", options=NIVEL_OPCOES)
+        estado = st.selectbox("📊 **Estado**", options=ESTADO_OPCOES)
+        observacoes = st.text_area("📝 **Observações**")
+
+        b_col1, b_col2, _ = st.columns([1, 1, 5])
+        with b_col1:
+            submit_guardar = st.form_submit_button("Guardar", type="primary")
+        with b_col2:
+            submit_limpar = st.form_submit_button("Limpar")
+
+    if submit_limpar:
+        estado_secao.reset_form()
+        st.rerun(scope="fragment")
+
+    if submit_guardar:
+        # --- Validações ---
+        erros = []
+        if not nome_turma.strip(): erros.append("Nome da turma é obrigatório.")
+        if disciplina == "-- Selecione --": erros.append("Disciplina é obrigatória.")
+        if professor == "-- Selecione --": erros.append("Professor é obrigatório.")
+        if sala == "Outro" and not outro_local.strip(): erros.append("Especifique o local é obrigatório quando a sala é 'Outro'.")
+        if hora_fim <= hora_inicio: erros.append("A Hora de Fim deve ser posterior à Hora de Início.")
+
+        if erros:
+            st.error("Por favor, corrija os seguintes erros:\n- " + "\n- ".join(erros))
         else:
-            df = pd.DataFrame(dados)
-
-            # --- VISTA DE EDIÇÃO ---
-            if 'edit_turma_index' in st.session_state:
-                idx = st.session_state['edit_turma_index']
-                turma_atual = df.loc[idx]
-
-                if st.button("⬅️ Voltar à lista"):
-                    del st.session_state['edit_turma_index']
-                    st.rerun()
-                
-                st.subheader(f"Editar turma: {turma_atual.get('Nome turma')}")
-                with st.form("form_editar_turma"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        novo_nome = st.text_input("✍️ **Nome da turma**", value=turma_atual.get('Nome turma'))
-                        
-                        disc_idx = disciplinas.index(turma_atual.get('Disciplina')) if turma_atual.get('Disciplina') in disciplinas else 0
-                        nova_disciplina = st.selectbox("📚 **Disciplina**", options=disciplinas, index=disc_idx)
-                        
-                        prof_idx = professores.index(turma_atual.get('Professor')) if turma_atual.get('Professor') in professores else 0
-                        novo_professor = st.selectbox("👨‍🏫 **Professor**", options=professores, index=prof_idx)
-                        
-                        sala_idx = SALA_OPCOES.index(turma_atual.get('Sala')) if turma_atual.get('Sala') in SALA_OPCOES else 0
-                        nova_sala = st.selectbox("🚪 **Sala**", options=SALA_OPCOES, index=sala_idx)
-                        novo_outro_local = st.text_input("📍 **Especifique o local**", value=turma_atual.get('Outro_Local'), disabled=(nova_sala != "Outro"))
-                    with col2:
-                        dia_idx = DIAS_SEMANA.index(turma_atual.get('Dia da Semana')) if turma_atual.get('Dia da Semana') in DIAS_SEMANA else 0
-                        novo_dia_semana = st.selectbox("🗓️ **Dia da Semana**", options=DIAS_SEMANA, index=dia_idx)
-
-                        try:
-                            hora_i = time_obj.fromisoformat(turma_atual.get('Hora de Inicio', '00:00'))
-                            hora_f = time_obj.fromisoformat(turma_atual.get('Hora de Fim', '00:00'))
-                        except (ValueError, TypeError):
-                            hora_i, hora_f = time_obj(9, 0), time_obj(10, 0)
-                        
-                        nova_hora_inicio = st.time_input("⏰ **Hora de Início**", value=hora_i)
-                        nova_hora_fim = st.time_input("🏁 **Hora de Fim**", value=hora_f)
-                        novas_vagas = st.number_input("👥 **Número de vagas**", min_value=1, step=1, value=int(turma_atual.get('Numero de vagas', 1)))
-
-                    nivel_idx = NIVEL_OPCOES.index(turma_atual.get('Nivel')) if turma_atual.get('Nivel') in NIVEL_OPCOES else 0
-                    novo_nivel = st.selectbox("📶 **Nível**", options=NIVEL_OPCOES, index=nivel_idx)
-
-                    estado_idx = ESTADO_OPCOES.index(turma_atual.get('Estado')) if turma_atual.get('Estado') in ESTADO_OPCOES else 0
-                    novo_estado = st.selectbox("📊 **Estado**", options=ESTADO_OPCOES, index=estado_idx)
-
-                    novas_observacoes = st.text_area("📝 **Observações**", value=turma_atual.get('Observacoes', ''))
-
-                    if st.form_submit_button("Guardar Alterações"):
-                        erros = []
-                        if not novo_nome.strip(): erros.append("Nome da turma é obrigatório.")
-                        if nova_disciplina == "-- Selecione --": erros.append("Disciplina é obrigatória.")
-                        if novo_professor == "-- Selecione --": erros.append("Professor é obrigatório.")
-                        if nova_sala == "Outro" and not novo_outro_local.strip(): erros.append("Especifique o local é obrigatório.")
-                        if nova_hora_fim <= nova_hora_inicio: erros.append("A Hora de Fim deve ser posterior à Hora de Início.")
-
-                        if erros:
-                            st.error("Por favor, corrija os seguintes erros:\n- " + "\n- ".join(erros))
-                        else:
-                            conflitos = []
-                            for i, turma in df.iterrows():
-                                if i == idx: continue # Ignorar a própria turma na verificação
-                                if turma.get('Dia da Semana') == novo_dia_semana:
-                                    try:
-                                        turma_inicio = time_obj.fromisoformat(turma.get('Hora de Inicio'))
-                                        turma_fim = time_obj.fromisoformat(turma.get('Hora de Fim'))
-                                        if check_time_overlap(nova_hora_inicio, nova_hora_fim, turma_inicio, turma_fim):
-                                            if nova_sala != "Outro" and turma.get('Sala') == nova_sala:
-                                                conflitos.append(f"Sala '{nova_sala}' já está ocupada neste horário.")
-                                            if turma.get('Professor') == novo_professor:
-                                                conflitos.append(f"Professor '{novo_professor}' já tem uma aula neste horário.")
-                                    except (ValueError, TypeError): continue
-                            
-                            for i, turma in df.iterrows():
-                                if i == idx: continue
-                                if normalize_string(turma.get('Nome turma')) == normalize_string(novo_nome) and turma.get('Disciplina') == nova_disciplina:
-                                    conflitos.append(f"O nome '{novo_nome}' já existe para a disciplina '{nova_disciplina}'.")
-                                    break
-                            
-                            if conflitos:
-                                st.error("Foram encontrados os seguintes conflitos:\n- " + "\n- ".join(conflitos))
-                            else:
-                                # A coluna A (ID) não é atualizada
-                                valores = [
-                                    novo_nome, nova_disciplina, novo_professor, nova_sala,
-                                    novo_outro_local if nova_sala == "Outro" else "",
-                                    novo_dia_semana, nova_hora_inicio.strftime('%H:%M'),
-                                    nova_hora_fim.strftime('%H:%M'), novas_vagas,
-                                    novo_nivel, novo_estado, novas_observacoes
-                                ]
-                                sheet_turmas.update(f'B{idx + 2}:M{idx + 2}', [valores])
-                                st.success(f"Turma '{novo_nome}' atualizada com sucesso!")
-                                del st.session_state['edit_turma_index']
-                                time.sleep(0.5)
-                                st.rerun()
-
-            # --- VISTA DE APAGAR ---
-            elif 'delete_turma_index' in st.session_state:
-                idx = st.session_state['delete_turma_index']
-                entity_name = df.loc[idx, 'Nome turma'] if 'Nome turma' in df.columns else df.loc[idx].get('Nome da Turma', 'N/A')
-
-                if st.button("⬅️ Voltar à lista"):
-                    del st.session_state['delete_turma_index']
-                    st.rerun()
-
-                st.subheader("Apagar turma")
-                st.warning(f"Tens a certeza que queres apagar a turma: {entity_name}?")
-                
-                col1, col2, _ = st.columns([1, 1, 5])
+            conflitos = verificar_conflitos(df_turmas, nome_turma, disciplina, professor,
+                                            sala, dia_semana, hora_inicio, hora_fim)
+
+            if conflitos:
+                st.error("Foram encontrados os seguintes conflitos:\n- " + "\n- ".join(conflitos))
+            else:
+                # Gerar ID
+                novo_id = generate_unique_id(df_turmas, 'ID_Turma', 'T')
+
+                # Guardar dados
+                nova_linha = [
+                    novo_id, nome_turma, disciplina, professor, sala, 
+                    outro_local if sala == "Outro" else "", dia_semana, 
+                    hora_inicio.strftime('%H:%M'), hora_fim.strftime('%H:%M'), vagas,
+                    nivel, estado, observacoes
+                ]
+                sheet_turmas.append_row(nova_linha)
+                notify_sheet_write("Turmas", 'create', new_row=dict(zip(TURMA_COLUNAS, nova_linha)))
+                notificar(f"Turma '{nome_turma}' adicionada com sucesso!")
+                estado_secao.reset_form()
+                st.rerun(scope="app")
+
+
+@st.fragment
+def _render_gerir(sheet_turmas, disciplinas, professores):
+    """Separador de gerir turmas (lista e edição)."""
+    estado_secao = section_state("Turmas")
+    df_turmas = get_sheet_data("Turmas")
+    if df_turmas.empty:
+        st.info("Ainda não existem turmas registadas.")
+    else:
+        df = df_turmas
+
+        # A turma é localizada pelo ID (a posição pode ter mudado desde que foi escolhida)
+        idx_edicao = resolve_record(df, 'ID_Turma', estado_secao.edit_id)
+        if estado_secao.edit_id and idx_edicao is None:
+            st.warning("A turma selecionada já não existe.")
+            estado_secao.back_to_list()
+
+        # --- VISTA DE EDIÇÃO ---
+        if idx_edicao is not None:
+            idx = idx_edicao
+            turma_atual = df.loc[idx]
+
+            if st.button("⬅️ Voltar à lista"):
+                estado_secao.back_to_list()
+                st.rerun(scope="fragment")
+
+            # Conflito pendente de uma gravação anterior (edição concorrente)
+            if render_conflict_resolution(TURMA_CONFIG):
+                estado_secao.back_to_list()
+                st.rerun(scope="app")
+
+            st.subheader(f"Editar turma: {turma_atual.get('Nome turma')}")
+            with st.form("form_editar_turma"):
+                col1, col2 = st.columns(2)
                 with col1:
-                    if st.button("Sim, apagar", type="primary"):
-                        sheet_turmas.delete_rows(idx + 2)
-                        st.success(f"Turma '{entity_name}' apagada com sucesso!")
-                        del st.session_state['delete_turma_index']
-                        time.sleep(0.5)
-                        st.rerun()
+                    novo_nome = st.text_input("✍️ **Nome da turma**", value=turma_atual.get('Nome turma'))
+
+                    disc_idx = disciplinas.index(turma_atual.get('Disciplina')) if turma_atual.get('Disciplina') in disciplinas else 0
+                    nova_disciplina = st.selectbox("📚 **Disciplina**", options=disciplinas, index=disc_idx)
+
+                    prof_idx = professores.index(turma_atual.get('Professor')) if turma_atual.get('Professor') in professores else 0
+                    novo_professor = st.selectbox("👨‍🏫 **Professor**", options=professores, index=prof_idx)
+
+                    sala_idx = SALA_OPCOES.index(turma_atual.get('Sala')) if turma_atual.get('Sala') in SALA_OPCOES else 0
+                    nova_sala = st.selectbox("🚪 **Sala**", options=SALA_OPCOES, index=sala_idx)
+                    novo_outro_local = st.text_input("📍 **Especifique o local**", value=turma_atual.get('Outro_Local'), disabled=(nova_sala != "Outro"))
                 with col2:
-                    if st.button("Cancelar"):
-                        del st.session_state['delete_turma_index']
-                        st.rerun()
+                    dia_idx = DIAS_SEMANA.index(turma_atual.get('Dia da Semana')) if turma_atual.get('Dia da Semana') in DIAS_SEMANA else 0
+                    novo_dia_semana = st.selectbox("🗓️ **Dia da Semana**", options=DIAS_SEMANA, index=dia_idx)
+
+                    hora_i = minutes_to_time(turma_atual.get(INICIO_MIN), time_obj(9, 0))
+                    hora_f = minutes_to_time(turma_atual.get(FIM_MIN), time_obj(10, 0))
+
+                    nova_hora_inicio = st.time_input("⏰ **Hora de Início**", value=hora_i)
+                    nova_hora_fim = st.time_input("🏁 **Hora de Fim**", value=hora_f)
+                    novas_vagas = st.number_input("👥 **Número de vagas**", min_value=1, step=1, value=max(1, to_int(turma_atual.get('Numero de vagas'), 1)))
 
-            # --- VISTA DE LISTA ---
+                nivel_idx = NIVEL_OPCOES.index(turma_atual.get('Nivel')) if turma_atual.get('Nivel') in NIVEL_OPCOES else 0
+                novo_nivel = st.selectbox("📶 **Nível**", options=NIVEL_OPCOES, index=nivel_idx)
+
+                estado_idx = ESTADO_OPCOES.index(turma_atual.get('Estado')) if turma_atual.get('Estado') in ESTADO_OPCOES else 0
+                novo_estado = st.selectbox("📊 **Estado**", options=ESTADO_OPCOES, index=estado_idx)
+
+                novas_observacoes = st.text_area("📝 **Observações**", value=turma_atual.get('Observacoes', ''))
+
+                if st.form_submit_button("Guardar Alterações"):
+                    erros = []
+                    if not novo_nome.strip(): erros.append("Nome da turma é obrigatório.")
+                    if nova_disciplina == "-- Selecione --": erros.append("Disciplina é obrigatória.")
+                    if novo_professor == "-- Selecione --": erros.append("Professor é obrigatório.")
+                    if nova_sala == "Outro" and not novo_outro_local.strip(): erros.append("Especifique o local é obrigatório.")
+                    if nova_hora_fim <= nova_hora_inicio: erros.append("A Hora de Fim deve ser posterior à Hora de Início.")
+
+                    if erros:
+                        st.error("Por favor, corrija os seguintes erros:\n- " + "\n- ".join(erros))
+                    else:
+                        # Ignorar a própria turma na verificação
+                        conflitos = verificar_conflitos(df, novo_nome, nova_disciplina, novo_professor,
+                                                        nova_sala, novo_dia_semana, nova_hora_inicio,
+                                                        nova_hora_fim, ignorar_idx=idx)
+
+                        if conflitos:
+                            st.error("Foram encontrados os seguintes conflitos:\n- " + "\n- ".join(conflitos))
+                        else:
+                            # A coluna A (ID) não é atualizada
+                            valores = [
+                                novo_nome, nova_disciplina, novo_professor, nova_sala,
+                                novo_outro_local if nova_sala == "Outro" else "",
+                                novo_dia_semana, nova_hora_inicio.strftime('%H:%M'),
+                                nova_hora_fim.strftime('%H:%M'), novas_vagas,
+                                novo_nivel, novo_estado, novas_observacoes
+                            ]
+                            if update_record(TURMA_CONFIG, idx, dict(zip(TURMA_COLUNAS[1:], valores)),
+                                             success_message=f"Turma '{novo_nome}' atualizada com sucesso!"):
+                                estado_secao.back_to_list()
+                                st.rerun(scope="app")
+
+        # --- VISTA DE LISTA ---
+        else:
+            titulo_secao("Lista de turmas", "📋")
+            pesquisa = st.text_input("Pesquisar por nome, disciplina, professor ou sala:")
+
+            if pesquisa:
+                df_filtrado = df[df.apply(lambda row: any(pesquisa.lower() in str(x).lower() for x in row), axis=1)]
             else:
-                titulo_secao("Lista de turmas", "📋")
-                pesquisa = st.text_input("Pesquisar por nome, disciplina, professor ou sala:")
-
-                if pesquisa:
-                    df_filtrado = df[df.apply(lambda row: any(pesquisa.lower() in str(x).lower() for x in row), axis=1)]
-                else:
-                    df_filtrado = df
-
-                for i, row in df_filtrado.iterrows():
-                    expander_title = f"🏫 **{row.get('Nome turma', '')}** ({row.get('Disciplina', '')})"
-                    with st.expander(expander_title):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.text_input("🆔 ID", value=row.get('ID_Turma', ''), key=f"disp_id_{i}", disabled=True)
-                            st.text_input("👨‍🏫 Professor", value=row.get('Professor', ''), key=f"disp_prof_{i}", disabled=True)
-                            sala_display = row.get('Sala', '')
-                            if sala_display == "Outro":
-                                sala_display = f"Outro: {row.get('Outro_Local', '')}"
-                            st.text_input("🚪 Sala", value=sala_display, key=f"disp_sala_{i}", disabled=True)
-                            st.text_input("📶 Nível", value=row.get('Nivel', ''), key=f"disp_nivel_{i}", disabled=True)
-                        with col2:
-                            st.text_input("🗓️ Dia", value=row.get('Dia da Semana', ''), key=f"disp_dia_{i}", disabled=True)
-                            st.text_input("⏰ Horário", value=f"{row.get('Hora de Inicio', '')} - {row.get('Hora de Fim', '')}", key=f"disp_hora_{i}", disabled=True)
-                            st.text_input("👥 Vagas", value=str(row.get('Numero de vagas', '')), key=f"disp_vagas_{i}", disabled=True)
-                            st.text_input("📊 Estado", value=row.get('Estado', ''), key=f"disp_estado_{i}", disabled=True)
-                        
-                        st.text_area("📝 Observações", value=row.get('Observacoes', ''), key=f"disp_obs_{i}", disabled=True)
-
-                        st.write("---")
-                        b_col1, b_col2, _ = st.columns([1, 1, 5])
-                        with b_col1:
-                            if st.button("✏️ Editar", key=f"edit_turma_{i}", use_container_width=True):
-                                st.session_state['edit_turma_index'] = i
-                                st.rerun()
-                        with b_col2:
-                            if st.button("🗑️ Apagar", key=f"delete_turma_{i}", use_container_width=True):
-                                st.session_state['delete_turma_index'] = i
-                                st.rerun()
+                df_filtrado = df
+
+            render_export_buttons(df_filtrado, "Turmas", filtro=pesquisa)
+
+            for i, row in df_filtrado.iterrows():
+                expander_title = f"🏫 **{row.get('Nome turma', '')}** ({row.get('Disciplina', '')})"
+                with st.expander(expander_title):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.text_input("🆔 ID", value=row.get('ID_Turma', ''), key=f"disp_id_{i}", disabled=True)
+                        st.text_input("👨‍🏫 Professor", value=row.get('Professor', ''), key=f"disp_prof_{i}", disabled=True)
+                        sala_display = row.get('Sala', '')
+                        if sala_display == "Outro":
+                            sala_display = f"Outro: {row.get('Outro_Local', '')}"
+                        st.text_input("🚪 Sala", value=sala_display, key=f"disp_sala_{i}", disabled=True)
+                        st.text_input("📶 Nível", value=row.get('Nivel', ''), key=f"disp_nivel_{i}", disabled=True)
+                    with col2:
+                        st.text_input("🗓️ Dia", value=row.get('Dia da Semana', ''), key=f"disp_dia_{i}", disabled=True)
+                        st.text_input("⏰ Horário", value=f"{row.get('Hora de Inicio', '')} - {row.get('Hora de Fim', '')}", key=f"disp_hora_{i}", disabled=True)
+                        st.text_input("👥 Vagas", value='' if is_missing(row.get('Numero de vagas')) else str(row.get('Numero de vagas')), key=f"disp_vagas_{i}", disabled=True)
+                        st.text_input("📊 Estado", value=row.get('Estado', ''), key=f"disp_estado_{i}", disabled=True)
+
+                    st.text_area("📝 Observações", value=row.get('Observacoes', ''), key=f"disp_obs_{i}", disabled=True)
+
+                    st.write("---")
+                    b_col1, b_col2, _ = st.columns([1, 1, 5])
+                    with b_col1:
+                        if st.button("✏️ Editar", key=f"edit_turma_{i}", use_container_width=True):
+                            estado_secao.start_edit(row.get('ID_Turma'))
+                            st.rerun(scope="fragment")
+                    with b_col2:
+                        if st.button("🗑️ Apagar", key=f"delete_turma_{i}", use_container_width=True):
+                            id_turma = row.get('ID_Turma')
+                            confirm_delete_dialog('turma', row.get('Nome turma', ''),
+                                                  lambda: _apagar_turma(sheet_turmas, id_turma))
+
+
+def _apagar_turma(sheet_turmas, id_turma) -> bool:
+    """Apaga a turma com o ID indicado (confirmado no diálogo).
+
+    Returns:
+        bool: True se a turma foi apagada ou já não existia
+    """
+    df = get_sheet_data("Turmas")
+    idx = resolve_record(df, 'ID_Turma', id_turma)
+    if idx is None:
+        st.warning("A turma selecionada já não existe.")
+        return True
+    return delete_record(TURMA_CONFIG, idx, confirmed=True,
+                         success_message=f"Turma '{df.loc[idx, 'Nome turma']}' apagada com sucesso!")
@@ -1,58 +1,70 @@
 import streamlit as st
 import pandas as pd
-import time
 import re
 from datetime import date, datetime
 from utils.sheets import get_worksheet
-from utils.ui import titulo_secao
+from utils.ui import notificar, titulo_secao
+from utils.crud import (
+    SheetConfig, get_sheet_data, notify_sheet_write, update_record, delete_record,
+    render_conflict_resolution
+)
+from utils.schema import to_date
+from utils.bulk_import import read_upload, map_columns, validate_utentes, write_utentes
 from utils.components import (
-    render_confirmation_dialog, render_action_buttons
+    confirm_delete_dialog, render_action_buttons, render_export_buttons
 )
+from utils.state import resolve_record, section_state
 
 # --- Importações de validação centralizada ---
 from utils.validation import (
-    is_valid_phone, is_valid_nif, is_valid_postal_code, is_valid_email, parse_date
+    is_valid_phone, is_valid_nif, is_valid_postal_code, is_valid_email,
+    GRAU_ESCOLARIDADE_OPCOES, SITUACAO_PROFISSIONAL_OPCOES, ESTADO_UTENTE_OPCOES
 )
 
-GRAU_ESCOLARIDADE_OPCOES = [
-    "Sem Escolaridade", "1º Ciclo (4ª classe)", "2º Ciclo (6º ano)", 
-    "3º Ciclo (9º ano)", "Ensino Secundário (12º ano)", "Licenciatura", 
-    "Mestrado", "Doutoramento", "Outro"
+# Ordem das colunas na folha "Utentes"
+UTENTE_COLUNAS = [
+    'ID', 'Nome', 'Data_de_nascimento', 'Naturalidade', 'Nacionalidade',
+    'Contacto_telefónico', 'Contacto_telefónico_2', 'Email', 'Morada',
+    'Codigo_Postal', 'Localidade', 'Cartao_Cidadao', 'CC_Validade', 'NIF',
+    'NISS', 'Cartao_Utente', 'Telefone_Familiar', 'Familiar',
+    'Grau_Escolaridade', 'Profissao', 'Situacao_Profissional',
+    'Data de inscrição', 'Observacoes', 'Estado'
 ]
 
-SITUACAO_PROFISSIONAL_OPCOES = [
-    "Ativo", "Desempregado", "Estudante", "Reformado", "Doméstico/a", "Outra"
-]
+# Edições e remoções passam pelo crud (linha localizada pelo ID e versão verificada)
+UTENTE_CONFIG = SheetConfig(name="Utentes", id_column="ID")
 
 # Removida função parse_date duplicada - usa a versão centralizada em utils/validation.py
 
 def mostrar_pagina():
     """Página principal de gestão de utentes."""
     st.title("🧍 Gestão de Utentes")
-    _init_session_state()
     sheet = get_worksheet("Utentes")
 
     # Criar tabs
-    tab_adicionar, tab_gerir = st.tabs(["➕ Adicionar utente", "📋 Gerir utentes"])
+    tab_adicionar, tab_importar, tab_gerir = st.tabs(["➕ Adicionar utente", "📥 Importar utentes", "📋 Gerir utentes"])
 
     with tab_adicionar:
         _render_tab_adicionar(sheet)
 
+    with tab_importar:
+        _render_tab_importar(sheet)
+
     with tab_gerir:
         _render_tab_gerenciar(sheet)
 
 
-def _init_session_state():
-    """Inicializa estado da sessão para formulários."""
-    if 'form_add_key' not in st.session_state:
-        st.session_state.form_add_key = 0
-
+# Cada separador é um fragmento: as interações locais (abrir a edição, limpar o
+# formulário) só o reexecutam a ele (st.rerun(scope="fragment")). Depois de gravar,
+# importar ou apagar, a aplicação inteira é reexecutada (st.rerun(scope="app")),
+# para o outro separador mostrar os dados novos.
 
+@st.fragment
 def _render_tab_adicionar(sheet):
     """Renderiza aba de adicionar utente."""
     titulo_secao("Adicionar novo utente", "➕")
 
-    form_key = st.session_state.form_add_key
+    form_key = section_state("Utentes").form_version
     with st.form(f"form_utente_{form_key}"):
         form_data = _render_form_adicionar()
 
@@ -63,8 +75,8 @@ def _render_tab_adicionar(sheet):
             limpar = st.form_submit_button("Limpar")
 
     if limpar:
-        st.session_state.form_add_key += 1
-        st.rerun()
+        section_state("Utentes").reset_form()
+        st.rerun(scope="fragment")
     elif guardar:
         _processar_form_adicionar(form_data, sheet)
 
@@ -113,7 +125,7 @@ def _render_form_adicionar():
             form_data['telefone_familiar'] = st.text_input("📞 Telefone do Familiar")
         with col2:
             form_data['data_inscricao'] = st.date_input("✍️ Data de inscrição", value=date.today(), format="DD/MM/YYYY")
-            form_data['estado'] = st.selectbox("🚦 Estado", ["Ativo", "Inativo"])
+            form_data['estado'] = st.selectbox("🚦 Estado", ESTADO_UTENTE_OPCOES)
         form_data['observacoes'] = st.text_area("📋 Observações")
 
     return form_data
@@ -136,9 +148,9 @@ def _processar_form_adicionar(form_data: dict, sheet):
 
     # Adicionar utente
     if _adicionar_utente(sheet, form_data):
-        st.success(f"Utente '{form_data['nome']}' adicionado com sucesso!")
-        st.session_state.form_add_key += 1
-        st.rerun()
+        notificar(f"Utente '{form_data['nome']}' adicionado com sucesso!")
+        section_state("Utentes").reset_form()
+        st.rerun(scope="app")
 
 
 def _validar_dados_formulario(form_data: dict) -> list:
@@ -203,6 +215,7 @@ def _adicionar_utente(sheet, form_data: dict) -> bool:
         ]
 
         sheet.append_row(nova_linha)
+        notify_sheet_write("Utentes", 'create', new_row=dict(zip(UTENTE_COLUNAS, nova_linha)))
         return True
     except Exception as e:
         st.error(f"Erro ao adicionar utente: {str(e)}")
@@ -225,35 +238,100 @@ def _gerar_proximo_id(dados_atuais: list) -> int:
     return max_id + 1
 
 
+@st.fragment
+def _render_tab_importar(sheet):
+    """Renderiza aba de importação de utentes a partir de CSV/Excel."""
+    titulo_secao("Importar utentes", "📥")
+    st.caption("O ficheiro deve ter uma linha de cabeçalho com os nomes das colunas da folha de utentes "
+               "(o ID é atribuído automaticamente). Datas no formato DD/MM/AAAA.")
+    st.download_button("📄 Descarregar modelo (CSV)", data=";".join(UTENTE_COLUNAS[1:]) + "\n",
+                       file_name="modelo_utentes.csv", mime="text/csv")
+
+    ficheiro = st.file_uploader("Ficheiro CSV ou Excel", type=["csv", "xlsx"],
+                                key=f"import_utentes_{section_state('Utentes').upload_version}")
+    if ficheiro is None:
+        return
+
+    raw = read_upload(ficheiro)
+    if raw is None:
+        return
+
+    df, ignoradas = map_columns(raw, UTENTE_COLUNAS[1:])
+    if ignoradas:
+        st.warning(f"Colunas ignoradas (não existem na folha): {', '.join(ignoradas)}")
+    if df.empty:
+        st.info("O ficheiro não tem linhas para importar.")
+        return
+
+    existentes = get_sheet_data("Utentes")
+    nifs_existentes = set(existentes['NIF'].astype(str).str.strip()) - {''} if 'NIF' in existentes.columns else set()
+    validos, erros = validate_utentes(df, nifs_existentes)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Linhas no ficheiro", len(df))
+    col2.metric("✅ Válidas", len(validos))
+    col3.metric("❌ Com erros", len(df) - len(validos))
+
+    if not erros.empty:
+        with st.expander(f"⚠️ Relatório de erros ({len(erros)})", expanded=True):
+            st.dataframe(erros, hide_index=True, use_container_width=True)
+            st.download_button("Descarregar relatório de erros", data=erros.to_csv(index=False).encode('utf-8'),
+                               file_name="erros_importacao_utentes.csv", mime="text/csv")
+
+    if validos.empty:
+        return
+
+    with st.expander(f"👀 Pré-visualização das linhas válidas ({len(validos)})"):
+        st.dataframe(validos, hide_index=True, use_container_width=True)
+
+    if st.button(f"📥 Importar {len(validos)} utente(s)", type="primary", key="import_utentes_confirmar"):
+        try:
+            gravados = write_utentes(sheet, validos, UTENTE_COLUNAS)
+        except Exception as e:
+            st.error(f"Erro ao importar utentes: {str(e)}")
+            return
+        notificar(f"{gravados} utente(s) importado(s) com sucesso!")
+        section_state("Utentes").reset_upload()
+        st.rerun(scope="app")
+
+
+@st.fragment
 def _render_tab_gerenciar(sheet):
     """Renderiza aba de gerenciamento de utentes."""
-    dados = sheet.get_all_records()
+    df = get_sheet_data("Utentes")
 
-    if not dados:
+    if df.empty:
         st.info("Ainda não existem utentes registados.")
         return
 
-    df = pd.DataFrame(dados)
+    # O utente é localizado pelo ID (a posição pode ter mudado desde que foi escolhido)
+    estado_secao = section_state("Utentes")
+    idx_edicao = resolve_record(df, 'ID', estado_secao.edit_id)
+    if estado_secao.edit_id and idx_edicao is None:
+        st.warning("O utente selecionado já não existe.")
+        estado_secao.back_to_list()
 
     # --- VISTA DE EDIÇÃO ---
-    if 'edit_index' in st.session_state:
-        _render_edicao_utente(sheet, df)
-    # --- VISTA DE APAGAR ---
-    elif 'delete_index' in st.session_state:
-        _render_apagar_utente(sheet, df)
+    if idx_edicao is not None:
+        _render_edicao_utente(sheet, df, idx_edicao)
     # --- VISTA DE LISTA ---
     else:
-        _render_lista_utentes(df)
+        _render_lista_utentes(sheet, df)
 
 
-def _render_edicao_utente(sheet, df):
+def _render_edicao_utente(sheet, df, idx):
     """Renderiza vista de edição de utente."""
-    idx = st.session_state['edit_index']
     utente_atual = df.loc[idx]
 
     if st.button("⬅️ Voltar à lista"):
-        del st.session_state['edit_index']
-        st.rerun()
+        section_state("Utentes").back_to_list()
+        st.rerun(scope="fragment")
+        return
+
+    # Conflito pendente de uma gravação anterior (edição concorrente)
+    if render_conflict_resolution(UTENTE_CONFIG):
+        section_state("Utentes").back_to_list()
+        st.rerun(scope="app")
         return
 
     st.subheader(f"Editar utente: {utente_atual['Nome']}")
@@ -267,9 +345,8 @@ def _render_form_edicao(utente_atual, sheet, idx):
 
         if st.form_submit_button("Guardar alterações"):
             if _processar_edicao(form_data, sheet, idx, utente_atual):
-                del st.session_state['edit_index']
-                time.sleep(0.5)
-                st.rerun()
+                section_state("Utentes").back_to_list()
+                st.rerun(scope="app")
 
 
 def _collect_form_data_edicao(utente_atual):
@@ -281,7 +358,7 @@ def _collect_form_data_edicao(utente_atual):
         col1, col2 = st.columns(2)
         with col1:
             form_data['novo_nome'] = st.text_input("**👤 Nome do utente**", value=utente_atual.get('Nome', ''), help="Campo obrigatório")
-            form_data['nova_data_nascimento'] = st.date_input("**🎂 Data de nascimento**", value=parse_date(utente_atual.get('Data_de_nascimento')), min_value=date(1920, 1, 1), format="DD/MM/YYYY", help="Campo obrigatório")
+            form_data['nova_data_nascimento'] = st.date_input("**🎂 Data de nascimento**", value=to_date(utente_atual.get('Data_de_nascimento')), min_value=date(1920, 1, 1), format="DD/MM/YYYY", help="Campo obrigatório")
             form_data['nova_naturalidade'] = st.text_input("🌍 Naturalidade", value=utente_atual.get('Naturalidade', ''))
         # ... outros campos ...
 
@@ -296,48 +373,32 @@ def _processar_edicao(form_data, sheet, idx, utente_atual):
     # Validações aqui
     # ... implementar validações ...
 
-    # Atualizar no Google Sheets
-    try:
-        novos_dados = {
-            'Nome': form_data.get('novo_nome', ''),
-            'Data_de_nascimento': form_data.get('nova_data_nascimento'),
-            # ... outros campos ...
-        }
-
-        if atualizar_utente(sheet, idx, novos_dados):
-            return True
-    except Exception as e:
-        st.error(f"Erro ao atualizar: {str(e)}")
-        return False
-    return False
-
-
-def _render_apagar_utente(sheet, df):
-    """Renderiza vista de apagar utente."""
-    idx = st.session_state['delete_index']
-    entity_name = df.loc[idx, 'Nome']
-
-    if st.button("⬅️ Voltar à lista"):
-        del st.session_state['delete_index']
-        st.rerun()
-        return
+    # Atualizar no Google Sheets (campos não editados mantêm o valor atual na folha)
+    novos_dados = {
+        'Nome': form_data.get('novo_nome', ''),
+        'Data_de_nascimento': form_data.get('nova_data_nascimento'),
+        # ... outros campos ...
+    }
+    return update_record(UTENTE_CONFIG, idx, novos_dados,
+                         success_message=f"Utente '{novos_dados['Nome']}' atualizado com sucesso!")
 
-    st.subheader("Apagar utente")
-    render_confirmation_dialog('utente', entity_name,
-                              lambda: _confirmar_apagar(sheet, idx),
-                              lambda: None)
 
+def _confirmar_apagar(sheet, id_utente) -> bool:
+    """Apaga o utente com o ID indicado (confirmado no diálogo).
 
-def _confirmar_apagar(sheet, idx):
-    """Confirma e executa exclusão."""
-    if apagar_utente(sheet, idx):
-        st.success("Utente apagado com sucesso!")
-        del st.session_state['delete_index']
-        time.sleep(0.5)
-        st.rerun()
+    Returns:
+        bool: True se o utente foi apagado ou já não existia
+    """
+    df = get_sheet_data("Utentes")
+    idx = resolve_record(df, 'ID', id_utente)
+    if idx is None:
+        st.warning("O utente selecionado já não existe.")
+        return True
+    return delete_record(UTENTE_CONFIG, idx, confirmed=True,
+                         success_message="Utente apagado com sucesso!")
 
 
-def _render_lista_utentes(df):
+def _render_lista_utentes(sheet, df):
     """Renderiza lista de utentes."""
     st.markdown("### Lista de utentes")
     pesquisa = st.text_input("Pesquisar utente por qualquer campo:")
@@ -346,14 +407,16 @@ def _render_lista_utentes(df):
     if pesquisa:
         df_filtrado = df[df.apply(lambda row: any(pesquisa.lower() in str(x).lower() for x in row), axis=1)]
 
+    render_export_buttons(df_filtrado, "Utentes", filtro=pesquisa)
+
     for i, row in df_filtrado.iterrows():
         expander_title = f"👤 **{row.get('Nome', 'Sem Nome')}**"
         with st.expander(expander_title):
             # Renderizar detalhes do utente
-            _render_detalhes_utente(row, i)
+            _render_detalhes_utente(sheet, row, i)
 
 
-def _render_detalhes_utente(row, i):
+def _render_detalhes_utente(sheet, row, i):
     """Renderiza detalhes de um utente."""
     # Implementação dos expansiónadores de informação
     # Por brevidade, mostrando apenas estrutura básica
@@ -362,12 +425,12 @@ def _render_detalhes_utente(row, i):
     col1, col2, col3, _ = st.columns([1, 1, 1, 4])
     with col1:
         if st.button("✏️ Editar", key=f"edit_utente_{i}"):
-            st.session_state['edit_index'] = i
-            st.rerun()
+            section_state("Utentes").start_edit(row.get('ID'))
+            st.rerun(scope="fragment")
     with col2:
         if st.button("🗑️ Apagar", key=f"delete_utente_{i}"):
-            st.session_state['delete_index'] = i
-            st.rerun()
+            id_utente = row.get('ID')
+            confirm_delete_dialog('utente', row.get('Nome', ''), lambda: _confirmar_apagar(sheet, id_utente))
     with col3:
         st.button("⚙️ Gerir", key=f"manage_utente_{i}")
 
@@ -415,50 +478,3 @@ def adicionar_utente(sheet, nome, data_nascimento, naturalidade, nacionalidade,
     except Exception as e:
         st.error(f"Erro ao adicionar utente: {str(e)}")
         return False
-
-def atualizar_utente(sheet, index: int, dados: dict) -> bool:
-    """Atualiza os dados de um utente na planilha."""
-    try:
-        def format_date(d):
-            return d.strftime('%d/%m/%Y') if d else ""
-
-        # A ordem deve corresponder exatamente à ordem das colunas na folha, a partir da coluna B
-        values = [
-            dados.get('Nome', ''), format_date(dados.get('Data_de_nascimento')),
-            dados.get('Naturalidade', ''), dados.get('Nacionalidade', ''),
-            dados.get('Contacto_telefónico', ''), dados.get('Contacto_telefónico_2', ''),
-            dados.get('Email', ''), dados.get('Morada', ''),
-            dados.get('Codigo_Postal', ''), dados.get('Localidade', ''),
-            dados.get('Cartao_Cidadao', ''), format_date(dados.get('CC_Validade')),
-            dados.get('NIF', ''), dados.get('NISS', ''),
-            dados.get('Cartao_Utente', ''), dados.get('Telefone_Familiar', ''),
-            dados.get('Familiar', ''), dados.get('Grau_Escolaridade', ''),
-            dados.get('Profissao', ''), dados.get('Situacao_Profissional', ''),
-            format_date(dados.get('Data de inscrição')), dados.get('Observacoes', ''), 
-            dados.get('Estado', 'Ativo')
-        ]
-        
-        # Atualizar da coluna B (Nome) até à coluna X (Estado)
-        sheet.update(f'B{index + 2}:X{index + 2}', [values])
-        return True
-    except Exception as e:
-        st.error(f"Erro ao atualizar utente: {str(e)}")
-        return False
-
-def apagar_utente(sheet, index: int) -> bool:
-    """
-    Apaga um utente da planilha
-
-    Args:
-        sheet: Planilha do Google Sheets
-        index: Índice do utente na planilha
-
-    Returns:
-        True se apagado com sucesso, False caso contrário
-    """
-    try:
-        sheet.delete_rows(index + 2)
-        return True
-    except Exception as e:
-        st.error(f"Erro ao apagar utente: {str(e)}")
-        return False
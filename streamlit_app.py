@@ -1,49 +1,31 @@
+import time
+
 import streamlit as st
-st.cache_data.clear()
-import pandas as pd
 from streamlit_option_menu import option_menu
-from utils.ui import aplicar_estilos
-from secoes import utentes, turmas, professores, disciplinas, horarios
-from utils.sheets import get_worksheet
-
-@st.cache_data(ttl=300)
-def get_dashboard_stats():
-    """Retorna estatísticas simuladas para o dashboard inicial"""
-    # Dados simulados para demonstração
-    num_utentes = 150
-    num_utentes_ativos = 120
-    num_utentes_inativos = 30
-    num_disciplinas = 25
-    num_turmas = 18
-    return num_utentes, num_utentes_ativos, num_utentes_inativos, num_disciplinas, num_turmas
+from utils.ui import aplicar_estilos, mostrar_notificacoes
+from utils.assets import LOGO, asset_bytes
+from utils.pages import PAGES, get_import_report, load_module, render_page
+from utils.crud import get_memory_report
+from utils.metrics import record_run
+from utils.state import enter_page
+from utils.write_queue import render_write_status
+from utils.aggregates import get_dashboard_stats
 
 # Configuração global da página
 st.set_page_config(page_title="Gestão IPSS", page_icon="🧭", layout="wide")
 
+inicio_execucao = time.perf_counter()
+
 # 🔹 Carregar CSS global logo no arranque
-print("aplicar_estilos() called")
 aplicar_estilos()
 
-# 🔹 Aplicar fundo azul e estilos dos cartões de professores
-st.markdown("""
-<style>
-.stApp {
-    background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
-}
-[data-testid="stAppViewContainer"] {
-    background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
-}
-html, body, [class*="css"] {
-    background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
-}
-
-/* Estilos gerais mantidos apenas para fundo da aplicação */
-</style>
-""", unsafe_allow_html=True)
+# 🔹 Mensagens de gravações feitas na execução anterior e estado das gravações em segundo plano
+mostrar_notificacoes()
+render_write_status()
 
 
 # 🔹 Logótipo no menu lateral
-st.sidebar.image("imagens/logo.png")
+st.sidebar.image(asset_bytes(LOGO))
 st.sidebar.markdown("### Gestão IPSS")
 
 st.sidebar.markdown("---")
@@ -52,8 +34,8 @@ st.sidebar.markdown("---")
 with st.sidebar:
     opcao = option_menu(
         menu_title="Menu",
-        options=["Início", "Disciplinas", "Utentes", "Turmas", "Horários", "Professores"],
-        icons=["house-door", "book", "people", "building-gear", "calendar3", "person-badge"],
+        options=["Início"] + list(PAGES),
+        icons=["house-door"] + [icone for _, icone in PAGES.values()],
         menu_icon="grid-1x2",
         default_index=0,
         orientation="vertical",
@@ -61,31 +43,59 @@ with st.sidebar:
 
 # Conteúdo das páginas
 if opcao == "Início":
+    enter_page(opcao)
     st.title("Bem-vindo à Gestão IPSS")
     st.write("Usa o menu à esquerda para navegar entre as secções.")
 
     st.markdown("---")
     
-    num_utentes, num_utentes_ativos, num_utentes_inativos, num_disciplinas, num_turmas = get_dashboard_stats()
+    stats = get_dashboard_stats()
     
     col1, col2, col3, col4, col5 = st.columns(5)
     with col1:
-        st.metric(label="🧍 Utentes (Total)", value=num_utentes)
+        st.metric(label="🧍 Utentes (Total)", value=stats['num_utentes'])
     with col2:
-        st.metric(label="✅ Utentes Ativos", value=num_utentes_ativos)
+        st.metric(label="✅ Utentes Ativos", value=stats['num_utentes_ativos'])
     with col3:
-        st.metric(label="❌ Utentes Inativos", value=num_utentes_inativos)
+        st.metric(label="❌ Utentes Inativos", value=stats['num_utentes_inativos'])
     with col4:
-        st.metric(label="📚 Disciplinas", value=num_disciplinas)
+        st.metric(label="📚 Disciplinas", value=stats['num_disciplinas'])
     with col5:
-        st.metric(label="🏫 Turmas", value=num_turmas)
-elif opcao == "Disciplinas":
-    disciplinas.mostrar_pagina()
-elif opcao == "Utentes":
-    utentes.mostrar_pagina()
-elif opcao == "Turmas":
-    turmas.mostrar_pagina()
-elif opcao == "Horários":
-    horarios.mostrar_pagina()
-elif opcao == "Professores":
-    professores.mostrar_pagina()
+        st.metric(label="🏫 Turmas", value=stats['num_turmas'])
+
+    st.markdown("---")
+
+    col_dias, col_vagas = st.columns([3, 1])
+    with col_dias:
+        st.markdown("##### 🗓️ Turmas ativas por dia")
+        # O plotly só é importado quando o Início é mostrado
+        px = load_module("plotly.express")
+        fig_dias = px.bar(x=list(stats['turmas_por_dia'].keys()), y=list(stats['turmas_por_dia'].values()),
+                          labels={'x': "Dia da semana", 'y': "Turmas"})
+        fig_dias.update_layout(height=280, margin=dict(l=10, r=10, t=10, b=10))
+        st.plotly_chart(fig_dias, use_container_width=True)
+    with col_vagas:
+        st.metric(label="🏫 Turmas Ativas", value=stats['num_turmas_ativas'])
+        st.metric(label="👥 Vagas (turmas ativas)", value=stats['vagas_totais'])
+        st.metric(label="🎟️ Inscrições ativas", value=stats['num_inscricoes_ativas'],
+                  delta=f"{stats['ocupacao_vagas']}% das vagas", delta_color="off")
+
+    with st.expander("💾 Memória dos dados em cache"):
+        relatorio_memoria = get_memory_report()
+        if relatorio_memoria.empty:
+            st.caption("Ainda não foram carregadas folhas nesta instância.")
+        else:
+            st.dataframe(relatorio_memoria, hide_index=True, use_container_width=True)
+            st.caption(f"Total: {relatorio_memoria['Memória (KB)'].sum():.1f} KB")
+
+    with st.expander("⏱️ Tempos de importação dos módulos"):
+        relatorio_importacao = get_import_report()
+        if relatorio_importacao.empty:
+            st.caption("Ainda não foram carregadas secções nesta instância.")
+        else:
+            st.dataframe(relatorio_importacao, hide_index=True, use_container_width=True)
+            st.caption("As secções são importadas na primeira visita e ficam em memória.")
+else:
+    render_page(opcao)
+
+record_run((time.perf_counter() - inicio_execucao) * 1000, pagina=opcao)
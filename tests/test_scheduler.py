@@ -0,0 +1,43 @@
+from utils.scheduler import TurmaRequest, solve_schedule
+from utils.validation import DIAS_SEMANA
+
+
+def _index(livres_professor):
+    """Índice de intervalos livres só com os professores indicados (janela 9h-12h)."""
+    return {
+        'free': {('professor', prof): {dia: dias.get(dia, []) for dia in DIAS_SEMANA}
+                 for prof, dias in livres_professor.items()},
+        'busy': {},
+        'disciplinas': {},
+        'window': (9 * 60, 12 * 60),
+    }
+
+
+def test_lote_possivel_coloca_todas_as_turmas():
+    index = _index({})
+    pedidos = [TurmaRequest("A", "Yoga", "Ana", 60), TurmaRequest("B", "Yoga", "Ana", 60)]
+
+    resultado = solve_schedule(index, pedidos, ["Sala 1"])
+
+    assert resultado['completo']
+    assert resultado['por_colocar'] == []
+    a, b = resultado['atribuicoes'][0], resultado['atribuicoes'][1]
+    assert a[0] != b[0] or a[3] <= b[2] or b[3] <= a[2]
+
+
+def test_lote_impossivel_mantem_a_melhor_solucao_parcial():
+    # A e B só cabem no mesmo horário (segunda, 9h-10h, mesmo professor); C cabe em qualquer lado
+    index = _index({'Ana': {DIAS_SEMANA[0]: [(9 * 60, 10 * 60)]}})
+    pedidos = [
+        TurmaRequest("A", "Yoga", "Ana", 60),
+        TurmaRequest("B", "Dança", "Ana", 60),
+        TurmaRequest("C", "Pintura", "Rui", 60),
+    ]
+
+    resultado = solve_schedule(index, pedidos, ["Sala 1"])
+
+    assert not resultado['completo']
+    assert len(resultado['atribuicoes']) == 2
+    assert 2 in resultado['atribuicoes']
+    assert len(resultado['por_colocar']) == 1
+    assert resultado['por_colocar'][0] in (0, 1)
@@ -0,0 +1,239 @@
+"""Incremental Aggregates for the Dashboard
+
+This module keeps the statistics shown on the Início page (utentes by estado,
+disciplinas, turmas per day, vagas, active enrollments) in a process-wide engine. The aggregates
+are built from the cached sheet frames once and then maintained incrementally
+from the write notifications of utils.crud, so a dashboard load does not scan
+the sheets again. They are rebuilt when the TTL expires or when a source sheet
+reaches a generation they were not built from or updated to (e.g. the sheet
+was reloaded).
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from utils.crud import SHEET_CACHE_TTL, get_sheet_data, get_sheet_generation, register_write_listener
+from utils.schema import is_missing
+from utils.validation import DIAS_SEMANA
+
+
+# Folhas que alimentam o dashboard
+AGGREGATE_SHEETS = ["Utentes", "Disciplinas", "Turmas", "Inscricoes"]
+
+
+def _chave(value: Any) -> str:
+    """Normaliza um valor de célula para usar como chave de contagem."""
+    return '' if is_missing(value) else str(value).strip()
+
+
+def _inteiro(value: Any) -> int:
+    """Converte um valor de célula em inteiro (0 se inválido)."""
+    try:
+        return 0 if is_missing(value) or value == '' else int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _contribuicoes(sheet_name: str, row: Dict[str, Any]) -> List[Tuple[str, str, int]]:
+    """Devolve as contribuições de uma linha para os contadores.
+
+    Cada contribuição é (contador, chave, valor). Uma linha inserida soma as
+    suas contribuições e uma linha apagada subtrai-as.
+    """
+    if sheet_name == "Utentes":
+        return [('utentes', 'total', 1), ('utentes_estado', _chave(row.get('Estado')), 1)]
+
+    if sheet_name == "Disciplinas":
+        return [('disciplinas', 'total', 1), ('disciplinas_estado', _chave(row.get('Estado')), 1)]
+
+    if sheet_name == "Turmas":
+        contribuicoes = [('turmas', 'total', 1)]
+        if _chave(row.get('Estado')) == 'Ativa':
+            contribuicoes += [
+                ('turmas', 'ativas', 1),
+                ('turmas_dia', _chave(row.get('Dia da Semana')), 1),
+                ('vagas', 'total', _inteiro(row.get('Numero de vagas'))),
+            ]
+        return contribuicoes
+
+    if sheet_name == "Inscricoes":
+        return [('inscricoes', 'ativas', 1)] if _chave(row.get('Estado')) == 'Ativa' else []
+
+    return []
+
+
+class DashboardAggregates:
+    """Contadores do dashboard mantidos de forma incremental.
+
+    Attributes:
+        counters (Dict[str, Counter]): Contadores por nome
+        built_at (Optional[float]): Momento da última reconstrução completa
+        generations (Dict[str, int]): Geração de cada folha refletida nos contadores
+        writes (int): Número de escritas recebidas (deteta escritas durante uma reconstrução)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Counter] = {}
+        self.built_at: Optional[float] = None
+        self.generations: Dict[str, int] = {}
+        self.writes = 0
+
+    def is_stale(self, generations: Dict[str, int]) -> bool:
+        """Indica se os agregados precisam de ser reconstruídos a partir das folhas.
+
+        Args:
+            generations (Dict[str, int]): Geração atual de cada folha
+        """
+        with self.lock:
+            return (self.built_at is None or time.time() - self.built_at > SHEET_CACHE_TTL
+                    or generations != self.generations)
+
+    def rebuild(self, frames: Dict[str, pd.DataFrame], generations: Dict[str, int], writes: int) -> bool:
+        """Reconstrói todos os contadores a partir das folhas (varrimento completo).
+
+        As folhas são lidas fora do lock; se entretanto chegou uma escrita
+        (apply_write), os dados podem não a incluir e a reconstrução é
+        descartada (fica marcada para a próxima leitura).
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): DataFrames tipados por folha
+            generations (Dict[str, int]): Geração de cada folha lida
+            writes (int): Valor de self.writes antes de ler as folhas
+
+        Returns:
+            bool: True se os novos contadores foram instalados
+        """
+        counters: Dict[str, Counter] = {}
+
+        def contar(nome: str, valores: Iterable[Tuple[str, int]]) -> None:
+            counters.setdefault(nome, Counter()).update(dict(valores))
+
+        utentes = frames.get("Utentes", pd.DataFrame())
+        contar('utentes', [('total', len(utentes))])
+        if 'Estado' in utentes.columns:
+            contar('utentes_estado', utentes['Estado'].astype(str).str.strip().value_counts().items())
+
+        disciplinas = frames.get("Disciplinas", pd.DataFrame())
+        contar('disciplinas', [('total', len(disciplinas))])
+        if 'Estado' in disciplinas.columns:
+            contar('disciplinas_estado', disciplinas['Estado'].astype(str).str.strip().value_counts().items())
+
+        turmas = frames.get("Turmas", pd.DataFrame())
+        contar('turmas', [('total', len(turmas))])
+        if 'Estado' in turmas.columns:
+            ativas = turmas[turmas['Estado'].astype(str).str.strip() == 'Ativa']
+            contar('turmas', [('ativas', len(ativas))])
+            if 'Dia da Semana' in ativas.columns:
+                contar('turmas_dia', ativas['Dia da Semana'].astype(str).str.strip().value_counts().items())
+            if 'Numero de vagas' in ativas.columns:
+                vagas = pd.to_numeric(ativas['Numero de vagas'], errors='coerce').fillna(0).sum()
+                contar('vagas', [('total', int(vagas))])
+
+        inscricoes = frames.get("Inscricoes", pd.DataFrame())
+        if 'Estado' in inscricoes.columns:
+            contar('inscricoes', [('ativas', int((inscricoes['Estado'].astype(str).str.strip() == 'Ativa').sum()))])
+
+        with self.lock:
+            if self.writes != writes:
+                self.built_at = None
+                return False
+            self.counters = counters
+            self.generations = dict(generations)
+            self.built_at = time.time()
+            return True
+
+    def apply_write(self,
+                    sheet_name: str,
+                    operation: str,
+                    old_row: Optional[Dict[str, Any]],
+                    new_row: Optional[Dict[str, Any]]) -> None:
+        """Aplica uma escrita aos contadores sem voltar a ler as folhas.
+
+        Chamada logo depois de a escrita mudar a geração da folha: só é
+        aplicada se os contadores refletem a geração anterior; caso contrário
+        (ex.: a folha foi relida entretanto), ficam marcados para reconstrução.
+
+        Args:
+            sheet_name (str): Folha escrita
+            operation (str): 'create', 'update' ou 'delete'
+            old_row (Optional[Dict[str, Any]]): Linha antes da escrita
+            new_row (Optional[Dict[str, Any]]): Linha depois da escrita
+        """
+        if sheet_name not in AGGREGATE_SHEETS:
+            return
+
+        with self.lock:
+            self.writes += 1
+            if self.built_at is None:
+                return
+            geracao = get_sheet_generation(sheet_name)
+            if self.generations.get(sheet_name) != geracao - 1:
+                self.built_at = None
+                return
+            self.generations[sheet_name] = geracao
+            if old_row is not None and operation in ('update', 'delete'):
+                for nome, chave, valor in _contribuicoes(sheet_name, old_row):
+                    self.counters.setdefault(nome, Counter())[chave] -= valor
+            if new_row is not None and operation in ('create', 'update'):
+                for nome, chave, valor in _contribuicoes(sheet_name, new_row):
+                    self.counters.setdefault(nome, Counter())[chave] += valor
+
+    def get(self, nome: str, chave: str = 'total') -> int:
+        """Devolve o valor de um contador."""
+        return self.counters.get(nome, Counter()).get(chave, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Devolve uma cópia dos valores apresentados no dashboard."""
+        with self.lock:
+            turmas_dia = self.counters.get('turmas_dia', Counter())
+            vagas = self.get('vagas')
+            inscricoes = self.get('inscricoes', 'ativas')
+            return {
+                'num_utentes': self.get('utentes'),
+                'num_utentes_ativos': self.get('utentes_estado', 'Ativo'),
+                'num_utentes_inativos': self.get('utentes_estado', 'Inativo'),
+                'num_disciplinas': self.get('disciplinas'),
+                'num_turmas': self.get('turmas'),
+                'num_turmas_ativas': self.get('turmas', 'ativas'),
+                'vagas_totais': vagas,
+                'num_inscricoes_ativas': inscricoes,
+                'ocupacao_vagas': round(100 * inscricoes / vagas, 1) if vagas else 0.0,
+                'turmas_por_dia': {dia: turmas_dia.get(dia, 0) for dia in DIAS_SEMANA},
+            }
+
+
+@st.cache_resource
+def _get_engine() -> DashboardAggregates:
+    """Instância única (por processo) dos agregados do dashboard."""
+    return DashboardAggregates()
+
+
+def _on_sheet_write(sheet_name: str,
+                    operation: str,
+                    old_row: Optional[Dict[str, Any]],
+                    new_row: Optional[Dict[str, Any]]) -> None:
+    """Listener de escritas registado em utils.crud."""
+    _get_engine().apply_write(sheet_name, operation, old_row, new_row)
+
+
+register_write_listener(_on_sheet_write)
+
+
+def get_dashboard_stats() -> Dict[str, Any]:
+    """Devolve as estatísticas do dashboard, reconstruindo-as só quando estão desatualizadas.
+
+    Returns:
+        Dict[str, Any]: Contagens de utentes, disciplinas, turmas, vagas e inscrições
+    """
+    engine = _get_engine()
+    if engine.is_stale({nome: get_sheet_generation(nome) for nome in AGGREGATE_SHEETS}):
+        escritas = engine.writes
+        frames = {nome: get_sheet_data(nome, include_pending=False) for nome in AGGREGATE_SHEETS}
+        engine.rebuild(frames, {nome: get_sheet_generation(nome) for nome in AGGREGATE_SHEETS}, escritas)
+    return engine.snapshot()
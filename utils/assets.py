@@ -0,0 +1,75 @@
+"""Static Assets Loaded Once per Process
+
+This module reads the images in 'imagens/' and builds the global stylesheet a
+single time per server process (st.cache_resource). Reruns reuse the bytes
+and the minified CSS already in memory, so they do no disk I/O and always
+send the same, smaller, style block to the browser.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+import streamlit as st
+
+
+# Pasta das imagens (relativa à raiz do projeto, independente da pasta atual)
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "imagens"
+
+LOGO = "logo.png"
+
+_CSS_COMENTARIO = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_ESPACOS = re.compile(r"\s+")
+_CSS_SEPARADORES = re.compile(r"\s*([{};,])\s*")
+_CSS_DOIS_PONTOS = re.compile(r":\s+")
+
+
+@st.cache_resource(show_spinner=False)
+def asset_bytes(nome: str) -> bytes:
+    """Conteúdo de um ficheiro de 'imagens/', lido uma única vez.
+
+    Args:
+        nome (str): Nome do ficheiro (ex.: LOGO)
+
+    Returns:
+        bytes: Conteúdo do ficheiro
+    """
+    return (ASSETS_DIR / nome).read_bytes()
+
+
+def minify_css(css: str) -> str:
+    """Remove comentários e espaços desnecessários de uma folha de estilos.
+
+    Os espaços antes de ':' são mantidos, porque em seletores distinguem
+    'a :hover' de 'a:hover'.
+
+    Args:
+        css (str): CSS original
+
+    Returns:
+        str: CSS minificado
+    """
+    css = _CSS_COMENTARIO.sub("", css)
+    css = _CSS_ESPACOS.sub(" ", css)
+    css = _CSS_SEPARADORES.sub(r"\1", css)
+    css = _CSS_DOIS_PONTOS.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+
+def content_hash(conteudo: str) -> str:
+    """Hash curto (SHA-256) do conteúdo, para identificar a versão de um recurso."""
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:12]
+
+
+def style_block(css: str, head: str = "") -> str:
+    """Bloco HTML com o CSS minificado, identificado pelo hash do conteúdo.
+
+    Args:
+        css (str): CSS original
+        head (str): HTML a colocar antes do estilo (ex.: <link> de fontes)
+
+    Returns:
+        str: HTML pronto a passar a st.markdown(..., unsafe_allow_html=True)
+    """
+    minificado = minify_css(css)
+    return f'{head.strip()}<style id="estilos-{content_hash(minificado)}">{minificado}</style>'
@@ -0,0 +1,228 @@
+"""Data-Quality Audit of the Worksheets
+
+This module scans every worksheet with the vectorized validators of
+utils.validation, the conversion failures recorded by utils.schema and
+reference-integrity joins between sheets (turmas pointing at deleted
+professores or disciplinas, inscrições of unknown utentes or turmas, double
+bookings, overbooked turmas). The report is cached per combination of data
+generations, so it is rebuilt only after the sheets change.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from utils.crud import get_sheet_data, get_sheet_generation
+from utils.metrics import timed_function
+from utils.schema import INICIO_MIN, FIM_MIN, INVALID_VALUES_ATTR
+from utils.validation import (
+    DIAS_SEMANA,
+    ESTADO_INSCRICAO_OPCOES,
+    ESTADO_OPCOES,
+    ESTADO_UTENTE_OPCOES,
+    GRAU_ESCOLARIDADE_OPCOES,
+    NIVEL_OPCOES,
+    SALA_OPCOES,
+    SITUACAO_PROFISSIONAL_OPCOES,
+    texto_series,
+    combine_error_tables,
+    error_table,
+    validate_dataframe
+)
+
+
+# Folhas auditadas e respetiva coluna de ID
+AUDIT_SHEETS = {
+    "Utentes": 'ID',
+    "Professores": 'ID_professor',
+    "Disciplinas": 'id_disciplina',
+    "Turmas": 'ID_Turma',
+    "Inscricoes": 'ID_Inscricao',
+}
+
+# Regras por folha (mesmo formato de validate_form_data)
+AUDIT_RULES: Dict[str, Dict[str, Any]] = {
+    "Utentes": {
+        'Nome': {'required': True},
+        'Data_de_nascimento': {'required': True},
+        'Contacto_telefónico': {'required': True, 'type': 'phone'},
+        'Contacto_telefónico_2': {'type': 'phone'},
+        'Telefone_Familiar': {'type': 'phone'},
+        'Email': {'type': 'email'},
+        'Codigo_Postal': {'required': True, 'type': 'postal_code'},
+        'NIF': {'required': True, 'type': 'nif'},
+        'Grau_Escolaridade': {'options': GRAU_ESCOLARIDADE_OPCOES},
+        'Situacao_Profissional': {'options': SITUACAO_PROFISSIONAL_OPCOES},
+        'Estado': {'options': ESTADO_UTENTE_OPCOES},
+    },
+    "Professores": {
+        'Nome Completo': {'required': True},
+        'Telefone': {'required': True, 'type': 'phone'},
+        'Email': {'type': 'email'},
+    },
+    "Disciplinas": {
+        'Nome da Disciplina': {'required': True},
+        'Estado': {'options': ESTADO_OPCOES},
+    },
+    "Turmas": {
+        'Nome turma': {'required': True},
+        'Disciplina': {'required': True},
+        'Professor': {'required': True},
+        'Sala': {'required': True, 'options': SALA_OPCOES},
+        'Dia da Semana': {'required': True, 'options': DIAS_SEMANA},
+        'Hora de Inicio': {'required': True},
+        'Hora de Fim': {'required': True},
+        'Nivel': {'options': NIVEL_OPCOES},
+        'Estado': {'options': ESTADO_OPCOES},
+    },
+    "Inscricoes": {
+        'ID_Utente': {'required': True},
+        'ID_Turma': {'required': True},
+        'Estado': {'options': ESTADO_INSCRICAO_OPCOES},
+    },
+}
+
+# Colunas que devem ter valores únicos
+UNIQUE_COLUMNS = {
+    "Utentes": ['ID', 'NIF'],
+    "Professores": ['ID_professor', 'Nome Completo'],
+    "Disciplinas": ['id_disciplina', 'Nome da Disciplina'],
+    "Turmas": ['ID_Turma'],
+    "Inscricoes": ['ID_Inscricao'],
+}
+
+# Colunas do relatório
+REPORT_COLUMNS = ['Folha', 'Linha', 'ID', 'Campo', 'Erro']
+
+
+def _erros_conversao(df: pd.DataFrame) -> List[pd.DataFrame]:
+    """Células preenchidas que não puderam ser convertidas ao carregar a folha."""
+    return [
+        error_table(pd.Series(df.index.isin(linhas), index=df.index), col, "Valor com formato inválido")
+        for col, linhas in df.attrs.get(INVALID_VALUES_ATTR, {}).items()
+    ]
+
+
+def _erros_unicidade(df: pd.DataFrame, sheet_name: str) -> List[pd.DataFrame]:
+    """Valores repetidos em colunas que devem ser únicas."""
+    tabelas = []
+    for col in UNIQUE_COLUMNS.get(sheet_name, []):
+        if col in df.columns:
+            texto = texto_series(df[col]).str.lower()
+            tabelas.append(error_table((texto != '') & texto.duplicated(keep=False), col, "Valor repetido"))
+    return tabelas
+
+
+def _erros_referencia(df: pd.DataFrame, col: str, validos: pd.Series, mensagem: str) -> pd.DataFrame:
+    """Referências (preenchidas) que não existem na folha referenciada."""
+    texto = texto_series(df[col])
+    return error_table((texto != '') & ~texto.isin(set(texto_series(validos))), col, mensagem)
+
+
+def _erros_sobreposicao(turmas: pd.DataFrame) -> List[pd.DataFrame]:
+    """Turmas ativas do mesmo professor ou na mesma sala com horários sobrepostos."""
+    ativas = turmas[(turmas['Estado'] == 'Ativa') & turmas[INICIO_MIN].notna() & turmas[FIM_MIN].notna()]
+    ativas = ativas[['Dia da Semana', 'Professor', 'Sala', INICIO_MIN, FIM_MIN]].astype(
+        {'Dia da Semana': str, 'Professor': str, 'Sala': str}).reset_index(names='linha')
+
+    tabelas = []
+    for col, recurso in (('Professor', "Professor"), ('Sala', "Sala")):
+        base = ativas[ativas['Sala'] != 'Outro'] if col == 'Sala' else ativas
+        pares = base.merge(base, on=['Dia da Semana', col], suffixes=('', '_outra'))
+        pares = pares[(pares['linha'] != pares['linha_outra'])
+                      & (pares[INICIO_MIN] < pares[FIM_MIN + '_outra'])
+                      & (pares[INICIO_MIN + '_outra'] < pares[FIM_MIN])]
+        tabelas.append(error_table(pd.Series(turmas.index.isin(pares['linha']), index=turmas.index),
+                                   col, f"{recurso} com turmas sobrepostas no mesmo horário"))
+    return tabelas
+
+
+@timed_function("validacao.auditoria")
+def audit_sheets(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Audita as folhas e devolve um relatório único de problemas.
+
+    Args:
+        frames (Dict[str, pd.DataFrame]): DataFrames tipados por folha
+
+    Returns:
+        pd.DataFrame: Relatório com as colunas Folha, Linha (na folha), ID,
+        Campo e Erro
+    """
+    vazias = {nome: pd.DataFrame() for nome in AUDIT_SHEETS}
+    frames = {**vazias, **frames}
+    relatorios = []
+
+    for sheet_name, id_column in AUDIT_SHEETS.items():
+        df = frames[sheet_name]
+        if df.empty:
+            continue
+
+        # Células com formato inválido ficam vazias nos dados tipados: não as
+        # reportar também como campos obrigatórios em falta
+        conversao = combine_error_tables(_erros_conversao(df))
+        regras = validate_dataframe(df, AUDIT_RULES[sheet_name])
+        ja_reportadas = pd.MultiIndex.from_frame(conversao[['Linha', 'Campo']])
+        regras = regras[~pd.MultiIndex.from_frame(regras[['Linha', 'Campo']]).isin(ja_reportadas)]
+        tabelas = [regras, conversao] + _erros_unicidade(df, sheet_name)
+
+        if sheet_name == "Turmas":
+            disciplinas, professores = frames["Disciplinas"], frames["Professores"]
+            if 'Nome da Disciplina' in disciplinas.columns:
+                tabelas.append(_erros_referencia(df, 'Disciplina', disciplinas['Nome da Disciplina'],
+                                                 "Disciplina inexistente"))
+            if 'Nome Completo' in professores.columns:
+                tabelas.append(_erros_referencia(df, 'Professor', professores['Nome Completo'],
+                                                 "Professor inexistente"))
+            if {INICIO_MIN, FIM_MIN}.issubset(df.columns):
+                tabelas.append(error_table(df[FIM_MIN] <= df[INICIO_MIN], 'Hora de Fim',
+                                           "Hora de fim não é posterior à hora de início"))
+                tabelas += _erros_sobreposicao(df)
+            if 'Numero de vagas' in df.columns:
+                tabelas.append(error_table(df['Numero de vagas'] < 1, 'Numero de vagas', "Número de vagas inválido"))
+
+        if sheet_name == "Inscricoes":
+            utentes, turmas = frames["Utentes"], frames["Turmas"]
+            if 'ID' in utentes.columns:
+                tabelas.append(_erros_referencia(df, 'ID_Utente', utentes['ID'], "Utente inexistente"))
+            if 'ID_Turma' in turmas.columns:
+                tabelas.append(_erros_referencia(df, 'ID_Turma', turmas['ID_Turma'], "Turma inexistente"))
+                if 'Numero de vagas' in turmas.columns and 'Estado' in df.columns:
+                    # Turmas com mais inscrições ativas do que vagas
+                    ativas = texto_series(df['ID_Turma']).where(df['Estado'] == 'Ativa')
+                    vagas_por_turma = pd.Series(turmas['Numero de vagas'].to_numpy(), index=texto_series(turmas['ID_Turma']))
+                    vagas_por_turma = vagas_por_turma[~vagas_por_turma.index.duplicated()]
+                    ocupadas = ativas.map(ativas.value_counts())
+                    vagas = ativas.map(vagas_por_turma)
+                    tabelas.append(error_table(ocupadas > vagas, 'ID_Turma', "Turma com mais inscrições do que vagas"))
+
+        erros = combine_error_tables(tabelas)
+        if erros.empty:
+            continue
+        ids = texto_series(df[id_column]) if id_column in df.columns else pd.Series('', index=df.index)
+        erros.insert(0, 'Folha', sheet_name)
+        erros.insert(2, 'ID', ids.reindex(erros['Linha']).values)
+        # Linha na folha (a linha 1 é o cabeçalho)
+        erros['Linha'] = erros['Linha'] + 2
+        relatorios.append(erros)
+
+    if not relatorios:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pd.concat(relatorios, ignore_index=True)[REPORT_COLUMNS]
+
+
+@st.cache_resource(max_entries=4)
+def _materializar_auditoria(geracoes: Tuple[int, ...]) -> pd.DataFrame:
+    """Executa a auditoria para uma combinação de gerações dos dados."""
+    return audit_sheets({nome: get_sheet_data(nome, include_pending=False) for nome in AUDIT_SHEETS})
+
+
+def get_audit_report() -> pd.DataFrame:
+    """Devolve o relatório de auditoria em cache, refeito quando alguma folha muda.
+
+    Returns:
+        pd.DataFrame: Relatório de audit_sheets
+    """
+    for nome in AUDIT_SHEETS:
+        get_sheet_data(nome)  # garante que as gerações correspondem aos dados em cache
+    return _materializar_auditoria(tuple(get_sheet_generation(nome) for nome in AUDIT_SHEETS))
@@ -0,0 +1,177 @@
+"""Bulk Import of Utentes from CSV/Excel
+
+This module reads a CSV or XLSX file of utentes, maps its headers to the
+columns of the 'Utentes' worksheet and validates every row at once with the
+vectorized validators of utils.validation. Valid rows get their IDs in a
+single allocation and are written with one append_rows call; invalid rows are
+reported per line and field in an error table.
+
+Reading XLSX files requires openpyxl (in requirements.txt).
+"""
+
+import io
+import unicodedata
+from datetime import date
+from typing import Any, List, Optional, Set, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from utils.crud import notify_sheet_write
+from utils.schema import DATE_FORMAT
+from utils.validation import (
+    ESTADO_UTENTE_OPCOES,
+    GRAU_ESCOLARIDADE_OPCOES,
+    SITUACAO_PROFISSIONAL_OPCOES,
+    combine_error_tables,
+    error_table,
+    parse_date_series,
+    validate_dataframe
+)
+
+
+# Regras de validação das colunas importadas (campos obrigatórios como no formulário)
+UTENTE_IMPORT_RULES = {
+    'Nome': {'required': True},
+    'Data_de_nascimento': {'required': True, 'type': 'date'},
+    'Contacto_telefónico': {'required': True, 'type': 'phone'},
+    'Contacto_telefónico_2': {'type': 'phone'},
+    'Email': {'type': 'email'},
+    'Morada': {'required': True},
+    'Codigo_Postal': {'required': True, 'type': 'postal_code'},
+    'CC_Validade': {'type': 'date'},
+    'NIF': {'required': True, 'type': 'nif'},
+    'Telefone_Familiar': {'type': 'phone'},
+    'Grau_Escolaridade': {'options': GRAU_ESCOLARIDADE_OPCOES},
+    'Situacao_Profissional': {'options': SITUACAO_PROFISSIONAL_OPCOES},
+    'Data de inscrição': {'type': 'date'},
+    'Estado': {'options': ESTADO_UTENTE_OPCOES},
+}
+
+DATE_COLUMNS = [col for col, regras in UTENTE_IMPORT_RULES.items() if regras.get('type') == 'date']
+
+
+def _normalizar_cabecalho(nome: Any) -> str:
+    """Normaliza um cabeçalho (sem acentos, minúsculas, '_' em vez de espaços)."""
+    texto = unicodedata.normalize('NFD', str(nome).strip().lower())
+    texto = texto.encode('ascii', 'ignore').decode('utf-8')
+    return texto.replace(' ', '_').replace('-', '_')
+
+
+def read_upload(uploaded_file) -> Optional[pd.DataFrame]:
+    """Lê um ficheiro CSV ou XLSX carregado, com todas as células como texto.
+
+    Args:
+        uploaded_file: Ficheiro devolvido por st.file_uploader
+
+    Returns:
+        Optional[pd.DataFrame]: Linhas do ficheiro ou None se não puder ser lido
+    """
+    try:
+        conteudo = uploaded_file.getvalue()
+        if uploaded_file.name.lower().endswith(('.xlsx', '.xls')):
+            return pd.read_excel(io.BytesIO(conteudo), dtype=str)
+        return pd.read_csv(io.BytesIO(conteudo), dtype=str, sep=None, engine='python', encoding='utf-8-sig')
+    except ImportError:
+        st.error("Para importar ficheiros Excel é necessário instalar o pacote 'openpyxl'. "
+                 "Em alternativa, guarde o ficheiro como CSV.")
+    except Exception as e:
+        st.error(f"Não foi possível ler o ficheiro: {str(e)}")
+    return None
+
+
+def map_columns(raw: pd.DataFrame, columns: List[str]) -> Tuple[pd.DataFrame, List[str]]:
+    """Alinha as colunas do ficheiro com as colunas da folha.
+
+    Os cabeçalhos são comparados sem acentos, maiúsculas ou espaços. Colunas
+    da folha que faltam no ficheiro ficam vazias.
+
+    Args:
+        raw (pd.DataFrame): Linhas lidas do ficheiro
+        columns (List[str]): Colunas da folha 'Utentes' (sem o ID)
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: Linhas com as colunas da folha e
+        cabeçalhos do ficheiro que foram ignorados
+    """
+    por_chave = {_normalizar_cabecalho(col): col for col in columns}
+    renomear = {}
+    ignoradas = []
+    for original in raw.columns:
+        destino = por_chave.get(_normalizar_cabecalho(original))
+        if destino and destino not in renomear.values():
+            renomear[original] = destino
+        else:
+            ignoradas.append(str(original))
+
+    df = raw[list(renomear)].rename(columns=renomear)
+    df = df.reindex(columns=columns).fillna('').astype(str).apply(lambda col: col.str.strip())
+    # Linhas completamente vazias (comuns no fim de folhas Excel) são descartadas
+    df = df[(df != '').any(axis=1)]
+    return df, ignoradas
+
+
+def validate_utentes(df: pd.DataFrame, existing_nifs: Set[str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Valida todas as linhas de uma importação de utentes de forma vetorizada.
+
+    Args:
+        df (pd.DataFrame): Linhas com as colunas da folha (de map_columns)
+        existing_nifs (Set[str]): NIFs já registados
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Linhas válidas (com datas e valores
+        por omissão normalizados) e relatório de erros (Linha, Campo, Erro)
+    """
+    df = df.copy()
+
+    # Valores por omissão, como no formulário
+    df['Estado'] = df['Estado'].mask(df['Estado'] == '', 'Ativo')
+    df['Data de inscrição'] = df['Data de inscrição'].mask(df['Data de inscrição'] == '', date.today().strftime(DATE_FORMAT))
+
+    # NIFs repetidos no ficheiro ou já registados (pertença a conjuntos)
+    nif = df['NIF']
+    relatorio = combine_error_tables([
+        validate_dataframe(df, UTENTE_IMPORT_RULES),
+        error_table((nif != '') & nif.duplicated(keep=False), 'NIF', "NIF repetido no ficheiro"),
+        error_table(nif.isin(existing_nifs), 'NIF', "NIF já associado a outro utente"),
+    ])
+
+    for col in DATE_COLUMNS:
+        df[col] = parse_date_series(df[col]).dt.strftime(DATE_FORMAT).fillna(df[col])
+
+    validos = df.drop(index=relatorio['Linha'].unique())
+    # Número da linha no ficheiro (a linha 1 é o cabeçalho)
+    relatorio['Linha'] = relatorio['Linha'] + 2
+    return validos, relatorio
+
+
+def _proximo_id(ids: List[Any]) -> int:
+    """Próximo número de ID sequencial a partir dos IDs existentes."""
+    numeros = pd.to_numeric(pd.Series(ids, dtype=object), errors='coerce')
+    return int(numeros.max()) + 1 if numeros.notna().any() else 1
+
+
+def write_utentes(sheet, validos: pd.DataFrame, columns: List[str]) -> int:
+    """Atribui os IDs e grava todas as linhas válidas com uma única escrita.
+
+    Args:
+        sheet: Worksheet 'Utentes'
+        validos (pd.DataFrame): Linhas válidas (de validate_utentes)
+        columns (List[str]): Colunas da folha, pela ordem, começando pelo ID
+
+    Returns:
+        int: Número de utentes gravados
+    """
+    if validos.empty:
+        return 0
+
+    # Uma única leitura da coluna de IDs e uma única alocação para o lote
+    primeiro = _proximo_id(sheet.col_values(1)[1:])
+    linhas = validos.reindex(columns=columns[1:]).fillna('')
+    linhas.insert(0, columns[0], [f"{n:04d}" for n in range(primeiro, primeiro + len(linhas))])
+    valores = linhas.values.tolist()
+
+    sheet.append_rows(valores)
+    for linha in valores:
+        notify_sheet_write("Utentes", 'create', new_row=dict(zip(columns, linha)))
+    return len(valores)
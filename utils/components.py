@@ -7,7 +7,12 @@ e outros elementos de UI comuns para melhorar a manutenção e consistência.
 """
 
 import streamlit as st
+import pandas as pd
 from typing import Dict, Any, Optional, Callable, List
+from utils.crud import get_sheet_generation
+from utils.export import EXPORT_FORMATS, available_formats, export_dataframe
+from utils.write_queue import pending_write_ids
+from utils.state import section_state
 from utils.validation import (
     GRAU_ESCOLARIDADE_OPCOES,
     SITUACAO_PROFISSIONAL_OPCOES,
@@ -47,11 +52,15 @@ def render_user_card(user_data: Dict[str, Any],
         st.divider()
 
 
-def render_action_buttons(index: int,
+def render_action_buttons(index: Any,
                          on_edit: Optional[Callable] = None,
                          on_delete: Optional[Callable] = None,
                          entity_type: str = "item") -> None:
-    """Renderiza botões de ação padronizados (Editar/Apagar)."""
+    """Renderiza botões de ação padronizados (Editar/Apagar).
+
+    Sem callbacks, o ID indicado em 'index' é guardado no estado da secção
+    'entity_type' (ver utils.state).
+    """
     sub_col1, sub_col2 = st.columns(2)
 
     with sub_col1:
@@ -59,7 +68,7 @@ def render_action_buttons(index: int,
             if on_edit:
                 on_edit(index)
             else:
-                st.session_state[f'edit_{entity_type}_index'] = index
+                section_state(entity_type).start_edit(index)
                 st.rerun()
 
     with sub_col2:
@@ -67,7 +76,7 @@ def render_action_buttons(index: int,
             if on_delete:
                 on_delete(index)
             else:
-                st.session_state[f'delete_{entity_type}_index'] = index
+                section_state(entity_type).start_delete(index)
                 st.rerun()
 
 
@@ -103,8 +112,8 @@ def render_edit_form(entity_type: str,
         if st.form_submit_button(submit_label):
             if on_save(form_data):
                 st.success(f"{entity_type.title()} '{entity_name}' atualizado com sucesso!")
-                st.session_state[f'edit_{entity_type}_index'] = None
-                st.rerun()
+                section_state(entity_type).back_to_list()
+                st.rerun(scope="app")
 
 
 def _render_form_field(field_config: Dict[str, Any],
@@ -165,6 +174,33 @@ def render_confirmation_dialog(entity_type: str,
             on_cancel()
 
 
+@st.dialog("Confirmar eliminação")
+def confirm_delete_dialog(entity_type: str, entity_name: str, on_confirm: Callable[[], bool]) -> None:
+    """Diálogo modal de confirmação para apagar um registo.
+
+    Os cliques dentro do diálogo só reexecutam o diálogo. Depois de apagar, a
+    aplicação é reexecutada para fechar o diálogo e atualizar as listas.
+
+    Args:
+        entity_type (str): Tipo de registo (ex.: 'professor')
+        entity_name (str): Nome do registo a apagar
+        on_confirm (Callable[[], bool]): Apaga o registo; devolve True se conseguiu
+    """
+    st.warning(f"Tens a certeza que queres apagar o {entity_type} **{entity_name}**?\n\n"
+               "Esta ação não pode ser desfeita.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✅ Sim, apagar", type="primary", key=f"dialogo_apagar_{entity_type}",
+                     use_container_width=True):
+            if on_confirm():
+                st.rerun(scope="app")
+            st.error(f"Erro ao apagar o {entity_type}.")
+    with col2:
+        if st.button("❌ Cancelar", key=f"dialogo_cancelar_{entity_type}", use_container_width=True):
+            st.rerun()
+
+
 # ===== PRE-DEFINED CONFIGURATIONS FOR ENTITIES =====
 
 USER_FIELDS_CONFIG = {
@@ -273,21 +309,58 @@ def render_search_and_filter(search_placeholder: str = "Pesquisar...",
     return search_text
 
 
+def render_export_buttons(df: pd.DataFrame,
+                          sheet_name: str,
+                          filtro: str = "",
+                          file_name: Optional[str] = None,
+                          key: Optional[str] = None) -> None:
+    """Renderiza o botão de exportação (CSV/Excel/Parquet) da vista atual de uma secção.
+
+    O ficheiro só é gerado quando o utilizador o pede ("Preparar ficheiro");
+    enquanto a vista (dados, filtro e formato) não mudar, fica disponível
+    para descarregar a partir da cache.
+
+    Args:
+        df: Dados da vista atual (já filtrados)
+        sheet_name: Folha de origem (a sua geração identifica os dados na cache)
+        filtro: Descrição do filtro aplicado, para distinguir vistas na cache
+        file_name: Nome base do ficheiro (por omissão, o nome da folha)
+        key: Prefixo das chaves dos widgets
+    """
+    key = key or f"exportar_{sheet_name}"
+    file_name = file_name or sheet_name.lower()
+
+    with st.popover("📥 Exportar"):
+        st.caption(f"{len(df)} registo(s) na vista atual")
+        formato = st.radio("Formato", available_formats(), horizontal=True, key=f"{key}_formato")
+        extensao, mime = EXPORT_FORMATS[formato]
+        vista = (f"{sheet_name}:{file_name}", get_sheet_generation(sheet_name),
+                 pending_write_ids(sheet_name), filtro, formato)
+
+        if st.button("Preparar ficheiro", key=f"{key}_preparar"):
+            st.session_state[f"{key}_vista"] = vista
+        if st.session_state.get(f"{key}_vista") != vista:
+            return
+
+        try:
+            dados = export_dataframe(*vista, df)
+        except Exception as e:
+            st.session_state.pop(f"{key}_vista", None)
+            st.error(f"Não foi possível exportar os dados em {formato}: {str(e)}")
+            return
+        st.download_button(f"Descarregar {formato}", data=dados, file_name=f"{file_name}.{extensao}",
+                           mime=mime, key=f"{key}_download", type="primary", on_click="ignore")
+
+
 def render_loading_indicator(message: str = "A processar dados..."):
     """Renderiza um indicador de carregamento padronizado."""
     with st.spinner(message):
         pass
 
 
-def render_success_message(message: str, duration: int = 3):
-    """Renderiza uma mensagem de sucesso temporária."""
-    success_placeholder = st.empty()
-    success_placeholder.success(message)
-
-    if duration > 0:
-        import time
-        time.sleep(duration)
-        success_placeholder.empty()
+def render_success_message(message: str):
+    """Renderiza uma mensagem de sucesso temporária (toast, sem bloquear a execução)."""
+    st.toast(message, icon="✅")
 
 
 def render_error_message(message: str, errors: Optional[List[str]] = None):
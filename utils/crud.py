@@ -4,10 +4,33 @@ This module provides standardized database operations and utility functions
 for consistent data management across all sections of the application.
 """
 
+import hashlib
+import threading
+import time
 import streamlit as st
 import pandas as pd
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Dict, List, Optional, Callable, Tuple, Union
+from gspread.utils import numericise_all
 from utils.sheets import get_worksheet
+from utils.metrics import logger, timed, timed_function
+from utils.ui import notificar
+from utils.state import CONFLICT_STATE_KEY, resolve_record, section_state
+from utils.write_queue import WriteError, finalize_writes, pending_writes, submit_write
+from utils.schema import (
+    apply_schema, sheet_columns, to_sheet_value, is_missing, memory_usage_bytes
+)
+
+
+# Os dados em cache podem viver mais tempo porque todas as secções gravam
+# através de update_record/delete_record, que localizam a linha pelo ID e
+# verificam a sua versão antes de gravar.
+# As escritas feitas pela aplicação invalidam a cache de imediato, mas as
+# alterações feitas diretamente na folha só aparecem (também nas estatísticas
+# de utils.aggregates) quando a cache expira, até SHEET_CACHE_TTL segundos depois.
+SHEET_CACHE_TTL = 1800
+
+# Idade máxima (segundos) dos registos pré-carregados em segundo plano (ver utils.prefetch)
+PREFETCH_MAX_AGE = 120
 
 
 # ===== DATA TYPE DEFINITIONS =====
@@ -22,6 +45,8 @@ class SheetConfig:
         required_columns (List[str]): Columns that must have values
         unique_columns (List[str]): Columns that must have unique values
         conflict_rules (Optional[Dict[str, Any]]): Rules for checking conflicts
+        async_writes (bool): Write in the background (see utils.write_queue):
+            create/update/delete return as soon as the write is queued
     """
 
     def __init__(self,
@@ -30,34 +55,491 @@ class SheetConfig:
                  id_prefix: str = '',
                  required_columns: Optional[List[str]] = None,
                  unique_columns: Optional[List[str]] = None,
-                 conflict_rules: Optional[Dict[str, Any]] = None):
+                 conflict_rules: Optional[Dict[str, Any]] = None,
+                 async_writes: bool = False):
         self.name = name
         self.id_column = id_column
         self.id_prefix = id_prefix
         self.required_columns = required_columns or []
         self.unique_columns = unique_columns or []
         self.conflict_rules = conflict_rules or {}
+        self.async_writes = async_writes
+
+
+# ===== DATA GENERATIONS AND WRITE NOTIFICATIONS =====
+
+@st.cache_resource
+def _generation_store() -> Dict[str, Any]:
+    """Process-wide generation counters, one per worksheet."""
+    return {'lock': threading.Lock(), 'generations': {}}
+
+
+def _bump_generation(sheet_name: str) -> int:
+    """Increment the data generation of a worksheet."""
+    store = _generation_store()
+    with store['lock']:
+        generation = store['generations'].get(sheet_name, 0) + 1
+        store['generations'][sheet_name] = generation
+    return generation
+
+
+def get_sheet_generation(sheet_name: str) -> int:
+    """Return the data generation of a worksheet.
+
+    The generation changes whenever the sheet is reloaded from Google Sheets
+    or written by this app, so it can be used as a cache key for anything
+    derived from the sheet data.
+
+    Args:
+        sheet_name (str): Name of the worksheet
+
+    Returns:
+        int: Current generation number
+    """
+    return _generation_store()['generations'].get(sheet_name, 0)
+
+
+_WRITE_LISTENERS: List[Callable[[str, str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+
+
+def register_write_listener(listener: Callable[[str, str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]) -> None:
+    """Register a callback run after every write to a worksheet.
+
+    Args:
+        listener (Callable): Called as listener(sheet_name, operation, old_row,
+            new_row) with operation in 'create', 'update' or 'delete'
+    """
+    if listener not in _WRITE_LISTENERS:
+        _WRITE_LISTENERS.append(listener)
+
+
+def notify_sheet_write(sheet_name: str,
+                       operation: str,
+                       old_row: Optional[Dict[str, Any]] = None,
+                       new_row: Optional[Dict[str, Any]] = None) -> None:
+    """Record a write to a worksheet made by this app.
+
+    Drops the cached frame of the sheet, bumps its generation and informs the
+    registered listeners (e.g. incremental aggregates).
+
+    Args:
+        sheet_name (str): Name of the worksheet
+        operation (str): 'create', 'update' or 'delete'
+        old_row (Optional[Dict[str, Any]]): Row before the write
+        new_row (Optional[Dict[str, Any]]): Row after the write
+    """
+    _invalidate_sheet_cache(sheet_name)
+    _bump_generation(sheet_name)
+    for listener in list(_WRITE_LISTENERS):
+        try:
+            listener(sheet_name, operation, old_row, new_row)
+        except Exception as e:
+            logger.warning(f"Erro ao notificar escrita em {sheet_name}: {e}")
+
+
+# ===== CACHE STATE AND PREFETCHED RECORDS =====
+
+@st.cache_resource
+def _cache_state() -> Dict[str, Any]:
+    """Process-wide load times of cached sheets and records prefetched for them."""
+    return {'lock': threading.Lock(), 'loaded_at': {}, 'prefetched': {}}
+
+
+def _invalidate_sheet_cache(sheet_name: str) -> None:
+    """Drop the cached frame of a worksheet."""
+    _load_sheet_data.clear(sheet_name)
+    state = _cache_state()
+    with state['lock']:
+        state['loaded_at'].pop(sheet_name, None)
+        state['prefetched'].pop(sheet_name, None)
+
+
+def reload_sheet_data(sheet_name: str) -> pd.DataFrame:
+    """Read a worksheet again from Google Sheets, replacing its cached frame.
+
+    Use before a write whose checks must see other sessions' changes (the
+    cached frame may be up to SHEET_CACHE_TTL old). The new generation also
+    refreshes everything derived from the sheet.
+
+    Args:
+        sheet_name (str): Name of the worksheet
+
+    Returns:
+        pandas.DataFrame: Freshly read, typed data (without pending writes)
+    """
+    _invalidate_sheet_cache(sheet_name)
+    return get_sheet_data(sheet_name, include_pending=False)
+
+
+def is_sheet_cached(sheet_name: str) -> bool:
+    """Return whether the frame of a worksheet is in the cache and still valid.
+
+    Args:
+        sheet_name (str): Name of the worksheet
+
+    Returns:
+        bool: True if get_sheet_data will not call the Sheets API
+    """
+    loaded_at = _cache_state()['loaded_at'].get(sheet_name)
+    return loaded_at is not None and time.time() - loaded_at < SHEET_CACHE_TTL
+
+
+def has_prefetched_records(sheet_name: str) -> bool:
+    """Return whether recent prefetched records are waiting for a worksheet."""
+    entry = _cache_state()['prefetched'].get(sheet_name)
+    return entry is not None and time.time() - entry['fetched_at'] < PREFETCH_MAX_AGE
+
+
+def store_prefetched_records(sheet_name: str, records: List[Dict[str, Any]], generation: int) -> None:
+    """Keep records read ahead of time for the next cache miss of a worksheet.
+
+    Makes no Streamlit calls, so it can run in background threads.
+
+    Args:
+        sheet_name (str): Name of the worksheet
+        records (List[Dict[str, Any]]): Result of get_all_records
+        generation (int): Data generation of the sheet when the read was scheduled
+    """
+    state = _cache_state()
+    with state['lock']:
+        state['prefetched'][sheet_name] = {'records': records, 'generation': generation,
+                                           'fetched_at': time.time()}
+
+
+def _take_prefetched_records(sheet_name: str) -> Optional[List[Dict[str, Any]]]:
+    """Prefetched records of a worksheet, if the sheet has not changed since."""
+    state = _cache_state()
+    with state['lock']:
+        entry = state['prefetched'].pop(sheet_name, None)
+    if entry is None or time.time() - entry['fetched_at'] >= PREFETCH_MAX_AGE:
+        return None
+    # Any load or write of the sheet since the read was scheduled bumps its generation
+    if entry['generation'] != get_sheet_generation(sheet_name):
+        return None
+    return entry['records']
+
+
+# ===== CACHE MEMORY ACCOUNTING =====
+
+@st.cache_resource
+def _sheet_memory_registry() -> Dict[str, Dict[str, Any]]:
+    """Process-wide record of the size of each cached sheet frame."""
+    return {}
+
+
+def get_memory_report() -> pd.DataFrame:
+    """Report the memory used by each sheet frame held in the shared cache.
+
+    Returns:
+        pd.DataFrame: One row per worksheet with rows, columns and memory (KB)
+    """
+    registry = _sheet_memory_registry()
+    report = pd.DataFrame(
+        [{'Folha': name, **info} for name, info in sorted(registry.items())],
+        columns=['Folha', 'Linhas', 'Colunas', 'Memória (KB)']
+    )
+    return report
 
 
 # ===== CRUD OPERATIONS =====
 
-@st.cache_data(ttl=300)
-def get_sheet_data(sheet_name: str) -> pd.DataFrame:
+def get_sheet_data(sheet_name: str, include_pending: bool = True) -> pd.DataFrame:
     """Retrieve all data from a Google Sheet as a DataFrame with caching.
 
+    Column types are converted once when the sheet is loaded, according to the
+    worksheet schema (see utils.schema), so cached frames hold dates, numbers
+    and categories. This session's background writes not yet in the cache are
+    applied on top of the cached frame (see utils.write_queue).
+
+    Caches shared by all sessions and keyed by sheet generation must pass
+    include_pending=False, so they only ever hold committed data.
+
     Args:
         sheet_name (str): Name of the worksheet
+        include_pending (bool): Apply this session's pending background writes
 
     Returns:
-        pandas.DataFrame: Data from the worksheet
+        pandas.DataFrame: Typed data from the worksheet
     """
+    finalize_writes(sheet_name)
     try:
-        sheet = get_worksheet(sheet_name)
-        records = sheet.get_all_records()
-        return pd.DataFrame(records)
+        df = _load_sheet_data(sheet_name)
     except Exception as e:
+        # Failed loads are not cached, so the next run tries again
         st.error(f"Erro ao carregar dados da planilha {sheet_name}: {str(e)}")
         return pd.DataFrame()
+    return _apply_pending_writes(sheet_name, df) if include_pending else df
+
+
+@st.cache_data(ttl=SHEET_CACHE_TTL)
+def _load_sheet_data(sheet_name: str) -> pd.DataFrame:
+    """Read a worksheet and apply its schema (cached, shared by all sessions)."""
+    records = _take_prefetched_records(sheet_name)
+    if records is None:
+        sheet = get_worksheet(sheet_name)
+        with timed("sheets.get_all_records", folha=sheet_name):
+            records = sheet.get_all_records()
+    with timed("dados.aplicar_schema", folha=sheet_name, linhas=len(records)):
+        df = apply_schema(pd.DataFrame(records), sheet_name)
+    _bump_generation(sheet_name)
+    _cache_state()['loaded_at'][sheet_name] = time.time()
+    _sheet_memory_registry()[sheet_name] = {
+        'Linhas': len(df),
+        'Colunas': len(df.columns),
+        'Memória (KB)': round(memory_usage_bytes(df) / 1024, 1),
+    }
+    return df
+
+
+def _apply_pending_writes(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Show queued background writes in the cached frame (optimistic overlay).
+
+    Records are matched by ID, since the cache may have been reloaded (and
+    its rows shifted) since a write was queued. An updated record keeps its
+    index label; created records get new labels after the last one. Index
+    labels of the other records are kept, so they still point at the cached
+    rows.
+    """
+    jobs = pending_writes(sheet_name)
+    if not jobs:
+        return df
+
+    result = df
+    for job in jobs:
+        if job.id_column in result.columns:
+            ids = result[job.id_column].map(_normalize_cell)
+            matched = result.index[ids == job.record_id]
+        else:
+            matched = result.index[result.index == job.index]
+        if len(matched):
+            label = matched[0]
+        else:
+            label = int(result.index.max()) + 1 if not result.empty else 0
+        result = result.drop(index=matched)
+        if job.operation != 'delete' and job.row is not None:
+            row = apply_schema(pd.DataFrame([job.row], index=[label]), sheet_name)
+            result = pd.concat([result, row]) if not result.empty else row
+    result = result.sort_index()
+    result.attrs = df.attrs
+    return result
+
+
+# ===== ROW VERSIONS (OPTIMISTIC CONCURRENCY) =====
+
+def _normalize_cell(value: Any) -> str:
+    """Normalize a cell value so cached and freshly read rows compare equal.
+
+    Args:
+        value (Any): Cell value (string, number, date or missing)
+
+    Returns:
+        str: Canonical string representation of the value
+    """
+    if is_missing(value):
+        return ''
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+    if hasattr(value, 'strftime'):
+        return value.strftime('%d/%m/%Y')
+    return str(value).strip()
+
+
+def compute_row_version(values: List[Any]) -> str:
+    """Compute a short content hash identifying the version of a row.
+
+    Args:
+        values (List[Any]): Row values in sheet column order
+
+    Returns:
+        str: Version stamp of the row
+    """
+    payload = '\x1f'.join(_normalize_cell(v) for v in values)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _read_sheet_row(sheet, row_number: int, num_columns: int) -> List[Any]:
+    """Read one row from the sheet, parsed the same way as get_all_records."""
+    values = sheet.row_values(row_number)
+    values = values + [''] * (num_columns - len(values))
+    return numericise_all(values[:num_columns])
+
+
+def locate_record_row(sheet,
+                      sheet_config: SheetConfig,
+                      sheet_df: pd.DataFrame,
+                      index: int) -> Tuple[Optional[int], Optional[List[Any]]]:
+    """Find the current sheet row holding the cached record at ``index``.
+
+    Rows shift when other sessions delete records, so the record is matched by
+    its ID column and, if it moved, searched for in that column.
+
+    Args:
+        sheet: gspread worksheet
+        sheet_config (SheetConfig): Configuration for the sheet
+        sheet_df (pd.DataFrame): Cached sheet data
+        index (int): Index of the record in the cached DataFrame
+
+    Returns:
+        tuple: (sheet row number, current row values) or (None, None) if the
+        record no longer exists
+    """
+    columns = sheet_columns(sheet_df)
+    row_number = index + 2  # +2 for header and array offset
+    current = _read_sheet_row(sheet, row_number, len(columns))
+
+    if sheet_config.id_column not in columns:
+        return row_number, current
+
+    id_pos = columns.index(sheet_config.id_column)
+    expected_id = _normalize_cell(sheet_df.loc[index, sheet_config.id_column])
+    if _normalize_cell(current[id_pos]) == expected_id:
+        return row_number, current
+
+    if not expected_id:
+        return None, None
+    # IDs are compared as get_all_records parses them (e.g. '0007' is read as 7)
+    ids = numericise_all(sheet.col_values(id_pos + 1))
+    for row_number, value in enumerate(ids[1:], start=2):
+        if _normalize_cell(value) == expected_id:
+            return row_number, _read_sheet_row(sheet, row_number, len(columns))
+    return None, None
+
+
+def merge_row_changes(columns: List[str],
+                      base: List[Any],
+                      current: List[Any],
+                      mine: List[Any]) -> Tuple[List[Any], List[str]]:
+    """Three-way merge of a row edited locally while it changed in the sheet.
+
+    Args:
+        columns (List[str]): Column names
+        base (List[Any]): Row values as read when the edit started
+        current (List[Any]): Row values currently in the sheet
+        mine (List[Any]): Row values proposed by this session
+
+    Returns:
+        tuple: (merged row values, columns changed on both sides differently)
+    """
+    merged = []
+    conflicts = []
+    for col, b, c, m in zip(columns, base, current, mine):
+        nb, nc, nm = _normalize_cell(b), _normalize_cell(c), _normalize_cell(m)
+        if nm == nb:
+            merged.append(c)
+        elif nc == nb or nc == nm:
+            merged.append(m)
+        else:
+            merged.append(m)
+            conflicts.append(col)
+    return merged, conflicts
+
+
+def _write_row_update(sheet,
+                      sheet_config: SheetConfig,
+                      sheet_df: pd.DataFrame,
+                      index: int,
+                      base_row: List[Any],
+                      row_data: List[Any],
+                      force: bool = False) -> Dict[str, Any]:
+    """Check the version of a row and write the update.
+
+    Makes no Streamlit calls, so it also runs in background write threads.
+
+    Returns:
+        Dict[str, Any]: 'status' ('updated', 'missing' or 'conflict'), the
+        'current' row read from the sheet, the 'written' row and the
+        'conflicts' (columns changed on both sides)
+    """
+    columns = sheet_columns(sheet_df)
+    row_number, current_row = locate_record_row(sheet, sheet_config, sheet_df, index)
+    if row_number is None:
+        return {'status': 'missing', 'current': None, 'written': None, 'conflicts': []}
+
+    if compute_row_version(current_row) != compute_row_version(base_row):
+        merged_row, conflicts = merge_row_changes(columns, base_row, current_row, row_data)
+        if conflicts and not force:
+            return {'status': 'conflict', 'current': current_row, 'written': None, 'conflicts': conflicts}
+        row_data = merged_row
+
+    if columns and columns[0] == sheet_config.id_column:
+        # The ID cell is not rewritten, so it keeps its text (e.g. '0007', read as 7)
+        sheet.update(f'B{row_number}', [row_data[1:]])
+    else:
+        sheet.update(f'A{row_number}', [row_data])
+    return {'status': 'updated', 'current': current_row, 'written': row_data, 'conflicts': []}
+
+
+def _delete_sheet_row(sheet,
+                      sheet_config: SheetConfig,
+                      sheet_df: pd.DataFrame,
+                      index: int,
+                      base_row: List[Any]) -> Dict[str, Any]:
+    """Check the version of a row and delete it (no Streamlit calls).
+
+    Returns:
+        Dict[str, Any]: 'status' ('deleted', 'missing' or 'conflict') and the
+        'current' row read from the sheet
+    """
+    row_number, current_row = locate_record_row(sheet, sheet_config, sheet_df, index)
+    if row_number is None:
+        return {'status': 'missing', 'current': None}
+    # A row edited since it was read is not deleted: the user has not seen the changes
+    if compute_row_version(current_row) != compute_row_version(base_row):
+        return {'status': 'conflict', 'current': current_row}
+    sheet.delete_rows(row_number)
+    return {'status': 'deleted', 'current': current_row}
+
+
+def _record_id(sheet_config: SheetConfig, sheet_df: pd.DataFrame, index: int) -> str:
+    """ID of a cached record (the index if the sheet has no ID column)."""
+    if sheet_config.id_column in sheet_df.columns and index in sheet_df.index:
+        return _normalize_cell(sheet_df.loc[index, sheet_config.id_column])
+    return str(index)
+
+
+def _conflict_details(sheet_config: SheetConfig,
+                      sheet_df: pd.DataFrame,
+                      index: int,
+                      data: Dict[str, Any],
+                      columns: List[str],
+                      outcome: Dict[str, Any],
+                      base_row: List[Any],
+                      row_data: List[Any]) -> Dict[str, Any]:
+    """Pending conflict of an update, as stored under CONFLICT_STATE_KEY.
+
+    The record is kept by ID, so render_conflict_resolution still finds it
+    if the cache is reloaded before the user decides.
+    """
+    current_row = outcome['current']
+    return {
+        'sheet': sheet_config.name,
+        'record_id': _record_id(sheet_config, sheet_df, index),
+        'data': data,
+        'conflicts': [
+            {'Campo': col,
+             'Valor original': _normalize_cell(base_row[columns.index(col)]),
+             'Valor atual na folha': _normalize_cell(current_row[columns.index(col)]),
+             'Novo valor': _normalize_cell(row_data[columns.index(col)])}
+            for col in outcome['conflicts']
+        ],
+    }
+
+
+def _finish_background_write(sheet_name: str, operation: str, result: Any) -> None:
+    """Run on the script thread once a background write has finished.
+
+    Args:
+        sheet_name (str): Name of the worksheet
+        operation (str): 'create', 'update' or 'delete'
+        result (Any): (old_row, new_row) of the write, or None if it failed or
+            the record no longer existed
+    """
+    if result is None:
+        _invalidate_sheet_cache(sheet_name)
+        return
+    old_row, new_row = result
+    notify_sheet_write(sheet_name, operation, old_row=old_row, new_row=new_row)
 
 
 def generate_unique_id(sheet_df: pd.DataFrame,
@@ -220,6 +702,7 @@ def validate_custom_rules(sheet_df: pd.DataFrame,
     return errors
 
 
+@timed_function("validacao.formulario")
 def validate_data(sheet_config: SheetConfig,
                   data: Dict[str, Any],
                   sheet_df: pd.DataFrame,
@@ -291,20 +774,36 @@ def create_record(sheet_config: SheetConfig,
 
         # Create record
         sheet = get_worksheet(sheet_config.name)
-        row_data = [data.get(col, '') for col in sheet_df.columns.tolist()]
-
-        sheet.append_row(row_data)
+        # Folha ainda sem registos: usar o cabeçalho
+        columns = sheet_columns(sheet_df) or sheet.row_values(1)
+        row_data = [to_sheet_value(data.get(col, '')) for col in columns]
+        new_row = dict(zip(columns, row_data))
 
-        # Success feedback
         if success_message:
-            st.success(success_message)
+            message = success_message
         elif 'Nome' in data:
-            st.success("Registado adicionado com sucesso!")
+            message = "Registado adicionado com sucesso!"
         else:
-            st.success("Registado criado com sucesso!")
+            message = "Registado criado com sucesso!"
 
-        # Clear cache to refresh data
-        get_sheet_data.clear()
+        if sheet_config.async_writes:
+            def write():
+                sheet.append_row(row_data)
+                return None, new_row
+
+            submit_write(sheet_config.name, 'create', data[sheet_config.id_column], write,
+                         on_commit=lambda result: _finish_background_write(sheet_config.name, 'create', result),
+                         id_column=sheet_config.id_column, index=int(sheet_df.index.max()) + 1 if not sheet_df.empty else 0,
+                         row=new_row, success_message=message)
+            return True
+
+        sheet.append_row(row_data)
+
+        # Success feedback (toast na próxima execução: quem chama faz st.rerun())
+        notificar(message)
+
+        # Refresh cached data and derived aggregates
+        notify_sheet_write(sheet_config.name, 'create', new_row=new_row)
 
         return True
 
@@ -316,14 +815,21 @@ def create_record(sheet_config: SheetConfig,
 def update_record(sheet_config: SheetConfig,
                   index: int,
                   data: Dict[str, Any],
-                  success_message: Optional[str] = None) -> bool:
+                  success_message: Optional[str] = None,
+                  force: bool = False) -> bool:
     """Update an existing record in the Google Sheet.
 
+    The row is re-read before writing and compared with the cached version.
+    Changes made meanwhile by other sessions are merged column by column; if
+    both sides changed the same column the update is held back and a conflict
+    is registered for render_conflict_resolution.
+
     Args:
         sheet_config (SheetConfig): Configuration for the sheet
         index (int): Index of the record to update (DataFrame index)
         data (Dict[str, Any]): Updated data
         success_message (Optional[str]): Custom success message
+        force (bool): Overwrite conflicting columns with this session's values
 
     Returns:
         bool: True if successful, False otherwise
@@ -338,32 +844,62 @@ def update_record(sheet_config: SheetConfig,
                 st.error(error)
             return False
 
-        # Update record
-        sheet = get_worksheet(sheet_config.name)
+        # Build the proposed row
+        columns = sheet_columns(sheet_df)
+        base_row = [to_sheet_value(sheet_df.loc[index, col]) for col in columns]
         row_data = []
-        columns = sheet_df.columns.tolist()
 
-        for col in columns:
+        for col, base_value in zip(columns, base_row):
             if col in data:
-                # Handle date objects
-                value = data[col]
-                if hasattr(value, 'strftime'):
-                    value = value.strftime('%d/%m/%Y')
-                row_data.append(value)
+                # Handle date objects and typed values
+                row_data.append(to_sheet_value(data[col]))
             else:
-                row_data.append(sheet_df.loc[index, col])
+                row_data.append(base_value)
 
-        # Update the row (add 2 to index to account for header row)
-        sheet.update(f'A{index + 2}', [row_data])
+        sheet = get_worksheet(sheet_config.name)
+        message = success_message or "Registo atualizado com sucesso!"
+
+        if sheet_config.async_writes:
+            # The version check runs in the worker; a conflict fails the write
+            def write():
+                outcome = _write_row_update(sheet, sheet_config, sheet_df, index, base_row, row_data, force)
+                if outcome['status'] == 'missing':
+                    raise WriteError("o registo foi apagado por outro utilizador entretanto.")
+                if outcome['status'] == 'conflict':
+                    raise WriteError("outro utilizador alterou os mesmos campos ("
+                                     + ", ".join(outcome['conflicts']) + ").",
+                                     conflict=_conflict_details(sheet_config, sheet_df, index, data, columns,
+                                                                outcome, base_row, row_data))
+                return dict(zip(columns, outcome['current'])), dict(zip(columns, outcome['written']))
+
+            submit_write(sheet_config.name, 'update', _record_id(sheet_config, sheet_df, index), write,
+                         on_commit=lambda result: _finish_background_write(sheet_config.name, 'update', result),
+                         id_column=sheet_config.id_column, index=index, row=dict(zip(columns, row_data)), success_message=message)
+            st.session_state.pop(CONFLICT_STATE_KEY, None)
+            return True
+
+        # Check the row version against the sheet before writing
+        outcome = _write_row_update(sheet, sheet_config, sheet_df, index, base_row, row_data, force)
+        if outcome['status'] == 'missing':
+            st.error("Este registo foi apagado por outro utilizador entretanto.")
+            _invalidate_sheet_cache(sheet_config.name)
+            return False
 
-        # Success feedback
-        if success_message:
-            st.success(success_message)
-        else:
-            st.success("Registo atualizado com sucesso!")
+        current_row = outcome['current']
+        if outcome['status'] == 'conflict':
+            st.session_state[CONFLICT_STATE_KEY] = _conflict_details(
+                sheet_config, sheet_df, index, data, columns, outcome, base_row, row_data)
+            st.warning("Este registo foi alterado por outro utilizador desde que foi aberto.")
+            return False
+
+        # Success feedback (toast na próxima execução)
+        notificar(message)
 
-        # Clear cache to refresh data
-        get_sheet_data.clear()
+        # Clear conflict state and refresh cached data
+        st.session_state.pop(CONFLICT_STATE_KEY, None)
+        notify_sheet_write(sheet_config.name, 'update',
+                           old_row=dict(zip(columns, current_row)),
+                           new_row=dict(zip(columns, outcome['written'])))
 
         return True
 
@@ -372,54 +908,123 @@ def update_record(sheet_config: SheetConfig,
         return False
 
 
+def render_conflict_resolution(sheet_config: SheetConfig) -> bool:
+    """Show a pending update conflict and let the user keep or discard it.
+
+    Args:
+        sheet_config (SheetConfig): Configuration for the sheet being edited
+
+    Returns:
+        bool: True if the pending update was written, False otherwise
+    """
+    conflito = st.session_state.get(CONFLICT_STATE_KEY)
+    if not conflito or conflito['sheet'] != sheet_config.name:
+        return False
+
+    st.warning("⚠️ Outro utilizador alterou os mesmos campos deste registo. "
+               "Reveja as diferenças antes de guardar.")
+    st.dataframe(pd.DataFrame(conflito['conflicts']), hide_index=True, use_container_width=True)
+
+    col1, col2, _ = st.columns([1, 1, 3])
+    with col1:
+        if st.button("💾 Manter as minhas alterações", key="conflito_manter"):
+            # The cache may have been reloaded since the conflict: find the record by ID
+            index = resolve_record(get_sheet_data(sheet_config.name), sheet_config.id_column,
+                                   conflito['record_id'])
+            if index is None:
+                del st.session_state[CONFLICT_STATE_KEY]
+                st.error("Este registo foi apagado por outro utilizador entretanto.")
+                return False
+            return update_record(sheet_config, index, conflito['data'], force=True)
+    with col2:
+        if st.button("🔄 Descartar e recarregar", key="conflito_descartar"):
+            del st.session_state[CONFLICT_STATE_KEY]
+            _invalidate_sheet_cache(sheet_config.name)
+            st.rerun()
+    return False
+
+
 def delete_record(sheet_config: SheetConfig,
                   index: int,
                   confirm_message: str = "Esta ação não pode ser desfeita.",
-                  success_message: Optional[str] = None) -> bool:
+                  success_message: Optional[str] = None,
+                  confirmed: bool = False) -> bool:
     """Delete a record from the Google Sheet with confirmation.
 
+    The row is re-read and compared with the cached version first; a record
+    changed by another session since it was read is not deleted.
+
     Args:
         sheet_config (SheetConfig): Configuration for the sheet
         index (int): Index of the record to delete (DataFrame index)
         confirm_message (str): Custom confirmation message
         success_message (Optional[str]): Custom success message
+        confirmed (bool): Skip the inline confirmation (already confirmed,
+            e.g. in components.confirm_delete_dialog)
 
     Returns:
         bool: True if successful, False otherwise
     """
     try:
         sheet_df = get_sheet_data(sheet_config.name)
+        estado = section_state(sheet_config.name)
+        record_id = _record_id(sheet_config, sheet_df, index)
 
-        # Show confirmation dialog
-        if 'confirm_delete' not in st.session_state or st.session_state.confirm_delete != index:
-            st.session_state.confirm_delete = index
+        # Inline confirmation (the record is kept in the section state by ID)
+        if not confirmed:
+            estado.start_delete(record_id)
             st.warning(confirm_message)
 
             col1, col2, _ = st.columns([1, 1, 5])
             with col1:
-                if st.button("✅ Sim, eliminar"):
-                    st.session_state.confirm_delete = index
-                    st.rerun()
+                confirmar = st.button("✅ Sim, eliminar", key=f"eliminar_sim_{record_id}")
             with col2:
-                if st.button("❌ Cancelar"):
-                    del st.session_state.confirm_delete
+                if st.button("❌ Cancelar", key=f"eliminar_cancelar_{record_id}"):
+                    estado.back_to_list()
                     st.rerun()
-            return False
+            if not confirmar:
+                return False
 
-        # Delete the record
+        # Delete the record (located by ID in case rows have shifted)
         sheet = get_worksheet(sheet_config.name)
-        sheet.delete_rows(index + 2)  # +2 for header and array offset
+        columns = sheet_columns(sheet_df)
+        base_row = [to_sheet_value(sheet_df.loc[index, col]) for col in columns]
+        message = success_message or "Registo eliminado com sucesso!"
+
+        if sheet_config.async_writes:
+            def write():
+                outcome = _delete_sheet_row(sheet, sheet_config, sheet_df, index, base_row)
+                if outcome['status'] == 'conflict':
+                    raise WriteError("o registo foi alterado por outro utilizador entretanto.")
+                if outcome['status'] == 'missing':
+                    return None
+                return dict(zip(columns, outcome['current'])), None
+
+            submit_write(sheet_config.name, 'delete', record_id, write,
+                         on_commit=lambda result: _finish_background_write(sheet_config.name, 'delete', result),
+                         id_column=sheet_config.id_column, index=index, success_message=message)
+            estado.back_to_list()
+            return True
+
+        outcome = _delete_sheet_row(sheet, sheet_config, sheet_df, index, base_row)
+        if outcome['status'] == 'missing':
+            st.warning("Este registo já tinha sido apagado por outro utilizador.")
+            estado.back_to_list()
+            _invalidate_sheet_cache(sheet_config.name)
+            return True
+
+        if outcome['status'] == 'conflict':
+            st.warning("Este registo foi alterado por outro utilizador desde que foi aberto. "
+                       "Reveja as alterações antes de o eliminar.")
+            _invalidate_sheet_cache(sheet_config.name)
+            return False
 
-        # Success feedback
-        if success_message:
-            st.success(success_message)
-        else:
-            st.success("Registo eliminado com sucesso!")
+        # Success feedback (toast na próxima execução)
+        notificar(message)
 
-        # Clear session state and cache
-        if hasattr(st.session_state, 'confirm_delete'):
-            del st.session_state.confirm_delete
-        get_sheet_data.clear()
+        # Clear section state and cache
+        estado.back_to_list()
+        notify_sheet_write(sheet_config.name, 'delete', old_row=dict(zip(columns, outcome['current'])))
 
         return True
 
@@ -516,37 +1121,48 @@ def safe_get_column_value(row: pd.Series, column: str, default: Any = '') -> Any
 
 def create_pagination_controls(num_items: int,
                                items_per_page: int = 10,
-                               session_key_prefix: str = "pagination") -> tuple[int, int]:
+                               section: str = "pagination",
+                               record_ids: Optional[List[Any]] = None) -> tuple[int, int]:
     """Create pagination controls for displaying large datasets.
 
+    The current page is kept in the section state (utils.state). When the IDs
+    of the items are given, the page follows the first record shown, so
+    records added or removed before it do not move the list under the user.
+
     Args:
         num_items (int): Total number of items
         items_per_page (int): Number of items per page
-        session_key_prefix (str): Prefix for session state keys
+        section (str): Section whose state holds the current page
+        record_ids (Optional[List[Any]]): IDs of the items, in display order
 
     Returns:
         tuple: (current_page, items_per_page)
     """
     total_pages = max(1, (num_items + items_per_page - 1) // items_per_page)
+    estado = section_state(section)
+    ids = [str(record_id) for record_id in record_ids] if record_ids is not None else None
+
+    current_page = estado.page
+    if ids is not None and estado.page_record_id in ids:
+        current_page = ids.index(estado.page_record_id) // items_per_page + 1
+    # Ensure current page is within bounds
+    current_page = min(max(1, current_page), total_pages)
+
+    def ir_para(pagina: int) -> None:
+        estado.page = pagina
+        inicio = (pagina - 1) * items_per_page
+        estado.page_record_id = ids[inicio] if ids is not None and inicio < len(ids) else None
+        st.rerun(scope="app")
 
     col1, col2, col3 = st.columns([1, 2, 1])
 
     with col1:
-        if st.button("⬅️ Anterior", disabled=st.session_state.get(f"{session_key_prefix}_current_page", 1) <= 1):
-            st.session_state[f"{session_key_prefix}_current_page"] = st.session_state.get(f"{session_key_prefix}_current_page", 1) - 1
-            st.rerun()
+        if st.button("⬅️ Anterior", disabled=current_page <= 1, key=f"{section}_pagina_anterior"):
+            ir_para(current_page - 1)
 
     with col2:
-        current_page = st.session_state.get(f"{session_key_prefix}_current_page", 1)
-
-        # Ensure current page is within bounds
-        if current_page > total_pages:
-            current_page = total_pages
-            st.session_state[f"{session_key_prefix}_current_page"] = current_page
-
         if total_pages > 1:
             cols = st.columns(5)
-            show_pages = min(5, total_pages)
 
             if total_pages <= 5:
                 start_page = 1
@@ -559,16 +1175,14 @@ def create_pagination_controls(num_items: int,
             for i, page in enumerate(range(start_page, min(start_page + 5, total_pages + 1))):
                 if i < len(cols):
                     with cols[i]:
-                        if st.button(str(page), disabled=current_page == page):
-                            st.session_state[f"{session_key_prefix}_current_page"] = page
-                            st.rerun()
+                        if st.button(str(page), disabled=current_page == page, key=f"{section}_pagina_{page}"):
+                            ir_para(page)
         else:
             st.write("Página 1 de 1")
 
     with col3:
-        if st.button("Próximo ➡️", disabled=current_page >= total_pages):
-            st.session_state[f"{session_key_prefix}_current_page"] = st.session_state.get(f"{session_key_prefix}_current_page", 1) + 1
-            st.rerun()
+        if st.button("Próximo ➡️", disabled=current_page >= total_pages, key=f"{section}_pagina_seguinte"):
+            ir_para(current_page + 1)
 
     start_index = (current_page - 1) * items_per_page
     end_index = min(start_index + items_per_page, num_items)
@@ -0,0 +1,241 @@
+"""Enrollments (Inscrições) of Utentes in Turmas
+
+This module links utentes to turmas through the 'Inscricoes' worksheet. An
+index is built once per data generation of Inscricoes and Turmas, holding the
+active enrollments by turma and by utente, the seats taken per turma and each
+turma's schedule. Capacity checks, rosters, a utente's classes and schedule
+conflict checks are then dictionary lookups instead of scans of the sheet.
+
+Before an enrollment is written, Inscricoes is read again from the sheet and
+the checks are repeated on the fresh data, under a lock shared by the
+sessions of this process, so two users cannot both take the last seat or
+enrol the same utente twice.
+"""
+
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from utils.crud import (
+    SheetConfig,
+    create_record,
+    get_sheet_data,
+    get_sheet_generation,
+    reload_sheet_data,
+    update_record
+)
+from utils.schema import INICIO_MIN, FIM_MIN, is_missing, to_int
+from utils.sheets import DEFAULT_HEADERS
+from utils.timetable import overlapping_mask
+
+
+INSCRICOES_SHEET = "Inscricoes"
+
+# Ordem das colunas na folha "Inscricoes" (criada com este cabeçalho se não existir)
+INSCRICAO_COLUNAS = DEFAULT_HEADERS[INSCRICOES_SHEET]
+
+INSCRICAO_CONFIG = SheetConfig(
+    name=INSCRICOES_SHEET,
+    id_column="ID_Inscricao",
+    id_prefix="I",
+    required_columns=['ID_Utente', 'ID_Turma'],
+    unique_columns=[],
+    conflict_rules={}
+)
+
+
+def _chave(value: Any) -> str:
+    """Normaliza um ID para usar como chave dos índices."""
+    return '' if is_missing(value) else str(value).strip()
+
+
+class EnrollmentIndex:
+    """Índices das inscrições ativas.
+
+    Attributes:
+        by_turma (Dict[str, Dict[str, Any]]): ID_Turma -> ID_Utente -> índice da linha
+        by_utente (Dict[str, Dict[str, Any]]): ID_Utente -> ID_Turma -> índice da linha
+        vagas (Dict[str, int]): Número de vagas por turma
+        turmas (pd.DataFrame): Turmas indexadas por ID_Turma
+    """
+
+    def __init__(self, inscricoes: pd.DataFrame, turmas: pd.DataFrame):
+        self.by_turma: Dict[str, Dict[str, Any]] = {}
+        self.by_utente: Dict[str, Dict[str, Any]] = {}
+        self.vagas: Dict[str, int] = {}
+        self.turmas = pd.DataFrame()
+
+        if not turmas.empty and 'ID_Turma' in turmas.columns:
+            turmas = turmas.set_axis(turmas['ID_Turma'].map(_chave).tolist())
+            self.turmas = turmas[~turmas.index.duplicated()]
+            if 'Numero de vagas' in turmas.columns:
+                self.vagas = {
+                    turma: to_int(vagas)
+                    for turma, vagas in self.turmas['Numero de vagas'].items()
+                }
+
+        if inscricoes.empty or not {'ID_Utente', 'ID_Turma'}.issubset(inscricoes.columns):
+            return
+        if 'Estado' in inscricoes.columns:
+            inscricoes = inscricoes[inscricoes['Estado'] == 'Ativa']
+        for idx, utente, turma in zip(inscricoes.index, inscricoes['ID_Utente'], inscricoes['ID_Turma']):
+            utente, turma = _chave(utente), _chave(turma)
+            self.by_turma.setdefault(turma, {})[utente] = idx
+            self.by_utente.setdefault(utente, {})[turma] = idx
+
+    def ocupadas(self, id_turma: str) -> int:
+        """Número de inscrições ativas numa turma."""
+        return len(self.by_turma.get(id_turma, {}))
+
+    def vagas_livres(self, id_turma: str) -> int:
+        """Número de vagas ainda disponíveis numa turma."""
+        return self.vagas.get(id_turma, 0) - self.ocupadas(id_turma)
+
+    def is_enrolled(self, id_utente: str, id_turma: str) -> bool:
+        """Indica se o utente tem uma inscrição ativa na turma."""
+        return id_turma in self.by_utente.get(id_utente, {})
+
+    def roster(self, id_turma: str) -> List[str]:
+        """IDs dos utentes inscritos numa turma."""
+        return list(self.by_turma.get(id_turma, {}))
+
+    def turmas_do_utente(self, id_utente: str) -> List[str]:
+        """IDs das turmas em que o utente está inscrito."""
+        return list(self.by_utente.get(id_utente, {}))
+
+    def row_index(self, id_utente: str, id_turma: str) -> Optional[Any]:
+        """Índice da linha da inscrição ativa (None se não existir)."""
+        return self.by_utente.get(id_utente, {}).get(id_turma)
+
+    def schedule_conflicts(self, id_utente: str, id_turma: str) -> List[str]:
+        """Turmas do utente que se sobrepõem ao horário de outra turma.
+
+        Args:
+            id_utente (str): ID do utente
+            id_turma (str): ID da turma pretendida
+
+        Returns:
+            List[str]: IDs das turmas do utente em conflito
+        """
+        if id_turma not in self.turmas.index:
+            return []
+        alvo = self.turmas.loc[id_turma]
+        if is_missing(alvo.get(INICIO_MIN)) or is_missing(alvo.get(FIM_MIN)):
+            return []
+        outras = [t for t in self.turmas_do_utente(id_utente) if t != id_turma and t in self.turmas.index]
+        if not outras:
+            return []
+        inscritas = self.turmas.loc[outras]
+        mask = overlapping_mask(inscritas, alvo['Dia da Semana'], int(alvo[INICIO_MIN]), int(alvo[FIM_MIN]))
+        return inscritas.index[mask].tolist()
+
+    def validate(self, id_utente: str, id_turma: str) -> List[str]:
+        """Valida uma nova inscrição (duplicada, lotação e conflitos de horário).
+
+        Args:
+            id_utente (str): ID do utente
+            id_turma (str): ID da turma
+
+        Returns:
+            List[str]: Mensagens de erro (vazia se a inscrição é válida)
+        """
+        if id_turma not in self.turmas.index:
+            return [f"A turma '{id_turma}' não existe."]
+
+        erros = []
+        turma = self.turmas.loc[id_turma]
+        if self.is_enrolled(id_utente, id_turma):
+            erros.append("O utente já está inscrito nesta turma.")
+        if 'Estado' in self.turmas.columns and turma['Estado'] != 'Ativa':
+            erros.append("A turma não está ativa.")
+        if self.vagas_livres(id_turma) <= 0:
+            erros.append(f"A turma está completa ({self.ocupadas(id_turma)}/{self.vagas.get(id_turma, 0)} vagas).")
+        for conflito in self.schedule_conflicts(id_utente, id_turma):
+            nome = self.turmas.loc[conflito].get('Nome turma', conflito)
+            erros.append(f"Conflito de horário com a turma '{nome}' ({conflito}).")
+        return erros
+
+
+@st.cache_resource(max_entries=4)
+def _materializar_indice(geracao_inscricoes: int, geracao_turmas: int) -> EnrollmentIndex:
+    """Constrói o índice das inscrições para um par de gerações dos dados."""
+    return EnrollmentIndex(get_sheet_data(INSCRICOES_SHEET, include_pending=False), get_sheet_data("Turmas", include_pending=False))
+
+
+def get_enrollment_index() -> EnrollmentIndex:
+    """Devolve o índice das inscrições em cache.
+
+    Returns:
+        EnrollmentIndex: Índices por turma e por utente
+    """
+    # garante que as gerações correspondem aos dados em cache
+    get_sheet_data(INSCRICOES_SHEET)
+    get_sheet_data("Turmas")
+    return _materializar_indice(get_sheet_generation(INSCRICOES_SHEET), get_sheet_generation("Turmas"))
+
+
+@st.cache_resource
+def _enrollment_lock() -> threading.Lock:
+    """Lock partilhado pelas sessões: serializa a verificação e a gravação das inscrições."""
+    return threading.Lock()
+
+
+def _mostrar_erros(erros: List[str]) -> bool:
+    """Mostra os erros de validação; devolve True se houver algum."""
+    for erro in erros:
+        st.error(erro)
+    return bool(erros)
+
+
+def enroll_utente(id_utente: str, id_turma: str) -> bool:
+    """Inscreve um utente numa turma, depois de validar lotação e horário.
+
+    A validação é feita primeiro no índice em cache e repetida, antes de
+    gravar, sobre as inscrições relidas da folha (o índice em cache pode não
+    incluir as inscrições feitas entretanto por outras sessões). Gravações
+    feitas fora desta aplicação entre a releitura e a gravação não são
+    detetadas.
+
+    Args:
+        id_utente (str): ID do utente
+        id_turma (str): ID da turma
+
+    Returns:
+        bool: True se a inscrição foi criada
+    """
+    if _mostrar_erros(get_enrollment_index().validate(id_utente, id_turma)):
+        return False
+
+    with _enrollment_lock():
+        reload_sheet_data(INSCRICOES_SHEET)
+        if _mostrar_erros(get_enrollment_index().validate(id_utente, id_turma)):
+            return False
+
+        return create_record(INSCRICAO_CONFIG, {
+            'ID_Utente': id_utente,
+            'ID_Turma': id_turma,
+            'Data de inscrição': date.today().strftime('%d/%m/%Y'),
+            'Estado': 'Ativa',
+        }, success_message="Inscrição registada com sucesso!")
+
+
+def cancel_enrollment(id_utente: str, id_turma: str) -> bool:
+    """Cancela a inscrição ativa de um utente numa turma.
+
+    Args:
+        id_utente (str): ID do utente
+        id_turma (str): ID da turma
+
+    Returns:
+        bool: True se a inscrição foi cancelada
+    """
+    idx = get_enrollment_index().row_index(id_utente, id_turma)
+    if idx is None:
+        st.error("A inscrição já não existe.")
+        return False
+    inscricao = get_sheet_data(INSCRICOES_SHEET).loc[idx].to_dict()
+    inscricao['Estado'] = 'Cancelada'
+    return update_record(INSCRICAO_CONFIG, idx, inscricao, success_message="Inscrição cancelada.")
@@ -0,0 +1,142 @@
+"""Export of Section Data to CSV, Excel and Parquet
+
+This module serialises the current (filtered) view of a section straight from
+the cached, typed frame. Rows are converted in chunks, so large exports never
+hold a full intermediate copy of the data as text; the file itself is built
+in memory, as st.download_button needs its bytes. The file is only built when
+the user asks for it (see components.render_export_buttons), and the bytes
+are cached per sheet, data generation, filter and format.
+
+Excel export uses openpyxl (in requirements.txt) or xlsxwriter; the format is
+only offered when one of them is installed.
+"""
+
+import codecs
+import importlib.util
+import io
+from typing import Iterator, List, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from utils.crud import SHEET_CACHE_TTL
+from utils.schema import DATE_FORMAT, sheet_columns
+
+
+# Número de linhas escritas de cada vez
+EXPORT_CHUNK_ROWS = 5000
+
+# Formato -> (extensão, tipo MIME)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def _disponivel(modulo: str) -> bool:
+    """Indica se um pacote opcional está instalado."""
+    return importlib.util.find_spec(modulo) is not None
+
+
+def available_formats() -> List[str]:
+    """Formatos de exportação disponíveis nesta instalação.
+
+    Returns:
+        List[str]: Nomes dos formatos (chaves de EXPORT_FORMATS)
+    """
+    formatos = ['CSV']
+    if _disponivel('openpyxl') or _disponivel('xlsxwriter'):
+        formatos.append('Excel')
+    if _disponivel('pyarrow'):
+        formatos.append('Parquet')
+    return formatos
+
+
+def iter_chunks(df: pd.DataFrame, rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Percorre um DataFrame em blocos de linhas (vistas, sem cópias)."""
+    for inicio in range(0, len(df), rows):
+        yield df.iloc[inicio:inicio + rows]
+
+
+def _datas_como_texto(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Formata as colunas de datas de um bloco como na folha (DD/MM/AAAA)."""
+    datas = chunk.select_dtypes(include='datetime').columns
+    if datas.empty:
+        return chunk
+    return chunk.assign(**{col: chunk[col].dt.strftime(DATE_FORMAT) for col in datas})
+
+
+def write_csv(df: pd.DataFrame, buffer: io.BytesIO) -> None:
+    """Escreve um DataFrame em CSV (UTF-8 com BOM, para abrir no Excel), bloco a bloco."""
+    buffer.write(codecs.BOM_UTF8)
+    for i, chunk in enumerate(iter_chunks(df)):
+        _datas_como_texto(chunk).to_csv(buffer, header=(i == 0), index=False, encoding='utf-8')
+    if df.empty:
+        df.to_csv(buffer, index=False, encoding='utf-8')
+
+
+def write_excel(df: pd.DataFrame, buffer: io.BytesIO) -> None:
+    """Escreve um DataFrame numa folha Excel, bloco a bloco."""
+    with pd.ExcelWriter(buffer) as writer:
+        if df.empty:
+            df.to_excel(writer, index=False, sheet_name="Dados")
+        for i, chunk in enumerate(iter_chunks(df)):
+            _datas_como_texto(chunk).to_excel(writer, index=False, sheet_name="Dados",
+                                              header=(i == 0), startrow=0 if i == 0 else i * EXPORT_CHUNK_ROWS + 1)
+
+
+def _objetos_como_texto(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Converte as colunas object em texto (Arrow não aceita tipos misturados).
+
+    Colunas sem schema podem misturar números e vazios (ex.: [123456, '']).
+    """
+    objetos = chunk.select_dtypes(include='object').columns
+    if objetos.empty:
+        return chunk
+    return chunk.astype({col: 'string' for col in objetos})
+
+
+def write_parquet(df: pd.DataFrame, buffer: io.BytesIO) -> None:
+    """Escreve um DataFrame em Parquet (tipos preservados), um row group por bloco."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(_objetos_como_texto(df.head(0)), preserve_index=False)
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for chunk in iter_chunks(df):
+            writer.write_table(pa.Table.from_pandas(_objetos_como_texto(chunk), schema=schema,
+                                                    preserve_index=False))
+
+
+WRITERS = {
+    'CSV': write_csv,
+    'Excel': write_excel,
+    'Parquet': write_parquet,
+}
+
+
+@st.cache_resource(max_entries=8, ttl=SHEET_CACHE_TTL, show_spinner=False)
+def export_dataframe(sheet_name: str, generation: int, pendentes: Tuple[str, ...],
+                     filtro: str, formato: str, _df: pd.DataFrame) -> bytes:
+    """Serializa uma vista de uma folha no formato pedido.
+
+    Os argumentos sheet_name, generation, pendentes e filtro identificam a
+    vista na cache; o DataFrame em si (_df) não é usado como chave. A cache é
+    partilhada pelas sessões: pendentes distingue as vistas que incluem
+    gravações ainda pendentes de uma sessão (write_queue.pending_write_ids).
+
+    Args:
+        sheet_name (str): Nome da folha ou vista exportada
+        generation (int): Geração dos dados da folha
+        pendentes (Tuple[str, ...]): IDs das gravações pendentes refletidas na vista
+        filtro (str): Descrição do filtro aplicado à vista
+        formato (str): Chave de EXPORT_FORMATS
+        _df (pd.DataFrame): Dados da vista
+
+    Returns:
+        bytes: Conteúdo do ficheiro
+    """
+    buffer = io.BytesIO()
+    WRITERS[formato](_df[sheet_columns(_df)], buffer)
+    return buffer.getvalue()
@@ -0,0 +1,137 @@
+"""Timing Instrumentation
+
+A context manager (timed) and a decorator (timed_function) measure data
+loads, validations, Sheets API calls and page renders. The most recent
+durations of each operation are kept in process memory for the p50/p95
+report of the diagnostics page, and every measurement is also written as a
+structured (JSON) log line on the 'gestao_ipss.metrics' logger.
+"""
+
+import functools
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pandas as pd
+import streamlit as st
+
+
+# Número de medições guardadas por operação (as mais recentes)
+METRICS_WINDOW = 500
+
+LOGGER_NAME = "gestao_ipss.metrics"
+
+logger = logging.getLogger(LOGGER_NAME)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+@st.cache_resource
+def _metrics_registry() -> Dict[str, Dict[str, Any]]:
+    """Shared registry of timings (operation -> call count and recent durations)."""
+    return {}
+
+
+@st.cache_resource
+def _process_info() -> Dict[str, Any]:
+    """Per-process facts (start time and whether the first run was recorded)."""
+    return {'inicio': time.time(), 'arranque_registado': False}
+
+
+def record_timing(operation: str, duration_ms: float, **context: Any) -> None:
+    """Regista a duração de uma operação e escreve-a no log estruturado.
+
+    Args:
+        operation (str): Nome da operação (ex.: 'sheets.get_all_records')
+        duration_ms (float): Duração em milissegundos
+        **context: Campos adicionais para o log (folha, página, ...)
+    """
+    registry = _metrics_registry()
+    entry = registry.setdefault(operation, {'chamadas': 0, 'duracoes': deque(maxlen=METRICS_WINDOW)})
+    entry['chamadas'] += 1
+    entry['duracoes'].append(duration_ms)
+
+    logger.info(json.dumps({'operacao': operation, 'ms': round(duration_ms, 2), **context},
+                           ensure_ascii=False, default=str))
+
+
+@contextmanager
+def timed(operation: str, **context: Any) -> Iterator[None]:
+    """Mede o bloco 'with' e regista a duração (também quando há exceção).
+
+    Args:
+        operation (str): Nome da operação
+        **context: Campos adicionais para o log
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        context['erro'] = True
+        raise
+    finally:
+        record_timing(operation, (time.perf_counter() - inicio) * 1000, **context)
+
+
+def timed_function(operation: Optional[str] = None) -> Callable:
+    """Decorador que mede cada chamada da função.
+
+    Args:
+        operation (Optional[str]): Nome da operação (por omissão, módulo.função)
+
+    Returns:
+        Callable: Decorador
+    """
+    def decorator(func: Callable) -> Callable:
+        nome = operation or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(nome):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_run(duration_ms: float, pagina: str) -> None:
+    """Regista a duração de uma execução completa do script.
+
+    A primeira execução do processo é também registada como 'app.arranque'.
+
+    Args:
+        duration_ms (float): Duração da execução em milissegundos
+        pagina (str): Página mostrada
+    """
+    info = _process_info()
+    if not info['arranque_registado']:
+        info['arranque_registado'] = True
+        record_timing("app.arranque", duration_ms, pagina=pagina,
+                      desde_inicio_processo_s=round(time.time() - info['inicio'], 2))
+    record_timing("app.execucao", duration_ms, pagina=pagina)
+
+
+def get_timing_report() -> pd.DataFrame:
+    """Percentis das durações de cada operação medida nesta instância.
+
+    Returns:
+        pd.DataFrame: Uma linha por operação com chamadas, p50, p95 e máximo
+        (ms) das medições mais recentes
+    """
+    linhas = []
+    for operation, entry in sorted(_metrics_registry().items()):
+        duracoes = pd.Series(list(entry['duracoes']), dtype=float)
+        linhas.append({
+            'Operação': operation,
+            'Chamadas': entry['chamadas'],
+            'p50 (ms)': round(duracoes.quantile(0.5), 1),
+            'p95 (ms)': round(duracoes.quantile(0.95), 1),
+            'Máx. (ms)': round(duracoes.max(), 1),
+        })
+    return pd.DataFrame(linhas, columns=['Operação', 'Chamadas', 'p50 (ms)', 'p95 (ms)', 'Máx. (ms)'])
@@ -0,0 +1,119 @@
+"""Lazy Page Registry
+
+The sections of the application are imported only when they are first
+displayed, instead of all at start-up. Imported modules stay resident in
+sys.modules, so later navigation costs nothing. The time each module took to
+import the first time is kept per process for the import-time report.
+"""
+
+import importlib
+import sys
+import time
+from types import ModuleType
+from typing import Any, Dict
+
+import pandas as pd
+import streamlit as st
+
+from utils.metrics import timed
+from utils.prefetch import prefetch_sheets
+from utils.sheets import api_section
+from utils.profiling import profiling_enabled, run_profiled
+from utils.state import enter_page
+
+
+# Página do menu -> (módulo da secção, ícone Bootstrap do menu)
+PAGES = {
+    "Disciplinas": ("secoes.disciplinas", "book"),
+    "Utentes": ("secoes.utentes", "people"),
+    "Turmas": ("secoes.turmas", "building-gear"),
+    "Inscrições": ("secoes.inscricoes", "journal-check"),
+    "Horários": ("secoes.horarios", "calendar3"),
+    "Professores": ("secoes.professores", "person-badge"),
+    "Auditoria": ("secoes.auditoria", "clipboard-check"),
+    "Diagnóstico": ("secoes.diagnostico", "speedometer2"),
+}
+
+# Página -> folhas lidas com cache (get_sheet_data) ao abri-la
+PAGE_SHEETS = {
+    "Utentes": ["Utentes"],
+    "Turmas": ["Turmas", "Disciplinas", "Professores"],
+    "Inscrições": ["Utentes", "Turmas", "Inscricoes"],
+    "Horários": ["Turmas", "Inscricoes", "Utentes"],
+    "Professores": ["Professores"],
+}
+
+# Página -> páginas que costumam ser abertas a seguir (as folhas destas são pré-carregadas)
+NEXT_PAGES = {
+    "Disciplinas": ["Turmas"],
+    "Professores": ["Turmas"],
+    "Turmas": ["Horários", "Inscrições"],
+    "Utentes": ["Inscrições"],
+    "Inscrições": ["Horários"],
+    "Horários": ["Inscrições"],
+}
+
+
+@st.cache_resource
+def _import_registry() -> Dict[str, Dict[str, Any]]:
+    """Shared registry of first-import timings (module name -> info)."""
+    return {}
+
+
+def load_module(module_name: str) -> ModuleType:
+    """Importa um módulo na primeira utilização, registando quanto demorou.
+
+    O tempo inclui as dependências que ainda não estavam carregadas.
+
+    Args:
+        module_name (str): Nome do módulo (ex.: 'secoes.turmas')
+
+    Returns:
+        ModuleType: Módulo importado
+    """
+    registry = _import_registry()
+    if module_name in sys.modules and module_name in registry:
+        return sys.modules[module_name]
+
+    ja_carregado = module_name in sys.modules
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(module_name)
+    registry.setdefault(module_name, {
+        'Importação (ms)': round((time.perf_counter() - inicio) * 1000, 1),
+        'Já carregado': ja_carregado,
+    })
+    return modulo
+
+
+def render_page(nome: str) -> None:
+    """Carrega (se necessário) e renderiza uma página do menu.
+
+    Ao mudar de página, o estado da página anterior é limpo (ver utils.state).
+
+    Args:
+        nome (str): Chave de PAGES
+    """
+    enter_page(nome)
+    modulo = load_module(PAGES[nome][0])
+    with timed("pagina.render", pagina=nome), api_section(nome):
+        if profiling_enabled():
+            run_profiled(modulo.mostrar_pagina, nome)
+        else:
+            modulo.mostrar_pagina()
+
+    # Folhas das próximas páginas prováveis, lidas em segundo plano depois de a página estar pronta
+    prefetch_sheets(folha for pagina in NEXT_PAGES.get(nome, []) for folha in PAGE_SHEETS.get(pagina, []))
+
+
+def get_import_report() -> pd.DataFrame:
+    """Tempo da primeira importação de cada módulo carregado nesta instância.
+
+    Returns:
+        pd.DataFrame: Uma linha por módulo, do mais lento para o mais rápido
+    """
+    registry = _import_registry()
+    report = pd.DataFrame(
+        [{'Módulo': nome, **info} for nome, info in registry.items()],
+        columns=['Módulo', 'Importação (ms)', 'Já carregado']
+    )
+    return report.sort_values('Importação (ms)', ascending=False, ignore_index=True)
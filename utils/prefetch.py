@@ -0,0 +1,88 @@
+"""Background Prefetch of Related Worksheets
+
+After a page is rendered, the worksheets of the pages usually opened next
+(see utils.pages.NEXT_PAGES) are read in a background thread, so opening
+them does not wait for the Sheets API. Only sheets that are not in the cache
+are read, and only while the requests of the last minute leave room in the
+API quota for the users' own requests. The records are handed to utils.crud,
+which uses them on the next cache miss of the sheet if it has not changed
+in the meantime.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+import streamlit as st
+
+from utils.crud import get_sheet_generation, has_prefetched_records, is_sheet_cached, store_prefetched_records
+from utils.metrics import logger, timed
+from utils.sheets import api_section, get_quota_status, get_worksheet
+
+
+# Fração da quota por minuto que o pré-carregamento pode ocupar
+PREFETCH_QUOTA_RATIO = 0.5
+
+# Secção a que são atribuídos os pedidos à API do pré-carregamento
+SECAO_PREFETCH = "Pré-carregamento"
+
+
+@st.cache_resource
+def _prefetch_registry() -> Dict[str, Any]:
+    """Thread de pré-carregamento (partilhada) e folhas a ser lidas."""
+    return {'lock': threading.Lock(),
+            'executor': ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch"),
+            'em_curso': set()}
+
+
+def _ler_folha(sheet, sheet_name: str, generation: int) -> None:
+    """Lê a folha na thread de pré-carregamento (sem chamadas ao Streamlit)."""
+    registry = _prefetch_registry()
+    try:
+        with api_section(SECAO_PREFETCH), timed("sheets.prefetch", folha=sheet_name):
+            records = sheet.get_all_records()
+        store_prefetched_records(sheet_name, records, generation)
+    except Exception as e:
+        logger.warning(f"Pré-carregamento da folha {sheet_name} falhou: {e}")
+    finally:
+        with registry['lock']:
+            registry['em_curso'].discard(sheet_name)
+
+
+def prefetch_sheets(sheet_names: Iterable[str]) -> List[str]:
+    """Lê em segundo plano as folhas indicadas que ainda não estão em cache.
+
+    Cada folha gasta um pedido à API; só são lidas as que cabem na fração
+    PREFETCH_QUOTA_RATIO da quota por minuto ainda livre.
+
+    Args:
+        sheet_names (Iterable[str]): Folhas a pré-carregar, por ordem de prioridade
+
+    Returns:
+        List[str]: Folhas cuja leitura foi agendada
+    """
+    registry = _prefetch_registry()
+    quota = get_quota_status()
+    disponiveis = int(quota['limite'] * PREFETCH_QUOTA_RATIO) - quota['usados']
+    if disponiveis <= 0:
+        return []
+
+    with registry['lock']:
+        a_ler = [nome for nome in dict.fromkeys(sheet_names)
+                 if nome not in registry['em_curso']
+                 and not is_sheet_cached(nome) and not has_prefetched_records(nome)][:disponiveis]
+        registry['em_curso'].update(a_ler)
+
+    agendadas = []
+    for nome in a_ler:
+        # A worksheet e a geração são obtidas aqui, na thread do script
+        try:
+            sheet = get_worksheet(nome)
+        except Exception as e:
+            logger.warning(f"Pré-carregamento da folha {nome} falhou: {e}")
+            with registry['lock']:
+                registry['em_curso'].discard(nome)
+            continue
+        registry['executor'].submit(_ler_folha, sheet, nome, get_sheet_generation(nome))
+        agendadas.append(nome)
+    return agendadas
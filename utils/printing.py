@@ -0,0 +1,278 @@
+"""Printable Timetables and Class Rosters
+
+This module renders print-ready documents from the Horários data: the weekly
+timetable (global, per professor or per sala) and the roster of a turma, as a
+self-contained HTML page (A4, ready for the browser's print dialog) or as a PDF
+when reportlab (in requirements.txt) is installed. Rendered documents are cached per data generation,
+so repeated downloads of the same document are served without rendering again.
+"""
+
+import html
+import importlib.util
+import io
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+import streamlit as st
+
+from utils.crud import get_sheet_data, get_sheet_generation
+from utils.enrollments import INSCRICOES_SHEET, get_enrollment_index
+from utils.schema import DATE_FORMAT
+from utils.timetable import get_timetable_for_generation, get_weekly_timetable
+from utils.validation import DIAS_SEMANA
+
+
+# Formatos de impressão: formato -> (extensão, tipo MIME)
+PRINT_FORMATS = {
+    'HTML': ('html', 'text/html'),
+    'PDF': ('pdf', 'application/pdf'),
+}
+
+# Títulos das vistas imprimíveis do horário (None = horário geral)
+PRINT_VIEWS = {
+    None: "Horário semanal",
+    'professor': "Horário do professor",
+    'sala': "Horário da sala",
+}
+
+_PRINT_CSS = """
+@page { size: A4 landscape; margin: 12mm; }
+body { font-family: Arial, Helvetica, sans-serif; color: #222; font-size: 11px; }
+h1 { font-size: 18px; margin: 0 0 4px 0; }
+p.sub { margin: 0 0 10px 0; color: #555; }
+table { width: 100%; border-collapse: collapse; page-break-inside: auto; }
+tr { page-break-inside: avoid; }
+th, td { border: 1px solid #999; padding: 4px 6px; vertical-align: top; text-align: left; }
+th { background: #e8edf3; }
+.aula { margin-bottom: 6px; }
+.aula strong { display: block; }
+td.assinatura { width: 35%; }
+"""
+
+
+def print_formats() -> List[str]:
+    """Formatos de impressão disponíveis (PDF só com reportlab instalado)."""
+    formatos = ['HTML']
+    if importlib.util.find_spec('reportlab') is not None:
+        formatos.append('PDF')
+    return formatos
+
+
+def _pagina_html(titulo: str, subtitulo: str, corpo: str) -> str:
+    """Documento HTML completo e autónomo, pronto a imprimir."""
+    return (
+        '<!DOCTYPE html><html lang="pt"><head><meta charset="utf-8">'
+        f'<title>{html.escape(titulo)}</title><style>{_PRINT_CSS}</style></head><body>'
+        f'<h1>{html.escape(titulo)}</h1><p class="sub">{html.escape(subtitulo)}</p>'
+        f'{corpo}</body></html>'
+    )
+
+
+def _dias_impressos(dias: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """Dias a imprimir: segunda a sábado, e domingo só se tiver aulas."""
+    return [dia for dia in DIAS_SEMANA if dia != "Domingo" or dias.get(dia)]
+
+
+def _gerado_em() -> str:
+    return f"Gerado em {date.today().strftime(DATE_FORMAT)}"
+
+
+# ===== HORÁRIO =====
+
+def timetable_html(titulo: str, dias: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Documento HTML do horário semanal, com uma coluna por dia.
+
+    Args:
+        titulo (str): Título do documento
+        dias (Dict[str, List[Dict[str, Any]]]): Entradas do horário por dia
+
+    Returns:
+        str: Documento HTML
+    """
+    colunas = _dias_impressos(dias)
+    cabecalho = ''.join(f'<th>{html.escape(dia)}</th>' for dia in colunas)
+    celulas = []
+    for dia in colunas:
+        aulas = ''.join(
+            '<div class="aula">'
+            f'<strong>{html.escape(e["inicio"])} - {html.escape(e["fim"])} · {html.escape(e["nome"])}</strong>'
+            f'{html.escape(e["disciplina"])}<br>{html.escape(e["professor"])} · {html.escape(e["sala"])}'
+            '</div>'
+            for e in dias.get(dia, [])
+        )
+        celulas.append(f'<td>{aulas or "<em>Sem aulas</em>"}</td>')
+    corpo = f'<table><thead><tr>{cabecalho}</tr></thead><tbody><tr>{"".join(celulas)}</tr></tbody></table>'
+    return _pagina_html(titulo, _gerado_em(), corpo)
+
+
+def timetable_pdf(titulo: str, dias: Dict[str, List[Dict[str, Any]]]) -> bytes:
+    """Documento PDF do horário semanal (requer reportlab).
+
+    Cada linha da tabela tem a n-ésima aula de cada dia, para que horários
+    longos possam continuar na página seguinte.
+
+    Args:
+        titulo (str): Título do documento
+        dias (Dict[str, List[Dict[str, Any]]]): Entradas do horário por dia
+
+    Returns:
+        bytes: Conteúdo do PDF
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    estilos = getSampleStyleSheet()
+    celula = estilos['BodyText'].clone('celula', fontSize=8, leading=10)
+    colunas = _dias_impressos(dias)
+    linhas = max([len(dias.get(dia, [])) for dia in colunas] + [1])
+
+    dados = [[Paragraph(f'<b>{html.escape(dia)}</b>', celula) for dia in colunas]]
+    for i in range(linhas):
+        linha = []
+        for dia in colunas:
+            entradas = dias.get(dia, [])
+            if i < len(entradas):
+                e = entradas[i]
+                texto = (f'<b>{html.escape(e["inicio"])} - {html.escape(e["fim"])}</b><br/>'
+                         f'{html.escape(e["nome"])} · {html.escape(e["disciplina"])}<br/>'
+                         f'{html.escape(e["professor"])} · {html.escape(e["sala"])}')
+            else:
+                texto = '<i>Sem aulas</i>' if i == 0 and not entradas else ''
+            linha.append(Paragraph(texto, celula))
+        dados.append(linha)
+
+    buffer = io.BytesIO()
+    documento = SimpleDocTemplate(buffer, pagesize=landscape(A4), title=titulo,
+                                  leftMargin=12 * mm, rightMargin=12 * mm, topMargin=12 * mm, bottomMargin=12 * mm)
+    tabela = Table(dados, repeatRows=1, colWidths=[documento.width / len(colunas)] * len(colunas))
+    tabela.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e8edf3')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    documento.build([Paragraph(html.escape(titulo), estilos['Title']),
+                     Paragraph(_gerado_em(), estilos['Normal']), tabela])
+    return buffer.getvalue()
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _documento_horario(geracao: int, vista: Any, grupo: str, formato: str) -> bytes:
+    """Documento do horário para uma geração dos dados das turmas."""
+    horario = get_timetable_for_generation(geracao)
+    if vista is not None:
+        horario = horario['vistas'][vista][grupo]
+    titulo = PRINT_VIEWS[vista] + (f" — {grupo}" if vista is not None else "")
+    if formato == 'PDF':
+        return timetable_pdf(titulo, horario['dias'])
+    return timetable_html(titulo, horario['dias']).encode('utf-8')
+
+
+def get_timetable_document(vista: Any, grupo: str, formato: str) -> bytes:
+    """Devolve o documento imprimível de um horário, em cache por geração das turmas.
+
+    Args:
+        vista: Chave de PRINT_VIEWS (None para o horário geral)
+        grupo (str): Professor ou sala (ignorado no horário geral)
+        formato (str): Chave de PRINT_FORMATS
+
+    Returns:
+        bytes: Conteúdo do documento
+    """
+    get_weekly_timetable()  # garante que a geração corresponde aos dados em cache
+    return _documento_horario(get_sheet_generation("Turmas"), vista, grupo if vista else "", formato)
+
+
+# ===== LISTA DE INSCRITOS =====
+
+def _dados_lista(id_turma: str) -> Tuple[str, str, List[Tuple[str, str]]]:
+    """Título, descrição e (nome, contacto) dos inscritos de uma turma."""
+    indice = get_enrollment_index()
+    utentes = get_sheet_data("Utentes", include_pending=False)
+    if not utentes.empty and 'ID' in utentes.columns:
+        utentes = utentes.set_axis(utentes['ID'].astype(str).str.strip().tolist())
+        utentes = utentes[~utentes.index.duplicated()]
+
+    turma = indice.turmas.loc[id_turma]
+    titulo = f"Lista de inscritos — {turma.get('Nome turma', id_turma)}"
+    descricao = (f"{turma.get('Disciplina', '')} · {turma.get('Professor', '')} · "
+                 f"{turma.get('Dia da Semana', '')} {turma.get('Hora de Inicio', '')}-{turma.get('Hora de Fim', '')} · "
+                 f"{turma.get('Sala', '')} · {indice.ocupadas(id_turma)}/{indice.vagas.get(id_turma, 0)} vagas")
+
+    inscritos = []
+    for id_utente in indice.roster(id_turma):
+        if id_utente in utentes.index:
+            utente = utentes.loc[id_utente]
+            inscritos.append((str(utente.get('Nome', id_utente)), str(utente.get('Contacto_telefónico', ''))))
+        else:
+            inscritos.append((id_utente, ''))
+    inscritos.sort(key=lambda inscrito: inscrito[0].lower())
+    return titulo, descricao, inscritos
+
+
+def roster_html(titulo: str, descricao: str, inscritos: List[Tuple[str, str]]) -> str:
+    """Documento HTML da lista de inscritos de uma turma, com coluna para assinatura."""
+    linhas = ''.join(
+        f'<tr><td>{i}</td><td>{html.escape(nome)}</td><td>{html.escape(contacto)}</td><td class="assinatura"></td></tr>'
+        for i, (nome, contacto) in enumerate(inscritos, start=1)
+    ) or '<tr><td colspan="4"><em>Sem inscritos</em></td></tr>'
+    corpo = ('<table><thead><tr><th>Nº</th><th>Nome</th><th>Contacto</th><th>Assinatura</th></tr></thead>'
+             f'<tbody>{linhas}</tbody></table>')
+    return _pagina_html(titulo, f"{descricao} · {_gerado_em()}", corpo)
+
+
+def roster_pdf(titulo: str, descricao: str, inscritos: List[Tuple[str, str]]) -> bytes:
+    """Documento PDF da lista de inscritos de uma turma (requer reportlab)."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    estilos = getSampleStyleSheet()
+    dados = [['Nº', 'Nome', 'Contacto', 'Assinatura']]
+    dados += [[str(i), nome, contacto, ''] for i, (nome, contacto) in enumerate(inscritos, start=1)]
+    if not inscritos:
+        dados.append(['', 'Sem inscritos', '', ''])
+
+    buffer = io.BytesIO()
+    documento = SimpleDocTemplate(buffer, pagesize=A4, title=titulo,
+                                  leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm)
+    largura = documento.width
+    tabela = Table(dados, repeatRows=1, colWidths=[0.08 * largura, 0.42 * largura, 0.2 * largura, 0.3 * largura],
+                   rowHeights=[None] + [9 * mm] * (len(dados) - 1))
+    tabela.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e8edf3')),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    documento.build([Paragraph(html.escape(titulo), estilos['Title']),
+                     Paragraph(html.escape(f"{descricao} · {_gerado_em()}"), estilos['Normal']), tabela])
+    return buffer.getvalue()
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _documento_lista(geracoes: Tuple[int, int, int], id_turma: str, formato: str) -> bytes:
+    """Lista de inscritos para uma combinação de gerações (Turmas, Inscrições, Utentes)."""
+    titulo, descricao, inscritos = _dados_lista(id_turma)
+    if formato == 'PDF':
+        return roster_pdf(titulo, descricao, inscritos)
+    return roster_html(titulo, descricao, inscritos).encode('utf-8')
+
+
+def get_roster_document(id_turma: str, formato: str) -> bytes:
+    """Devolve a lista de inscritos imprimível de uma turma, em cache por geração dos dados.
+
+    Args:
+        id_turma (str): ID da turma
+        formato (str): Chave de PRINT_FORMATS
+
+    Returns:
+        bytes: Conteúdo do documento
+    """
+    get_enrollment_index()
+    get_sheet_data("Utentes")
+    geracoes = tuple(get_sheet_generation(nome) for nome in ("Turmas", INSCRICOES_SHEET, "Utentes"))
+    return _documento_lista(geracoes, id_turma, formato)
@@ -0,0 +1,141 @@
+"""Built-in Profiling of Section Pages
+
+When profiling is switched on for a session, the page being displayed runs
+under pyinstrument (if installed) or cProfile, and the hot functions are
+shown below the page. It is switched on from the Diagnóstico page or with the
+query parameter '?perfil=1', and only for sessions that have unlocked the
+Diagnóstico page, so production data can be profiled without external tools.
+"""
+
+import cProfile
+import importlib.util
+import io
+import marshal
+import pstats
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+
+# Sessão com acesso às ferramentas de administração (página Diagnóstico)
+ADMIN_ACCESS_KEY = 'diagnostico_autorizado'
+PROFILING_KEY = 'perfil_ativo'
+PROFILING_QUERY_PARAM = 'perfil'
+
+# Número de funções mostradas no relatório do cProfile
+PROFILE_TOP_FUNCTIONS = 30
+
+_RAIZ_PROJETO = str(Path(__file__).resolve().parent.parent)
+
+
+def pyinstrument_available() -> bool:
+    """Indica se o pyinstrument (opcional) está instalado."""
+    return importlib.util.find_spec('pyinstrument') is not None
+
+
+def profiling_enabled() -> bool:
+    """Indica se a página atual deve ser perfilada nesta sessão.
+
+    Returns:
+        bool: True se a sessão é de administração e o perfil foi ativado pelo
+        interruptor ou pelo parâmetro '?perfil=1'
+    """
+    if not st.session_state.get(ADMIN_ACCESS_KEY):
+        return False
+    return bool(st.session_state.get(PROFILING_KEY)) or st.query_params.get(PROFILING_QUERY_PARAM) == '1'
+
+
+def _nome_funcao(chave) -> str:
+    """Descrição legível de uma função do pstats (ficheiro:linha(função))."""
+    ficheiro, linha, funcao = chave
+    if ficheiro.startswith(_RAIZ_PROJETO):
+        ficheiro = ficheiro[len(_RAIZ_PROJETO) + 1:]
+    elif 'site-packages' in ficheiro:
+        ficheiro = ficheiro.split('site-packages', 1)[1].lstrip('/\\')
+    return f"{ficheiro}:{linha}({funcao})" if linha else funcao
+
+
+def profile_stats_frame(stats: pstats.Stats, top: int = PROFILE_TOP_FUNCTIONS) -> pd.DataFrame:
+    """Funções com maior tempo acumulado de um perfil do cProfile.
+
+    Args:
+        stats (pstats.Stats): Estatísticas do perfil
+        top (int): Número de funções devolvidas
+
+    Returns:
+        pd.DataFrame: Função, chamadas, tempo próprio e acumulado (ms) e se a
+        função é código da aplicação
+    """
+    linhas = [{
+        'Função': _nome_funcao(chave),
+        'Chamadas': chamadas,
+        'Tempo próprio (ms)': round(proprio * 1000, 2),
+        'Tempo acumulado (ms)': round(acumulado * 1000, 2),
+        'Aplicação': chave[0].startswith(_RAIZ_PROJETO),
+    } for chave, (_, chamadas, proprio, acumulado, _) in stats.stats.items()]
+    df = pd.DataFrame(linhas, columns=['Função', 'Chamadas', 'Tempo próprio (ms)', 'Tempo acumulado (ms)', 'Aplicação'])
+    return df.nlargest(top, 'Tempo acumulado (ms)').reset_index(drop=True)
+
+
+def _iniciar(start: Callable[[], None], render: Callable[[], None]) -> bool:
+    """Inicia um perfilador; se outro já estiver ativo, mostra a página sem perfil."""
+    try:
+        start()
+        return True
+    except (ValueError, RuntimeError) as e:
+        # Python 3.12+: só pode haver um perfilador ativo de cada vez no processo
+        st.warning(f"Não foi possível perfilar a página: {e}")
+        render()
+        return False
+
+
+def _perfil_pyinstrument(render: Callable[[], None], nome: str) -> None:
+    """Executa a página com o pyinstrument e mostra a árvore de chamadas."""
+    from pyinstrument import Profiler
+
+    profiler = Profiler()
+    if not _iniciar(profiler.start, render):
+        return
+    try:
+        render()
+    finally:
+        profiler.stop()
+        with st.expander(f"🔬 Perfil da página {nome} (pyinstrument)", expanded=True):
+            components.html(profiler.output_html(), height=600, scrolling=True)
+
+
+def _perfil_cprofile(render: Callable[[], None], nome: str) -> None:
+    """Executa a página com o cProfile e mostra as funções mais pesadas."""
+    profiler = cProfile.Profile()
+    if not _iniciar(profiler.enable, render):
+        return
+    try:
+        render()
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        with st.expander(f"🔬 Perfil da página {nome} (cProfile)", expanded=True):
+            st.caption(f"Total: {stats.total_tt * 1000:.1f} ms em {stats.total_calls} chamadas. "
+                       f"As {PROFILE_TOP_FUNCTIONS} funções com maior tempo acumulado:")
+            st.dataframe(profile_stats_frame(stats), hide_index=True, use_container_width=True)
+            st.download_button("📥 Descarregar perfil (.prof)", data=marshal.dumps(stats.stats),
+                               file_name=f"perfil_{nome}.prof", mime="application/octet-stream",
+                               help="Pode ser aberto com pstats ou snakeviz")
+
+
+def run_profiled(render: Callable[[], None], nome: str) -> None:
+    """Executa a renderização de uma página sob um perfilador e mostra o resultado.
+
+    Usa o pyinstrument se estiver instalado; caso contrário, o cProfile.
+
+    Args:
+        render (Callable[[], None]): Função que renderiza a página
+        nome (str): Nome da página
+    """
+    if pyinstrument_available():
+        _perfil_pyinstrument(render, nome)
+    else:
+        _perfil_cprofile(render, nome)
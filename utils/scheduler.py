@@ -0,0 +1,158 @@
+"""Batch Timetable Scheduler
+
+This module places a batch of new turmas into the existing weekly timetable
+without conflicts. Each turma to place is a variable whose domain holds the
+(day, sala, start) candidates that are free for its professor and room in the
+free-interval index of utils.timetable. A backtracking search picks the most
+constrained turma first (MRV) and prunes the domains of the remaining ones
+after each choice (forward checking), within a time budget. Turmas that
+cannot fit alongside the others are left unplaced, so the search keeps the
+assignment that places the most turmas.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.timetable import free_intervals, intersect
+from utils.validation import DIAS_SEMANA
+
+
+# Candidato: (dia, sala, início, fim) em minutos
+Candidate = Tuple[str, str, int, int]
+
+
+class TurmaRequest:
+    """A turma to be placed by the batch scheduler.
+
+    Attributes:
+        nome (str): Nome da turma
+        disciplina (str): Disciplina
+        professor (str): Professor
+        duracao (int): Duração da aula em minutos
+        dias_preferidos (List[str]): Dias preferidos (preferência, não obrigatório)
+        salas_preferidas (List[str]): Salas preferidas (preferência, não obrigatório)
+        dados (Dict[str, Any]): Restantes campos da turma (vagas, nível, ...)
+    """
+
+    def __init__(self,
+                 nome: str,
+                 disciplina: str,
+                 professor: str,
+                 duracao: int,
+                 dias_preferidos: Optional[List[str]] = None,
+                 salas_preferidas: Optional[List[str]] = None,
+                 dados: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.disciplina = disciplina
+        self.professor = professor
+        self.duracao = duracao
+        self.dias_preferidos = dias_preferidos or []
+        self.salas_preferidas = salas_preferidas or []
+        self.dados = dados or {}
+
+
+class _TimeBudgetExceeded(Exception):
+    """Interrompe a pesquisa quando o tempo disponível se esgota."""
+
+
+def _candidates(index: Dict[str, Any],
+                request: TurmaRequest,
+                salas: List[str],
+                step: int) -> List[Candidate]:
+    """Gera os candidatos livres de uma turma, ordenados por preferência."""
+    ranked = []
+    for ordem_dia, dia in enumerate(DIAS_SEMANA):
+        livres_prof = free_intervals(index, ('professor', request.professor), dia)
+        for sala in salas:
+            livres = livres_prof if sala == "Outro" else intersect(livres_prof, free_intervals(index, ('sala', sala), dia))
+            for start, end in livres:
+                inicio = -(-start // step) * step
+                while inicio + request.duracao <= end:
+                    chave = (dia not in request.dias_preferidos,
+                             sala not in request.salas_preferidas,
+                             ordem_dia, inicio)
+                    ranked.append((chave, (dia, sala, inicio, inicio + request.duracao)))
+                    inicio += step
+    ranked.sort(key=lambda c: c[0])
+    return [candidate for _, candidate in ranked]
+
+
+def _compatible(a: Candidate, req_a: TurmaRequest, b: Candidate, req_b: TurmaRequest) -> bool:
+    """Verifica se duas turmas do lote podem ficar nos candidatos indicados."""
+    if a[0] != b[0] or not (a[2] < b[3] and b[2] < a[3]):
+        return True
+    if req_a.professor == req_b.professor:
+        return False
+    return a[1] == "Outro" or a[1] != b[1]
+
+
+def solve_schedule(index: Dict[str, Any],
+                   requests: List[TurmaRequest],
+                   salas: List[str],
+                   time_budget: float = 2.0,
+                   step: int = 30) -> Dict[str, Any]:
+    """Atribui dia, sala e hora a um lote de turmas sem conflitos.
+
+    Args:
+        index (Dict[str, Any]): Índice de utils.timetable.build_free_interval_index
+        requests (List[TurmaRequest]): Turmas a colocar
+        salas (List[str]): Salas que podem ser usadas
+        time_budget (float): Tempo máximo de pesquisa em segundos
+        step (int): Granularidade das horas de início em minutos
+
+    Returns:
+        Dict[str, Any]: 'atribuicoes' (posição do pedido -> candidato),
+        'por_colocar' (posições sem solução), 'completo' (bool) e
+        'tempo_esgotado' (bool)
+    """
+    deadline = time.monotonic() + time_budget
+    domains = {i: _candidates(index, req, salas, step) for i, req in enumerate(requests)}
+    impossiveis = [i for i, dominio in domains.items() if not dominio]
+    pendentes = {i: dominio for i, dominio in domains.items() if dominio}
+
+    melhor: Dict[int, Candidate] = {}
+    atual: Dict[int, Candidate] = {}
+
+    def pesquisar(dominios: Dict[int, List[Candidate]]) -> bool:
+        nonlocal melhor
+        if time.monotonic() > deadline:
+            raise _TimeBudgetExceeded()
+        if len(atual) > len(melhor):
+            melhor = dict(atual)
+        if not dominios:
+            return len(atual) == len(pendentes)
+        # Nem colocando todas as restantes se ultrapassa a melhor solução parcial
+        if len(atual) + len(dominios) <= len(melhor):
+            return False
+
+        # MRV: a turma com menos candidatos restantes primeiro
+        escolhida = min(dominios, key=lambda k: len(dominios[k]))
+        restantes = {k: v for k, v in dominios.items() if k != escolhida}
+        req = requests[escolhida]
+        for candidato in dominios[escolhida]:
+            # Forward checking: remover dos outros os candidatos incompatíveis;
+            # as turmas que ficam sem candidatos ficam por colocar neste ramo
+            podados = {
+                k: [c for c in v if _compatible(candidato, req, c, requests[k])]
+                for k, v in restantes.items()
+            }
+            atual[escolhida] = candidato
+            if pesquisar({k: v for k, v in podados.items() if v}):
+                return True
+            del atual[escolhida]
+        # Deixar esta turma por colocar, para que as outras possam caber
+        return pesquisar(restantes)
+
+    tempo_esgotado = False
+    try:
+        completo = pesquisar(pendentes) and not impossiveis
+    except _TimeBudgetExceeded:
+        tempo_esgotado = True
+        completo = False
+
+    return {
+        'atribuicoes': melhor,
+        'por_colocar': [i for i in range(len(requests)) if i not in melhor],
+        'completo': completo,
+        'tempo_esgotado': tempo_esgotado,
+    }
@@ -0,0 +1,290 @@
+"""Column Schemas for Google Sheet Worksheets
+
+This module declares the expected column types of each worksheet and converts
+the raw records returned by gspread into typed DataFrames once, at load time,
+so that sections work with dates, numbers and categories directly instead of
+re-parsing strings on every render.
+"""
+
+from datetime import date, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.validation import (
+    DIAS_SEMANA,
+    ESTADO_INSCRICAO_OPCOES,
+    ESTADO_OPCOES,
+    ESTADO_UTENTE_OPCOES,
+    GRAU_ESCOLARIDADE_OPCOES,
+    NIVEL_OPCOES,
+    SALA_OPCOES,
+    SITUACAO_PROFISSIONAL_OPCOES
+)
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:  # pragma: no cover - pyarrow vem com o streamlit
+    STRING_DTYPE = pd.StringDtype()
+
+
+# Colunas derivadas (minutos desde a meia-noite) acrescentadas às horas das turmas.
+# Começam por '_' para nunca serem escritas de volta na folha.
+INICIO_MIN = '_inicio_min'
+FIM_MIN = '_fim_min'
+
+DATE_FORMAT = '%d/%m/%Y'
+
+# Chave de DataFrame.attrs com as células preenchidas que não puderam ser convertidas
+INVALID_VALUES_ATTR = 'invalid_values'
+
+
+class ColumnSpec:
+    """Type specification for a worksheet column.
+
+    Attributes:
+        kind (str): One of 'string', 'date', 'time', 'int', 'float', 'category'
+        options (List[str]): Known categories for 'category' columns (values
+            outside the list are kept as extra categories)
+        ordered (bool): Whether the categories have a meaningful order
+        date_format (str): Format of 'date' columns in the sheet
+        minutes_column (Optional[str]): Derived column with minutes since
+            midnight for 'time' columns
+    """
+
+    def __init__(self,
+                 kind: str = 'string',
+                 options: Optional[List[str]] = None,
+                 ordered: bool = False,
+                 date_format: str = DATE_FORMAT,
+                 minutes_column: Optional[str] = None):
+        self.kind = kind
+        self.options = options or []
+        self.ordered = ordered
+        self.date_format = date_format
+        self.minutes_column = minutes_column
+
+
+SHEET_SCHEMAS: Dict[str, Dict[str, ColumnSpec]] = {
+    "Utentes": {
+        'ID': ColumnSpec('string'),
+        'Data_de_nascimento': ColumnSpec('date'),
+        'Contacto_telefónico': ColumnSpec('string'),
+        'Contacto_telefónico_2': ColumnSpec('string'),
+        'Codigo_Postal': ColumnSpec('string'),
+        'CC_Validade': ColumnSpec('date'),
+        'NIF': ColumnSpec('string'),
+        'NISS': ColumnSpec('string'),
+        'Telefone_Familiar': ColumnSpec('string'),
+        'Grau_Escolaridade': ColumnSpec('category', GRAU_ESCOLARIDADE_OPCOES),
+        'Situacao_Profissional': ColumnSpec('category', SITUACAO_PROFISSIONAL_OPCOES),
+        'Data de inscrição': ColumnSpec('date'),
+        'Estado': ColumnSpec('category', ESTADO_UTENTE_OPCOES),
+    },
+    "Professores": {
+        'ID_professor': ColumnSpec('string'),
+        'Telefone': ColumnSpec('string'),
+        'NIB': ColumnSpec('string'),
+        'Valor Hora': ColumnSpec('float'),
+    },
+    "Disciplinas": {
+        'id_disciplina': ColumnSpec('string'),
+        'Estado': ColumnSpec('category', ESTADO_OPCOES),
+        'Data de criacao': ColumnSpec('date'),
+    },
+    "Turmas": {
+        'ID_Turma': ColumnSpec('string'),
+        'Disciplina': ColumnSpec('category'),
+        'Professor': ColumnSpec('category'),
+        'Sala': ColumnSpec('category', SALA_OPCOES),
+        'Dia da Semana': ColumnSpec('category', DIAS_SEMANA, ordered=True),
+        'Hora de Inicio': ColumnSpec('time', minutes_column=INICIO_MIN),
+        'Hora de Fim': ColumnSpec('time', minutes_column=FIM_MIN),
+        'Numero de vagas': ColumnSpec('int'),
+        'Nivel': ColumnSpec('category', NIVEL_OPCOES),
+        'Estado': ColumnSpec('category', ESTADO_OPCOES),
+    },
+    "Inscricoes": {
+        'ID_Inscricao': ColumnSpec('string'),
+        'ID_Utente': ColumnSpec('string'),
+        'ID_Turma': ColumnSpec('string'),
+        'Data de inscrição': ColumnSpec('date'),
+        'Estado': ColumnSpec('category', ESTADO_INSCRICAO_OPCOES),
+    },
+}
+
+
+# ===== CONVERSÃO =====
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Convert a raw column to stripped strings, keeping blanks as ''."""
+    return series.fillna('').astype(str).str.strip()
+
+
+def _convert_column(series: pd.Series, spec: ColumnSpec) -> pd.Series:
+    """Convert a raw column according to its specification."""
+    if spec.kind == 'date':
+        return pd.to_datetime(_as_text(series), format=spec.date_format, errors='coerce')
+
+    if spec.kind == 'int':
+        return pd.to_numeric(series, errors='coerce').round().astype('Int64')
+
+    if spec.kind == 'float':
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+
+    if spec.kind == 'category':
+        values = _as_text(series)
+        extra = [v for v in pd.unique(values) if v not in spec.options]
+        return pd.Series(
+            pd.Categorical(values, categories=list(spec.options) + extra, ordered=spec.ordered),
+            index=series.index
+        )
+
+    # Texto livre e IDs: strings compactas (Arrow) em vez de objetos Python
+    return _as_text(series).astype(STRING_DTYPE)
+
+
+def time_to_minutes(series: pd.Series) -> pd.Series:
+    """Convert 'HH:MM' strings to minutes since midnight (nullable integers).
+
+    Args:
+        series (pd.Series): Column with times as text
+
+    Returns:
+        pd.Series: Minutes since midnight, <NA> where the time is invalid
+    """
+    parts = _as_text(series).str.extract(r'^(\d{1,2}):(\d{2})')
+    hours = pd.to_numeric(parts[0], errors='coerce')
+    minutes = pd.to_numeric(parts[1], errors='coerce')
+    return (hours * 60 + minutes).round().astype('Int64')
+
+
+def apply_schema(df: pd.DataFrame, sheet_name: str) -> pd.DataFrame:
+    """Apply the registered column schema of a worksheet to a raw DataFrame.
+
+    Columns without a specification are kept as-is. Derived columns (e.g.
+    minutes since midnight for times) are appended with a leading '_'. Index
+    labels of non-empty cells that could not be converted are recorded per
+    column in ``df.attrs[INVALID_VALUES_ATTR]``.
+
+    Args:
+        df (pd.DataFrame): Raw records from the worksheet
+        sheet_name (str): Name of the worksheet
+
+    Returns:
+        pd.DataFrame: Typed DataFrame
+    """
+    schema = SHEET_SCHEMAS.get(sheet_name)
+    if df.empty or not schema:
+        return df
+
+    df = df.copy()
+    invalid: Dict[str, List[Any]] = {}
+    for col, spec in schema.items():
+        if col not in df.columns:
+            continue
+        preenchido = _as_text(df[col]) != ''
+        if spec.kind == 'time':
+            df[col] = _as_text(df[col])
+            if spec.minutes_column:
+                df[spec.minutes_column] = time_to_minutes(df[col])
+                convertido = df[spec.minutes_column].notna()
+            else:
+                convertido = preenchido
+        else:
+            df[col] = _convert_column(df[col], spec)
+            convertido = df[col].notna()
+        if spec.kind in ('date', 'time', 'int', 'float'):
+            falhados = df.index[preenchido & ~convertido].tolist()
+            if falhados:
+                invalid[col] = falhados
+    df.attrs[INVALID_VALUES_ATTR] = invalid
+    return df
+
+
+def memory_usage_bytes(df: pd.DataFrame) -> int:
+    """Return the deep memory footprint of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def sheet_columns(df: pd.DataFrame) -> List[str]:
+    """Return the columns that exist in the worksheet (excluding derived ones).
+
+    Args:
+        df (pd.DataFrame): Typed sheet DataFrame
+
+    Returns:
+        List[str]: Worksheet column names in order
+    """
+    return [col for col in df.columns if not str(col).startswith('_')]
+
+
+# ===== VALORES INDIVIDUAIS =====
+
+def is_missing(value: Any) -> bool:
+    """Check whether a scalar value is missing (None, NaN, NaT or <NA>)."""
+    if value is None:
+        return True
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def to_sheet_value(value: Any, date_format: str = DATE_FORMAT) -> Any:
+    """Convert a typed value back to something that can be written to the sheet.
+
+    Args:
+        value (Any): Typed value (Timestamp, numpy number, category, ...)
+        date_format (str): Format used for dates
+
+    Returns:
+        Any: JSON-serialisable value for gspread
+    """
+    if is_missing(value):
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime(date_format)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def to_date(value: Any) -> Optional[date]:
+    """Return a typed date cell as a ``datetime.date`` (or None if missing)."""
+    if is_missing(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def format_date(value: Any, date_format: str = DATE_FORMAT) -> str:
+    """Format a typed date cell for display ('' if missing)."""
+    value = to_date(value)
+    return value.strftime(date_format) if value else ''
+
+
+def minutes_to_time(value: Any, default: Optional[time] = None) -> Optional[time]:
+    """Convert minutes since midnight to a ``datetime.time``.
+
+    Args:
+        value (Any): Minutes since midnight
+        default (Optional[time]): Value returned when minutes are missing
+
+    Returns:
+        Optional[time]: Corresponding time of day
+    """
+    if is_missing(value):
+        return default
+    minutes = int(value)
+    return time(minutes // 60 % 24, minutes % 60)
+
+
+def to_int(value: Any, default: int = 0) -> int:
+    """Return a typed integer cell as ``int`` (default if missing)."""
+    return default if is_missing(value) else int(value)
@@ -1,13 +1,209 @@
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
 import streamlit as st
 import gspread
 from google.oauth2.service_account import Credentials
+from utils.metrics import logger, timed_function
 
-def get_worksheet(sheet_name):
-    """Liga ao Google Sheets e devolve a worksheet pedida."""
+# Limite de pedidos por minuto da API do Google Sheets (por utilizador/conta de serviço)
+SHEETS_QUOTA_PER_MINUTE = 60
+# Fração do limite a partir da qual é emitido um aviso
+QUOTA_WARNING_RATIO = 0.8
+# Janela (segundos) guardada para os totais por minuto
+USAGE_WINDOW_SECONDS = 3600
+
+# Método do gspread -> tipo de operação
+OPERATION_TYPES = {
+    'get_all_records': 'read',
+    'get_all_values': 'read',
+    'get_values': 'read',
+    'get': 'read',
+    'batch_get': 'read',
+    'row_values': 'read',
+    'col_values': 'read',
+    'cell': 'read',
+    'acell': 'read',
+    'find': 'read',
+    'findall': 'read',
+    'append_row': 'append',
+    'append_rows': 'append',
+    'insert_row': 'append',
+    'insert_rows': 'append',
+    'update': 'update',
+    'update_cell': 'update',
+    'update_acell': 'update',
+    'update_cells': 'update',
+    'batch_update': 'update',
+    'format': 'update',
+    'delete_rows': 'delete',
+    'delete_columns': 'delete',
+    'clear': 'delete',
+    'batch_clear': 'delete',
+}
+
+SECAO_GERAL = "Geral"
+
+# Folhas acrescentadas pela aplicação: criadas com este cabeçalho se ainda não existirem
+DEFAULT_HEADERS: Dict[str, List[str]] = {
+    "Inscricoes": ['ID_Inscricao', 'ID_Utente', 'ID_Turma', 'Data de inscrição', 'Estado'],
+}
+
+# Secção que está a ser renderizada (para atribuir os pedidos à página de origem)
+_secao_atual: ContextVar[str] = ContextVar('secao_sheets', default=SECAO_GERAL)
+
+
+@contextmanager
+def api_section(nome: str) -> Iterator[None]:
+    """Atribui os pedidos à API feitos dentro do bloco à secção indicada."""
+    token = _secao_atual.set(nome)
+    try:
+        yield
+    finally:
+        _secao_atual.reset(token)
+
+
+@st.cache_resource
+def _usage_registry() -> Dict[str, Any]:
+    """Registo partilhado dos pedidos à API (totais e eventos recentes)."""
+    return {'lock': threading.Lock(), 'totais': Counter(), 'eventos': deque(), 'ultimo_aviso': 0.0}
+
+
+def record_api_call(folha: str, tipo: str, metodo: str) -> None:
+    """Conta um pedido à API do Google Sheets.
+
+    Args:
+        folha (str): Nome da worksheet
+        tipo (str): Tipo de operação (read/append/update/delete)
+        metodo (str): Método do gspread chamado
+    """
+    registry = _usage_registry()
+    agora = time.time()
+    secao = _secao_atual.get()
+    with registry['lock']:
+        registry['totais'][(folha, tipo, secao)] += 1
+        eventos = registry['eventos']
+        eventos.append((agora, folha, tipo, metodo, secao))
+        while eventos and eventos[0][0] < agora - USAGE_WINDOW_SECONDS:
+            eventos.popleft()
+        no_ultimo_minuto = sum(1 for evento in reversed(eventos) if evento[0] >= agora - 60)
+        avisar = (no_ultimo_minuto >= SHEETS_QUOTA_PER_MINUTE * QUOTA_WARNING_RATIO
+                  and agora - registry['ultimo_aviso'] >= 60)
+        if avisar:
+            registry['ultimo_aviso'] = agora
+    if avisar:
+        logger.warning(f"Pedidos ao Google Sheets no último minuto: {no_ultimo_minuto} "
+                       f"de {SHEETS_QUOTA_PER_MINUTE} (secção {secao}, folha {folha})")
+
+
+class CountedWorksheet:
+    """Worksheet do gspread em que cada pedido à API é contado."""
+
+    def __init__(self, worksheet: gspread.Worksheet):
+        self._worksheet = worksheet
+
+    def __getattr__(self, name: str) -> Any:
+        atributo = getattr(self._worksheet, name)
+        tipo = OPERATION_TYPES.get(name)
+        if tipo is None or not callable(atributo):
+            return atributo
+
+        def chamada(*args, **kwargs):
+            record_api_call(self._worksheet.title, tipo, name)
+            return atributo(*args, **kwargs)
+        return chamada
+
+
+@st.cache_resource
+def _spreadsheet():
+    """Autentica e abre a folha de cálculo uma vez por processo."""
     creds_dict = st.secrets["google_service_account"]
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
     client = gspread.authorize(creds)
-    sheet = client.open("Base_IPSS").worksheet(sheet_name)
-    return sheet
+    record_api_call("Base_IPSS", 'read', 'open')
+    return client.open("Base_IPSS")
+
+
+@st.cache_resource
+def _worksheet(sheet_name: str) -> gspread.Worksheet:
+    """Worksheet do gspread, obtida uma vez por processo.
+
+    As folhas de DEFAULT_HEADERS que ainda não existem são criadas com o cabeçalho.
+    """
+    record_api_call(sheet_name, 'read', 'worksheet')
+    try:
+        return _spreadsheet().worksheet(sheet_name)
+    except gspread.WorksheetNotFound:
+        cabecalho = DEFAULT_HEADERS.get(sheet_name)
+        if cabecalho is None:
+            raise
+    logger.warning(f"A folha {sheet_name} não existe: a criar com o cabeçalho {cabecalho}")
+    record_api_call(sheet_name, 'append', 'add_worksheet')
+    worksheet = _spreadsheet().add_worksheet(title=sheet_name, rows=1000, cols=len(cabecalho))
+    record_api_call(sheet_name, 'append', 'append_row')
+    worksheet.append_row(cabecalho)
+    return worksheet
+
+
+@timed_function("sheets.abrir_worksheet")
+def get_worksheet(sheet_name):
+    """Liga ao Google Sheets e devolve a worksheet pedida (com contagem de pedidos)."""
+    return CountedWorksheet(_worksheet(sheet_name))
+
+
+def get_api_usage() -> pd.DataFrame:
+    """Pedidos à API por folha, tipo de operação e secção de origem.
+
+    Returns:
+        pd.DataFrame: Totais desde o arranque e no último minuto
+    """
+    registry = _usage_registry()
+    agora = time.time()
+    with registry['lock']:
+        totais = dict(registry['totais'])
+        recentes = Counter((folha, tipo, secao) for instante, folha, tipo, _, secao in registry['eventos']
+                           if instante >= agora - 60)
+    report = pd.DataFrame(
+        [{'Folha': folha, 'Operação': tipo, 'Secção': secao,
+          'Total': total, 'Último minuto': recentes.get((folha, tipo, secao), 0)}
+         for (folha, tipo, secao), total in totais.items()],
+        columns=['Folha', 'Operação', 'Secção', 'Total', 'Último minuto']
+    )
+    return report.sort_values('Total', ascending=False, ignore_index=True)
+
+
+def get_api_usage_per_minute() -> pd.DataFrame:
+    """Pedidos à API por minuto e tipo de operação, na janela recente.
+
+    Returns:
+        pd.DataFrame: Uma linha por minuto (índice) e uma coluna por tipo
+    """
+    registry = _usage_registry()
+    with registry['lock']:
+        eventos = [(instante, tipo) for instante, _, tipo, _, _ in registry['eventos']]
+    if not eventos:
+        return pd.DataFrame()
+    df = pd.DataFrame(eventos, columns=['instante', 'tipo'])
+    df['Minuto'] = pd.to_datetime(df['instante'], unit='s', utc=True).dt.tz_convert('Europe/Lisbon').dt.floor('min')
+    return df.pivot_table(index='Minuto', columns='tipo', values='instante', aggfunc='count', fill_value=0)
+
+
+def get_quota_status() -> Dict[str, Any]:
+    """Pedidos no último minuto face ao limite da API.
 
+    Returns:
+        Dict[str, Any]: 'usados', 'limite', 'fracao' e 'alerta' (acima do limiar)
+    """
+    registry = _usage_registry()
+    agora = time.time()
+    with registry['lock']:
+        usados = sum(1 for evento in registry['eventos'] if evento[0] >= agora - 60)
+    fracao = usados / SHEETS_QUOTA_PER_MINUTE
+    return {'usados': usados, 'limite': SHEETS_QUOTA_PER_MINUTE, 'fracao': fracao,
+            'alerta': fracao >= QUOTA_WARNING_RATIO}
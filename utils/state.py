@@ -0,0 +1,185 @@
+"""Per-Section Session State
+
+Each section keeps its navigation state in one typed SectionState object
+instead of loose st.session_state keys. Records are referred to by their ID,
+never by their row index, so a refresh of the data cannot make an edit or a
+delete land on another row. Extra objects a section stashes are limited in
+size, and the state of every other section is cleared when the user
+navigates to a page.
+"""
+
+import pickle
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import streamlit as st
+
+from utils.schema import memory_usage_bytes
+
+
+SECTION_STATE_KEY = '_estado_secoes'
+CURRENT_PAGE_KEY = '_pagina_atual'
+# Atualização em conflito à espera de decisão (ver crud.render_conflict_resolution)
+CONFLICT_STATE_KEY = 'crud_conflito'
+
+# Tamanho máximo (bytes) de cada objeto guardado em SectionState.extras
+MAX_EXTRA_BYTES = 512 * 1024
+
+# Chaves avulsas que deixam de fazer sentido quando se muda de página
+TRANSIENT_KEYS = [CONFLICT_STATE_KEY]
+
+
+@dataclass
+class SectionState:
+    """Estado de navegação de uma secção.
+
+    Attributes:
+        edit_id: ID do registo em edição
+        delete_id: ID do registo a apagar
+        form_version: Versão do formulário de criação (incrementar limpa o formulário)
+        edit_form_version: Versão do formulário de edição
+        upload_version: Versão do carregador de ficheiros
+        page: Página atual da lista (ver crud.create_pagination_controls)
+        page_record_id: ID do primeiro registo da página atual
+        extras: Outros objetos da secção, com tamanho limitado (ver set_extra)
+    """
+    edit_id: Optional[str] = None
+    delete_id: Optional[str] = None
+    form_version: int = 0
+    edit_form_version: int = 0
+    upload_version: int = 0
+    page: int = 1
+    page_record_id: Optional[str] = None
+    extras: Dict[str, Any] = field(default_factory=dict)
+
+    def start_edit(self, record_id: Any) -> None:
+        """Abre a vista de edição do registo indicado."""
+        self.edit_id, self.delete_id = str(record_id), None
+
+    def start_delete(self, record_id: Any) -> None:
+        """Abre a vista de confirmação para apagar o registo indicado."""
+        self.delete_id, self.edit_id = str(record_id), None
+
+    def back_to_list(self) -> None:
+        """Volta à lista (fecha as vistas de edição e de apagar)."""
+        self.edit_id = self.delete_id = None
+
+    def reset_form(self) -> None:
+        """Limpa o formulário de criação."""
+        self.form_version += 1
+
+    def reset_edit_form(self) -> None:
+        """Limpa o formulário de edição."""
+        self.edit_form_version += 1
+
+    def reset_upload(self) -> None:
+        """Limpa o carregador de ficheiros."""
+        self.upload_version += 1
+
+    def set_extra(self, nome: str, valor: Any) -> bool:
+        """Guarda um objeto da secção, se não exceder MAX_EXTRA_BYTES.
+
+        Args:
+            nome (str): Nome do objeto
+            valor (Any): Objeto a guardar
+
+        Returns:
+            bool: True se foi guardado
+        """
+        tamanho = _tamanho_bytes(valor)
+        if tamanho > MAX_EXTRA_BYTES:
+            st.error(f"Não foi possível guardar '{nome}' na sessão: {tamanho / 1024:.0f} KB "
+                     f"excede o limite de {MAX_EXTRA_BYTES / 1024:.0f} KB.")
+            return False
+        self.extras[nome] = valor
+        return True
+
+    def get_extra(self, nome: str, default: Any = None) -> Any:
+        """Objeto guardado com set_extra (ou o valor por omissão)."""
+        return self.extras.get(nome, default)
+
+    def pop_extra(self, nome: str) -> Any:
+        """Remove e devolve um objeto guardado com set_extra."""
+        return self.extras.pop(nome, None)
+
+
+def section_state(secao: str) -> SectionState:
+    """Estado da secção nesta sessão (criado na primeira utilização).
+
+    Args:
+        secao (str): Nome da secção (ex.: 'Turmas')
+
+    Returns:
+        SectionState: Estado da secção
+    """
+    estados = st.session_state.setdefault(SECTION_STATE_KEY, {})
+    if secao not in estados:
+        estados[secao] = SectionState()
+    return estados[secao]
+
+
+def enter_page(pagina: str) -> None:
+    """Regista a página mostrada e, se mudou, limpa o estado das outras secções.
+
+    Args:
+        pagina (str): Página que vai ser mostrada
+    """
+    anterior = st.session_state.get(CURRENT_PAGE_KEY)
+    if anterior == pagina:
+        return
+    st.session_state[CURRENT_PAGE_KEY] = pagina
+    estados = st.session_state.get(SECTION_STATE_KEY, {})
+    for secao in [secao for secao in estados if secao != pagina]:
+        del estados[secao]
+    for chave in TRANSIENT_KEYS:
+        st.session_state.pop(chave, None)
+
+
+def resolve_record(df: pd.DataFrame, id_column: str, record_id: Optional[str]) -> Optional[Any]:
+    """Índice atual do registo com o ID indicado.
+
+    Args:
+        df (pd.DataFrame): Dados da folha
+        id_column (str): Coluna de ID
+        record_id (Optional[str]): ID guardado no estado da secção
+
+    Returns:
+        Optional[Any]: Índice da linha no DataFrame ou None se o registo já não existe
+    """
+    if record_id is None or id_column not in df.columns:
+        return None
+    encontrados = df.index[df[id_column].astype(str) == str(record_id)]
+    return encontrados[0] if len(encontrados) else None
+
+
+def _tamanho_bytes(valor: Any) -> int:
+    """Tamanho aproximado de um objeto guardado na sessão."""
+    if isinstance(valor, pd.DataFrame):
+        return memory_usage_bytes(valor)
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+def get_session_memory_report() -> pd.DataFrame:
+    """Memória ocupada pelo estado desta sessão, por chave.
+
+    O estado das secções aparece desdobrado por secção.
+
+    Returns:
+        pd.DataFrame: Chave, tipo e tamanho (KB), do maior para o menor
+    """
+    linhas = []
+    for chave, valor in st.session_state.items():
+        if chave == SECTION_STATE_KEY:
+            for secao, estado in valor.items():
+                linhas.append({'Chave': f"{SECTION_STATE_KEY}[{secao}]", 'Tipo': type(estado).__name__,
+                               'Tamanho (KB)': _tamanho_bytes(estado) / 1024})
+        else:
+            linhas.append({'Chave': str(chave), 'Tipo': type(valor).__name__,
+                           'Tamanho (KB)': _tamanho_bytes(valor) / 1024})
+    report = pd.DataFrame(linhas, columns=['Chave', 'Tipo', 'Tamanho (KB)'])
+    report['Tamanho (KB)'] = report['Tamanho (KB)'].round(2)
+    return report.sort_values('Tamanho (KB)', ascending=False, ignore_index=True)
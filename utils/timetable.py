@@ -0,0 +1,502 @@
+"""Weekly Timetable Utilities
+
+This module materializes the Turmas sheet into a weekly timetable structure
+(turmas grouped by day and sorted by start time, with resolved room labels)
+and renders it as HTML. Per-professor, per-sala and per-disciplina views are
+prebuilt as group indexes over the same entries. Everything is cached per
+Turmas data generation, so reruns of the Horários page (and switching views)
+are dictionary lookups instead of filtering and sorting the frame again.
+
+Occupancy analytics rasterize every turma into a NumPy (day × 15-minute slot
+× resource) array in a single vectorized pass, and a per-resource free-interval
+index (salas and professores) backs the free-slot suggestions for new turmas.
+"""
+
+import html
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.crud import get_sheet_data, get_sheet_generation
+from utils.schema import INICIO_MIN, FIM_MIN, is_missing
+from utils.validation import DIAS_SEMANA, SALA_OPCOES
+
+
+# Vistas do horário: chave da vista -> campo das entradas usado para agrupar
+TIMETABLE_VIEWS = {
+    'professor': 'professor',
+    'sala': 'sala',
+    'disciplina': 'disciplina',
+}
+
+# Resolução da análise de ocupação
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Janela diária (minutos) considerada na procura de horários livres
+DEFAULT_DAY_WINDOW = (8 * 60, 20 * 60)
+
+
+def _texto(value: Any, default: str = '') -> str:
+    """Converte um valor de célula em texto (default se vazio)."""
+    if is_missing(value) or str(value).strip() == '':
+        return default
+    return str(value).strip()
+
+
+def resolve_room_label(sala: Any, outro_local: Any) -> str:
+    """Devolve o nome do local de uma turma, resolvendo a sala 'Outro'.
+
+    Args:
+        sala: Valor da coluna 'Sala'
+        outro_local: Valor da coluna 'Outro_Local'
+
+    Returns:
+        str: Nome da sala ou do local especificado
+    """
+    sala = _texto(sala, 'N/A')
+    if sala == "Outro":
+        return _texto(outro_local, 'Outro')
+    return sala
+
+
+def active_turmas(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtra as turmas ativas com horário válido.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado da folha 'Turmas'
+
+    Returns:
+        pd.DataFrame: Turmas ativas
+    """
+    if df.empty:
+        return df
+    if 'Estado' in df.columns:
+        df = df[df['Estado'] == 'Ativa']
+    if INICIO_MIN in df.columns and FIM_MIN in df.columns:
+        df = df[df[INICIO_MIN].notna() & df[FIM_MIN].notna()]
+    return df
+
+
+def overlapping_mask(df: pd.DataFrame, dia: Any, inicio_min: int, fim_min: int) -> pd.Series:
+    """Marca as turmas que se sobrepõem a um horário (vetorizado).
+
+    Usa as colunas de minutos calculadas no carregamento; turmas sem horário
+    válido nunca se sobrepõem.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado da folha 'Turmas'
+        dia: Dia da semana
+        inicio_min (int): Início em minutos desde a meia-noite
+        fim_min (int): Fim em minutos desde a meia-noite
+
+    Returns:
+        pd.Series: Máscara booleana alinhada com o DataFrame
+    """
+    return ((df['Dia da Semana'] == dia)
+            & (df[INICIO_MIN] < fim_min)
+            & (df[FIM_MIN] > inicio_min)).fillna(False).astype(bool)
+
+
+def build_timetable(df: pd.DataFrame) -> Dict[str, List[Dict[str, Any]]]:
+    """Agrupa as turmas por dia, ordenadas pela hora de início.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado da folha 'Turmas'
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Entradas do horário por dia da semana
+    """
+    timetable: Dict[str, List[Dict[str, Any]]] = {dia: [] for dia in DIAS_SEMANA}
+    df = active_turmas(df)
+    if df.empty or 'Dia da Semana' not in df.columns:
+        return timetable
+
+    df = df.sort_values(by=INICIO_MIN, kind='stable')
+    for dia, grupo in df.groupby('Dia da Semana', observed=True, sort=False):
+        dia = str(dia)
+        if dia not in timetable:
+            continue
+        timetable[dia] = [
+            {
+                'id': _texto(row.get('ID_Turma')),
+                'nome': _texto(row.get('Nome turma', row.get('Nome da Turma')), 'N/A'),
+                'disciplina': _texto(row.get('Disciplina')),
+                'professor': _texto(row.get('Professor'), 'N/A'),
+                'sala': resolve_room_label(row.get('Sala'), row.get('Outro_Local')),
+                'inicio': _texto(row.get('Hora de Inicio')),
+                'fim': _texto(row.get('Hora de Fim')),
+                'inicio_min': int(row[INICIO_MIN]),
+                'fim_min': int(row[FIM_MIN]),
+            }
+            for row in grupo.to_dict('records')
+        ]
+    return timetable
+
+
+def timetable_frame(horario: Dict[str, Any]) -> pd.DataFrame:
+    """Converte um horário materializado numa tabela (uma linha por turma).
+
+    Args:
+        horario (Dict[str, Any]): Horário com as entradas por dia em 'dias'
+
+    Returns:
+        pd.DataFrame: Colunas Dia, Início, Fim, Turma, Disciplina, Professor e Sala
+    """
+    return pd.DataFrame(
+        [
+            {'Dia': dia, 'Início': e['inicio'], 'Fim': e['fim'], 'Turma': e['nome'],
+             'Disciplina': e['disciplina'], 'Professor': e['professor'], 'Sala': e['sala']}
+            for dia, entradas in horario['dias'].items()
+            for e in entradas
+        ],
+        columns=['Dia', 'Início', 'Fim', 'Turma', 'Disciplina', 'Professor', 'Sala'],
+    )
+
+
+def render_day_html(dia: str, entradas: List[Dict[str, Any]]) -> str:
+    """Gera o bloco HTML de um dia do horário.
+
+    Args:
+        dia (str): Dia da semana
+        entradas (List[Dict[str, Any]]): Turmas do dia, já ordenadas
+
+    Returns:
+        str: HTML do dia
+    """
+    partes = [f'<div class="horario-dia"><h5>{html.escape(dia)}</h5>']
+    if not entradas:
+        partes.append('<p class="horario-vazio"><em>Sem aulas</em></p>')
+    for entrada in entradas:
+        partes.append(
+            '<div class="horario-cartao">'
+            f'<strong>{html.escape(entrada["nome"])}</strong><br>'
+            f'🕒 <code>{html.escape(entrada["inicio"])} - {html.escape(entrada["fim"])}</code><br>'
+            f'👨‍🏫 {html.escape(entrada["professor"])}<br>'
+            f'🚪 {html.escape(entrada["sala"])}'
+            '</div>'
+        )
+    partes.append('</div>')
+    return ''.join(partes)
+
+
+def build_group_indexes(timetable: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]]:
+    """Constrói os índices por professor, sala e disciplina num único varrimento.
+
+    As entradas de cada grupo mantêm a ordem (dia, hora de início) do horário
+    geral, pelo que não é preciso voltar a ordenar.
+
+    Args:
+        timetable (Dict[str, List[Dict[str, Any]]]): Horário geral por dia
+
+    Returns:
+        Dict: vista -> valor do grupo -> horário por dia
+    """
+    indexes: Dict[str, Dict[str, Dict[str, List[Dict[str, Any]]]]] = {vista: {} for vista in TIMETABLE_VIEWS}
+    for dia, entradas in timetable.items():
+        for entrada in entradas:
+            for vista, campo in TIMETABLE_VIEWS.items():
+                grupo = entrada[campo] or 'N/A'
+                dias = indexes[vista].setdefault(grupo, {d: [] for d in DIAS_SEMANA})
+                dias[dia].append(entrada)
+    return indexes
+
+
+def _vista_materializada(timetable: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Junta a um horário por dia o HTML de cada dia e o total de turmas."""
+    return {
+        'dias': timetable,
+        'html': {dia: render_day_html(dia, entradas) for dia, entradas in timetable.items()},
+        'total': sum(len(entradas) for entradas in timetable.values()),
+    }
+
+
+@st.cache_resource(max_entries=4)
+def _materializar_horario(geracao: int) -> Dict[str, Any]:
+    """Materializa o horário semanal para uma geração dos dados das turmas.
+
+    Usa cache_resource (sem cópia por rerun): a estrutura é só de leitura.
+    """
+    timetable = build_timetable(get_sheet_data("Turmas", include_pending=False))
+    horario = _vista_materializada(timetable)
+    horario['vistas'] = {
+        vista: {grupo: _vista_materializada(dias) for grupo, dias in sorted(grupos.items())}
+        for vista, grupos in build_group_indexes(timetable).items()
+    }
+    return horario
+
+
+def get_weekly_timetable() -> Dict[str, Any]:
+    """Devolve o horário semanal materializado das turmas ativas.
+
+    Returns:
+        Dict[str, Any]: 'dias' (entradas por dia), 'html' (bloco por dia),
+        'total' (número de turmas no horário) e 'vistas' (o mesmo, por
+        professor, sala e disciplina)
+    """
+    get_sheet_data("Turmas")  # garante que a geração corresponde aos dados em cache
+    return _materializar_horario(get_sheet_generation("Turmas"))
+
+
+def get_timetable_for_generation(geracao: int) -> Dict[str, Any]:
+    """Devolve o horário semanal materializado de uma geração dos dados das turmas.
+
+    Para caches derivadas que já têm a geração na chave (ex.: documentos de
+    impressão); a estrutura é a de get_weekly_timetable.
+
+    Args:
+        geracao (int): Geração da folha 'Turmas' (crud.get_sheet_generation)
+
+    Returns:
+        Dict[str, Any]: Horário semanal materializado
+    """
+    return _materializar_horario(geracao)
+
+
+# ===== OCUPAÇÃO =====
+
+def build_occupancy_array(df: pd.DataFrame,
+                          resource_column: str,
+                          resources: Optional[List[str]] = None) -> Tuple[np.ndarray, List[str]]:
+    """Rasteriza as turmas ativas num array (dia × slot de 15 min × recurso).
+
+    Cada turma soma 1 nos slots que ocupa, de forma vetorizada: os inícios e
+    fins são marcados num array de diferenças (np.add.at) e a soma acumulada
+    ao longo dos slots dá a ocupação. Valores acima de 1 indicam sobreposições.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado da folha 'Turmas'
+        resource_column (str): Coluna do recurso (ex.: 'Sala', 'Professor')
+        resources (Optional[List[str]]): Recursos a considerar (por omissão,
+            os valores presentes nas turmas ativas)
+
+    Returns:
+        tuple: (array int16 com forma (7, SLOTS_PER_DAY, n_recursos), recursos)
+    """
+    df = active_turmas(df)
+    if resources is None:
+        resources = sorted(df[resource_column].astype(str).unique().tolist()) if not df.empty else []
+    occupancy = np.zeros((len(DIAS_SEMANA), SLOTS_PER_DAY + 1, len(resources)), dtype=np.int16)
+    if df.empty or not resources:
+        return occupancy[:, :-1, :], resources
+
+    day_idx = df['Dia da Semana'].astype(str).map({dia: i for i, dia in enumerate(DIAS_SEMANA)})
+    res_idx = df[resource_column].astype(str).map({r: i for i, r in enumerate(resources)})
+    inicio = df[INICIO_MIN].to_numpy(dtype='int64')
+    fim = df[FIM_MIN].to_numpy(dtype='int64')
+    valid = (day_idx.notna() & res_idx.notna()).to_numpy() & (fim > inicio)
+
+    days = day_idx.to_numpy()[valid].astype(np.int64)
+    res = res_idx.to_numpy()[valid].astype(np.int64)
+    start = np.clip(inicio[valid] // SLOT_MINUTES, 0, SLOTS_PER_DAY)
+    end = np.clip(-(-fim[valid] // SLOT_MINUTES), 0, SLOTS_PER_DAY)
+
+    np.add.at(occupancy, (days, start, res), 1)
+    np.add.at(occupancy, (days, end, res), -1)
+    return np.cumsum(occupancy, axis=1, dtype=np.int16)[:, :-1, :], resources
+
+
+def minutes_label(minutos: int) -> str:
+    """Formata minutos desde a meia-noite como 'HH:MM'."""
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def slot_label(slot: int) -> str:
+    """Devolve a hora ('HH:MM') do início de um slot."""
+    return minutes_label(slot * SLOT_MINUTES)
+
+
+@st.cache_resource(max_entries=4)
+def _materializar_ocupacao(geracao: int) -> Dict[str, Any]:
+    """Calcula os arrays de ocupação por sala e por professor para uma geração."""
+    df = get_sheet_data("Turmas", include_pending=False)
+    salas, lista_salas = build_occupancy_array(df, 'Sala', SALA_OPCOES)
+    professores, lista_professores = build_occupancy_array(df, 'Professor')
+
+    ocupados = np.flatnonzero((salas.sum(axis=(0, 2)) + professores.sum(axis=(0, 2))) > 0)
+    if ocupados.size:
+        # Janela a mostrar: do primeiro ao último slot com aulas, com 1 h de margem
+        janela = (max(0, ocupados[0] - 4), min(SLOTS_PER_DAY, ocupados[-1] + 5))
+    else:
+        janela = (0, 0)
+    return {
+        'sala': (salas, lista_salas),
+        'professor': (professores, lista_professores),
+        'janela': janela,
+    }
+
+
+def get_occupancy() -> Dict[str, Any]:
+    """Devolve os arrays de ocupação (por sala e por professor) em cache.
+
+    Returns:
+        Dict[str, Any]: 'sala' e 'professor' -> (array, recursos) e 'janela'
+        (primeiro e último slot a mostrar)
+    """
+    get_sheet_data("Turmas")  # garante que a geração corresponde aos dados em cache
+    return _materializar_ocupacao(get_sheet_generation("Turmas"))
+
+
+# ===== HORÁRIOS LIVRES =====
+
+Interval = Tuple[int, int]
+
+
+def _merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Ordena e funde intervalos sobrepostos ou contíguos."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _complement(busy: List[Interval], window: Interval) -> List[Interval]:
+    """Devolve os intervalos livres de uma janela, dados os ocupados (fundidos)."""
+    free: List[Interval] = []
+    cursor, end_window = window
+    for start, end in busy:
+        if start > cursor:
+            free.append((cursor, min(start, end_window)))
+        cursor = max(cursor, end)
+        if cursor >= end_window:
+            break
+    if cursor < end_window:
+        free.append((cursor, end_window))
+    return [(s, e) for s, e in free if e > s]
+
+
+def intersect(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    """Interseção de duas listas ordenadas de intervalos (dois ponteiros)."""
+    result: List[Interval] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+def build_free_interval_index(df: pd.DataFrame,
+                              window: Interval = DEFAULT_DAY_WINDOW) -> Dict[str, Any]:
+    """Constrói o índice de intervalos ocupados e livres por sala e professor.
+
+    Considera todas as turmas com horário válido, tal como a verificação de
+    conflitos ao guardar. A sala 'Outro' nunca gera conflitos.
+
+    Args:
+        df (pd.DataFrame): DataFrame tipado da folha 'Turmas'
+        window (Interval): Janela diária (minutos) a considerar
+
+    Returns:
+        Dict[str, Any]: 'busy' e 'free' -> (tipo, recurso) -> dia -> intervalos,
+        'disciplinas' -> disciplina -> dias com turmas e 'window'
+    """
+    busy: Dict[Tuple[str, str], Dict[str, List[Interval]]] = {}
+    disciplinas: Dict[str, set] = {}
+    if not df.empty and INICIO_MIN in df.columns:
+        validas = df[df[INICIO_MIN].notna() & df[FIM_MIN].notna() & (df[FIM_MIN] > df[INICIO_MIN]).fillna(False)]
+        for row in validas[['Dia da Semana', 'Sala', 'Professor', 'Disciplina', INICIO_MIN, FIM_MIN]].itertuples(index=False):
+            dia, sala, professor, disciplina, inicio, fim = row
+            intervalo = (int(inicio), int(fim))
+            recursos = [('professor', _texto(professor))]
+            if _texto(sala) != "Outro":
+                recursos.append(('sala', _texto(sala)))
+            for recurso in recursos:
+                busy.setdefault(recurso, {}).setdefault(str(dia), []).append(intervalo)
+            disciplinas.setdefault(_texto(disciplina), set()).add(str(dia))
+
+    busy = {recurso: {dia: _merge_intervals(ints) for dia, ints in dias.items()}
+            for recurso, dias in busy.items()}
+    free = {recurso: {dia: _complement(dias.get(dia, []), window) for dia in DIAS_SEMANA}
+            for recurso, dias in busy.items()}
+    return {'busy': busy, 'free': free, 'disciplinas': disciplinas, 'window': window}
+
+
+def free_intervals(index: Dict[str, Any], recurso: Tuple[str, str], dia: str) -> List[Interval]:
+    """Intervalos livres de um recurso num dia (janela inteira se não tem turmas)."""
+    dias = index['free'].get(recurso)
+    return dias[dia] if dias is not None else [index['window']]
+
+
+def suggest_slots(index: Dict[str, Any],
+                  disciplina: str,
+                  professor: str,
+                  duration: int,
+                  salas: List[str],
+                  dias: Optional[List[str]] = None,
+                  step: int = SLOT_MINUTES,
+                  limit: int = 10) -> List[Dict[str, Any]]:
+    """Procura horários sem conflitos para uma nova turma, ordenados por preferência.
+
+    A preferência favorece horários encostados às aulas que o professor já tem
+    nesse dia (menos tempos mortos), dias em que a disciplina ainda não tem
+    turmas, e depois o dia e a hora mais cedo.
+
+    Args:
+        index (Dict[str, Any]): Índice de build_free_interval_index
+        disciplina (str): Disciplina da nova turma
+        professor (str): Professor da nova turma
+        duration (int): Duração da aula em minutos
+        salas (List[str]): Salas candidatas
+        dias (Optional[List[str]]): Dias candidatos (todos por omissão)
+        step (int): Granularidade das horas de início em minutos
+        limit (int): Número máximo de sugestões
+
+    Returns:
+        List[Dict[str, Any]]: Sugestões com 'dia', 'sala', 'inicio' e 'fim' (minutos)
+    """
+    if duration <= 0:
+        return []
+
+    dias_disciplina = index['disciplinas'].get(disciplina, set())
+    candidatos = []
+    for ordem_dia, dia in enumerate(DIAS_SEMANA):
+        if dias and dia not in dias:
+            continue
+        livres_prof = free_intervals(index, ('professor', professor), dia)
+        aulas_prof = index['busy'].get(('professor', professor), {}).get(dia, [])
+        for sala in salas:
+            livres_sala = livres_prof if sala == "Outro" else intersect(livres_prof, free_intervals(index, ('sala', sala), dia))
+            for start, end in livres_sala:
+                inicio = -(-start // step) * step
+                while inicio + duration <= end:
+                    fim = inicio + duration
+                    if aulas_prof:
+                        folga = min(min(abs(inicio - b_fim), abs(b_inicio - fim)) for b_inicio, b_fim in aulas_prof)
+                    else:
+                        folga = 24 * 60
+                    candidatos.append(((folga, dia in dias_disciplina, ordem_dia, inicio, sala),
+                                       {'dia': dia, 'sala': sala, 'inicio': inicio, 'fim': fim}))
+                    inicio += step
+
+    candidatos.sort(key=lambda c: c[0])
+    return [sugestao for _, sugestao in candidatos[:limit]]
+
+
+@st.cache_resource(max_entries=4)
+def _materializar_livres(geracao: int, window: Interval) -> Dict[str, Any]:
+    """Calcula o índice de intervalos livres para uma geração dos dados das turmas."""
+    return build_free_interval_index(get_sheet_data("Turmas", include_pending=False), window)
+
+
+def get_free_interval_index(window: Interval = DEFAULT_DAY_WINDOW) -> Dict[str, Any]:
+    """Devolve o índice de intervalos livres por sala/professor em cache.
+
+    Args:
+        window (Interval): Janela diária (minutos) a considerar
+
+    Returns:
+        Dict[str, Any]: Índice de build_free_interval_index
+    """
+    get_sheet_data("Turmas")  # garante que a geração corresponde aos dados em cache
+    return _materializar_livres(get_sheet_generation("Turmas"), window)
@@ -1,24 +1,24 @@
 import streamlit as st
-import base64
 
+from utils.assets import style_block
+from utils.metrics import logger
 
-def imagem_base64(caminho):
-    """Converte imagem para base64 para usar no CSS."""
-    with open(caminho, "rb") as f:
-        dados = f.read()
-    return base64.b64encode(dados).decode()
 
-def aplicar_estilos():
-    try:
-        mascote_b64 = imagem_base64("imagens/mascote.png")
-        st.markdown(
-            f"""
-        <link rel="preconnect" href="https://fonts.googleapis.com">
-        <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-        <link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;500;600;700&display=swap" rel="stylesheet">
-
-        <style>
-        :root {{
+# Mensagens guardadas para a próxima execução (ver notificar)
+NOTIFICACOES_KEY = '_notificacoes_pendentes'
+
+# Fontes carregadas antes do estilo global
+FONTES_HTML = """
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;500;600;700&display=swap" rel="stylesheet">
+"""
+
+
+def _css_global() -> str:
+    """CSS global da aplicação (tema, formulários, tabelas, horário)."""
+    return ("""
+        :root {
             --color-bg-start: #34495e; /* Azul médio para melhor legibilidade */
             --color-bg-end: #2c3e50; /* Tom mais claro do gradiente */
             --color-sidebar-bg: #1f2c39;
@@ -38,53 +38,53 @@ def aplicar_estilos():
             --fs-body: 15px;
             --shadow: 0 8px 24px rgba(0, 0, 0, 0.3);
             --divider-height: 3px; /* Divisórias mais grossas */
-        }}
+        }
 
         /* --- CONFIGURAÇÕES GLOBAIS --- */
 
-        html, body, [class*="css"] {{
+        html, body, [class*="css"] {
             font-family: var(--font-family);
             color: var(--color-text) !important;
             font-size: var(--fs-body);
             background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
-        }}
+        }
 
         /* DESTAQUE AZUL CLARO PARA FORMULÁRIOS E CARDS */
-        [data-testid="stForm"], .form-container {{
+        [data-testid="stForm"], .form-container {
             background: linear-gradient(135deg, #3498db 0%, #2980b9 100%) !important;
             border-radius: var(--radius) !important;
             padding: 20px !important;
             margin: 20px 0 !important;
             border: 1px solid #546e7a !important;
             box-shadow: 0 8px 32px rgba(52, 73, 94, 0.4) !important;
-        }}
-        .card-container {{
+        }
+        .card-container {
             background: linear-gradient(135deg, #74b9ff 0%, #3498db 100%) !important;
             border-radius: var(--radius) !important;
             padding: 15px !important;
             margin: 10px 0 !important;
             border: 1px solid #546e7a !important;
             box-shadow: 0 6px 24px rgba(52, 73, 94, 0.3) !important;
-        }}
+        }
 
         /* Containers de abas com destaque azul */
-        [data-testid*="stTabs"] > div > div {{
+        [data-testid*="stTabs"] > div > div {
             background: linear-gradient(135deg, #74b9ff 0%, #3498db 100%) !important;
             border-radius: 12px 12px 0 0 !important;
             margin-bottom: 0 !important;
-        }}
+        }
 
         /* Área de formulário mais escura para contraste */
-        .element-container:has([data-testid="stForm"]) {{
+        .element-container:has([data-testid="stForm"]) {
             background: rgba(65, 90, 119, 0.6) !important;
             border-radius: var(--radius) !important;
             padding: 15px !important;
             margin: 10px 0 !important;
-        }}
+        }
 
-        .block-container {{
+        .block-container {
             padding-top: 2rem !important;
-        }}
+        }
 
         /* TÍTULOS BRANCOS - Correção específica */
         [data-testid="stMarkdownContainer"] h1,
@@ -92,30 +92,30 @@ def aplicar_estilos():
         [data-testid="stMarkdownContainer"] h3,
         [data-testid="stMarkdownContainer"] h4,
         [data-testid="stMarkdownContainer"] h5,
-        [data-testid="stMarkdownContainer"] h6 {{
+        [data-testid="stMarkdownContainer"] h6 {
             color: white !important;
             font-weight: 600 !important;
-        }}
+        }
 
         /* Títulos específicos das páginas */
         [data-testid="stText"] h1,
         [data-testid="stText"] h2,
-        [data-testid="stText"] h3 {{
+        [data-testid="stText"] h3 {
             color: white !important;
-        }}
+        }
 
         /* TÍTULOS BRANCOS - Todos os títulos e subtítulos */
-        h1, h2, h3, h4, h5, h6 {{
+        h1, h2, h3, h4, h5, h6 {
             color: white !important;
             font-weight: 600 !important;
-        }}
+        }
 
         /* Títulos em markdown containers */
         .stMarkdown h1, .stMarkdown h2, .stMarkdown h3,
-        .stMarkdown h4, .stMarkdown h5, .stMarkdown h6 {{
+        .stMarkdown h4, .stMarkdown h5, .stMarkdown h6 {
             color: white !important;
             font-weight: 600 !important;
-        }}
+        }
 
         /* Títulos específicos das seções */
         [data-testid*="stMarkdownContainer"] h1,
@@ -123,74 +123,74 @@ def aplicar_estilos():
         [data-testid*="stMarkdownContainer"] h3,
         [data-testid*="stMarkdownContainer"] h4,
         [data-testid*="stMarkdownContainer"] h5,
-        [data-testid*="stMarkdownContainer"] h6 {{
+        [data-testid*="stMarkdownContainer"] h6 {
             color: white !important;
             font-weight: 600 !important;
-        }}
+        }
 
         /* TEXTO GERAL BRANCO - Texto comum que ainda não está coberto */
-        p, span, div, label {{
+        p, span, div, label {
             color: white !important;
-        }}
+        }
 
         /* Texto específica em tabelas e listas */
-        [data-testid="stDataFrame"], [data-testid="stTable"] {{
+        [data-testid="stDataFrame"], [data-testid="stTable"] {
             color: #2c3e50 !important;
-        }}
+        }
 
         /* Override específico para tabelas - fundo branco, texto preto */
-        [data-testid="stDataFrame"] tbody tr, [data-testid="stTable"] tbody tr {{
+        [data-testid="stDataFrame"] tbody tr, [data-testid="stTable"] tbody tr {
             background-color: white !important;
             color: #2c3e50 !important;
-        }}
+        }
 
         /* Texto de paginação e status - como "Mostrando X de X" */
-        .stSelectbox, .stMultiSelect, [data-testid*="stText"] {{
+        .stSelectbox, .stMultiSelect, [data-testid*="stText"] {
             color: white !important;
-        }}
+        }
 
         /* Texto em containers especiais */
-        .element-container p, .element-container span, .element-container div {{
+        .element-container p, .element-container span, .element-container div {
             color: white !important;
-        }}
+        }
 
         /* Exceção para conteúdo dentro de formulários que já foi tratado */
         .element-container div:has([data-testid*="stTextInput"]),
-        .element-container div:has([data-testid*="stNumberInput"]) {{
+        .element-container div:has([data-testid*="stNumberInput"]) {
             color: var(--color-text) !important;
-        }}
+        }
 
         /* --- ESTILOS DE COMPONENTES --- */
 
         /* Alertas (st.warning, st.info, etc.) */
-        [data-testid="stAlert"] {{
+        [data-testid="stAlert"] {
             background-color: var(--color-card-contrast) !important;
             color: #2c3e50 !important; /* Cor de texto escura para contraste */
             border-radius: var(--radius);
             border-left: 4px solid;
-        }}
-        [data-testid="stAlert"] p {{
+        }
+        [data-testid="stAlert"] p {
             color: #2c3e50 !important; /* Texto escuro para melhor leitura */
             font-weight: 500;
-        }}
+        }
 
         /* Messages de sucesso, erro e informações */
-        div[role="alert"], .css-1gr6cnr {{
+        div[role="alert"], .css-1gr6cnr {
             background-color: rgba(255, 255, 255, 0.95) !important;
             border: 1px solid var(--color-border) !important;
             border-radius: var(--radius);
             color: #2c3e50 !important;
-        }}
+        }
 
         /* Textos importantes com fundo xácido */
-        .element-container div:has([data-testid*="TextArea"]), .element-container div:has([data-testid*="TextInput"]) {{
+        .element-container div:has([data-testid*="TextArea"]), .element-container div:has([data-testid*="TextInput"]) {
             background-color: rgba(255, 255, 255, 0.05) !important;
             border-radius: var(--radius);
             padding: 0.5rem;
-        }}
+        }
 
         /* Botão Geral com Gradiente */
-        [data-testid="stButton"] > button {{
+        [data-testid="stButton"] > button {
             background: linear-gradient(90deg, var(--color-brand-start), var(--color-brand-end));
             color: white;
             border: none;
@@ -201,25 +201,25 @@ def aplicar_estilos():
             cursor: pointer;
             transition: transform 0.2s ease, box-shadow 0.2s ease;
             box-shadow: 0 4px 10px rgba(240, 90, 20, 0.3);
-        }}
-        [data-testid="stButton"] > button:hover {{
+        }
+        [data-testid="stButton"] > button:hover {
             transform: translateY(-3px);
             box-shadow: 0 6px 15px rgba(240, 90, 20, 0.4);
-        }}
+        }
 
         /* Inputs e TextAreas */
-        [data-testid="stTextInput"] input, [data-testid="stTextArea"] textarea, [data-testid="stSelectbox"] div[data-baseweb="select"] > div {{
+        [data-testid="stTextInput"] input, [data-testid="stTextArea"] textarea, [data-testid="stSelectbox"] div[data-baseweb="select"] > div {
             border: 1px solid var(--color-border);
             border-radius: var(--radius);
             background-color: var(--color-bg-start);
             color: var(--color-text) !important;
-        }}
-        [data-testid="stTextInput"] input:disabled, [data-testid="stTextArea"] textarea:disabled {{
+        }
+        [data-testid="stTextInput"] input:disabled, [data-testid="stTextArea"] textarea:disabled {
             -webkit-text-fill-color: #bdc3c7; /* Cinza mais claro */
             color: #bdc3c7; /* Cinza mais claro */
             background-color: #2c3e50;
             opacity: 0.7;
-        }}
+        }
 
         /* FORMULÁRIOS COMPLETOS - Labels brancos + fundo branco */
         [data-testid="stTextInput"] label,
@@ -227,11 +227,11 @@ def aplicar_estilos():
         [data-testid="stTextArea"] label,
         [data-testid="stSelectbox"] label,
         [data-testid="stDateInput"] label,
-        [data-testid="stTimeInput"] label {{
+        [data-testid="stTimeInput"] label {
             color: white !important;
             font-weight: 600 !important;
             font-size: 14px !important;
-        }}
+        }
 
         /* Todos os campos de entrada com fundo branco */
         [data-testid="stTextInput"] input,
@@ -239,35 +239,35 @@ def aplicar_estilos():
         [data-testid="stNumberInput"] input,
         [data-testid="stNumberInput"] input[type="number"],
         [data-testid="stSelectbox"] input,
-        [data-testid="stSelectbox"] div[data-baseweb="select"] input {{
+        [data-testid="stSelectbox"] div[data-baseweb="select"] input {
             background-color: white !important;
             color: #2c3e50 !important;
             border: 1px solid #ddd !important;
             border-radius: var(--radius) !important;
             font-weight: 500 !important;
-        }}
+        }
 
         /* Campos de data e tempo */
         [data-testid="stDateInput"] input,
-        [data-testid="stTimeInput"] input {{
+        [data-testid="stTimeInput"] input {
             background-color: white !important;
             color: #2c3e50 !important;
             border: 1px solid #ddd !important;
-        }}
+        }
 
         /* Campos de seleção (dropdowns) */
-        [data-testid="stSelectbox"] div[data-baseweb="select"] {{
+        [data-testid="stSelectbox"] div[data-baseweb="select"] {
             background-color: white !important;
             border: 1px solid #ddd !important;
             border-radius: var(--radius) !important;
-        }}
+        }
 
-        [data-testid="stSelectbox"] div[data-baseweb="select"] div {{
+        [data-testid="stSelectbox"] div[data-baseweb="select"] div {
             color: #2c3e50 !important;
-        }}
+        }
 
         /* GARANTIR BOTÕES COM GRADIENTE - Todos os botões */
-        button[data-testid*="baseButton"], .stButton > button {{
+        button[data-testid*="baseButton"], .stButton > button {
             background: linear-gradient(90deg, var(--color-brand-start), var(--color-brand-end)) !important;
             color: white !important;
             border: none !important;
@@ -275,23 +275,23 @@ def aplicar_estilos():
             padding: 0.6rem 1.2rem !important;
             font-weight: 600 !important;
             box-shadow: 0 4px 10px rgba(240, 90, 20, 0.3) !important;
-        }}
+        }
 
         /* Botão "Guardar professor" específico */
-        button[kind="primary"], button:contains("Guardar"), button:contains("Submit") {{
+        button[kind="primary"], button:contains("Guardar"), button:contains("Submit") {
             background: linear-gradient(90deg, var(--color-brand-start), var(--color-brand-end)) !important;
-        }}
+        }
 
         /* MENU LATERAL MELHORADO */
-        [data-testid="stSidebar"] {{
+        [data-testid="stSidebar"] {
             background: linear-gradient(180deg, var(--color-bg-start), var(--color-bg-end)) !important;
             border-right: 2px solid var(--color-border);
             box-shadow: 6px 0 20px rgba(0, 0, 0, 0.25), 0 0 60px rgba(231, 76, 60, 0.1) !important;
             border-radius: 0 10px 10px 0 !important;
-        }}
+        }
 
         /* MENU LATERAL - STREAMLIT OPTION MENU */
-        [data-testid="stSidebar"] .css-1quwbsr {{"""
+        [data-testid="stSidebar"] .css-1quwbsr {"""
     """}}
 
         /* Seleção com gradiente consistente Streamlit Option Menu */
@@ -510,6 +510,19 @@ def aplicar_estilos():
             background-attachment: fixed;
         }}
 
+        /* Horário semanal (um bloco HTML por dia); fora do f-string, chavetas simples */
+        div.horario-dia h5 {
+            margin-bottom: 0.5rem;
+        }
+
+        div.horario-dia div.horario-cartao {
+            border: 1px solid var(--color-border) !important;
+            border-radius: var(--radius) !important;
+            padding: 10px 12px !important;
+            margin-bottom: 10px !important;
+            line-height: 1.6;
+        }
+
         /* Sidebar image - garantir que aparece acima */
         [data-testid="stSidebar"] img {{
             z-index: 1001 !important;
@@ -518,31 +531,49 @@ def aplicar_estilos():
             margin-bottom: 10px !important;
         }}
 
-        /* Marca de água da mascote */
-        /*
-        [data-testid="stAppViewContainer"]::after {{
-            content: "";
-            position: fixed;
-            bottom: 20px;
-            right: 20px;
-            width: 200px;
-            height: 200px;
-            background-image: url("data:image/png;base64,{mascote_b64}");
-            background-size: contain;
-            background-repeat: no-repeat;
-            opacity: 0.2; /* Mais visível */
-            pointer-events: none;
-        }}
-        */
-        </style>
-        """,
-            unsafe_allow_html=True
-        )
+        /* Fundo azul da aplicação (sobrepõe-se aos temas do Streamlit) */
+        .stApp {
+            background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
+        }
+        [data-testid="stAppViewContainer"] {
+            background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
+        }
+        html, body, [class*="css"] {
+            background: radial-gradient(circle, #34495e 0%, #2c3e50 100%) !important;
+        }
+        """)
+
+
+@st.cache_resource(show_spinner=False)
+def estilos_globais() -> str:
+    """Bloco de estilos global, construído e minificado uma única vez por processo."""
+    return style_block(_css_global(), head=FONTES_HTML)
+
+
+def aplicar_estilos():
+    """Aplica o CSS global (a mesma string pré-calculada em todas as execuções)."""
+    try:
+        st.markdown(estilos_globais(), unsafe_allow_html=True)
     except Exception as e:
         st.error(f"Erro ao aplicar estilos: {e}")
-        print(f"Erro ao aplicar estilos: {e}")
+        logger.warning(f"Erro ao aplicar estilos: {e}")
 
 def titulo_secao(texto, icone="📌"):
     """Mostra um título de secção com divisor."""
     st.markdown(f"### {icone} {texto}")
     st.divider()
+
+
+def notificar(mensagem, icone="✅"):
+    """Guarda uma mensagem para mostrar como toast na próxima execução.
+
+    Para usar antes de st.rerun(): o que é escrito na página perde-se com a
+    reexecução, e não é preciso esperar (time.sleep) para que seja lido.
+    """
+    st.session_state.setdefault(NOTIFICACOES_KEY, []).append((mensagem, icone))
+
+
+def mostrar_notificacoes():
+    """Mostra como toast as mensagens guardadas com notificar (uma única vez)."""
+    for mensagem, icone in st.session_state.pop(NOTIFICACOES_KEY, []):
+        st.toast(mensagem, icon=icone)
@@ -8,6 +8,10 @@ import re
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
+import pandas as pd
+
+from utils.metrics import timed_function
+
 
 # ===== CONSTANTES DE VALIDAÇÃO =====
 
@@ -65,6 +69,26 @@ ESTADO_OPCOES = [
     "Inativa"
 ]
 
+ESTADO_UTENTE_OPCOES = [
+    "Ativo",
+    "Inativo"
+]
+
+ESTADO_INSCRICAO_OPCOES = [
+    "Ativa",
+    "Cancelada"
+]
+
+
+# ===== PADRÕES (compilados uma vez, partilhados pela validação individual e em lote) =====
+
+NINE_DIGITS_PATTERN = re.compile(r'\d{9}')
+POSTAL_CODE_PATTERN = re.compile(r'\d{4}-\d{3}')
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Colunas das tabelas de erros da validação em lote
+ERROR_TABLE_COLUMNS = ['Linha', 'Campo', 'Erro']
+
 
 # ===== FUNÇÕES DE VALIDAÇÃO ESPECÍFICAS =====
 
@@ -79,8 +103,7 @@ def is_valid_phone(phone: str) -> bool:
     """
     if not phone:
         return True  # Campo opcional, válido se vazio
-    cleaned_phone = phone.replace(" ", "")
-    return cleaned_phone.isdigit() and len(cleaned_phone) == 9
+    return NINE_DIGITS_PATTERN.fullmatch(phone.replace(" ", "")) is not None
 
 
 def is_valid_nif(nif: str) -> bool:
@@ -94,7 +117,7 @@ def is_valid_nif(nif: str) -> bool:
     """
     if not nif:
         return True  # Pode ser opcional
-    return str(nif).strip().isdigit() and len(str(nif).strip()) == 9
+    return NINE_DIGITS_PATTERN.fullmatch(str(nif).strip()) is not None
 
 
 def is_valid_postal_code(pc: str) -> bool:
@@ -108,7 +131,7 @@ def is_valid_postal_code(pc: str) -> bool:
     """
     if not pc:
         return True  # Pode ser opcional
-    return bool(re.match(r'^\d{4}-\d{3}$', pc.strip()))
+    return POSTAL_CODE_PATTERN.fullmatch(pc.strip()) is not None
 
 
 def is_valid_email(email: str) -> bool:
@@ -122,7 +145,184 @@ def is_valid_email(email: str) -> bool:
     """
     if not email:
         return True  # Campo opcional, válido se vazio
-    return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email.strip()))
+    return EMAIL_PATTERN.fullmatch(email.strip()) is not None
+
+
+# ===== VALIDAÇÃO EM LOTE (pandas) =====
+# Mesmas regras das funções acima, aplicadas a colunas inteiras. Valores vazios
+# são considerados válidos (a obrigatoriedade é verificada à parte).
+
+def texto_series(series: pd.Series) -> pd.Series:
+    """Converte uma coluna (texto, números, categorias ou datas) em texto sem espaços nas pontas ('' se vazio)."""
+    return series.astype(object).where(series.notna(), '').astype(str).str.strip()
+
+
+def is_valid_phone_series(series: pd.Series) -> pd.Series:
+    """Versão vetorizada de is_valid_phone (9 dígitos, espaços ignorados).
+
+    Args:
+        series (pd.Series): Números de telefone
+
+    Returns:
+        pd.Series: Máscara booleana (True se válido ou vazio)
+    """
+    texto = texto_series(series).str.replace(' ', '', regex=False)
+    return (texto == '') | texto.str.fullmatch(NINE_DIGITS_PATTERN)
+
+
+def is_valid_nif_series(series: pd.Series) -> pd.Series:
+    """Versão vetorizada de is_valid_nif (9 dígitos).
+
+    Args:
+        series (pd.Series): NIFs
+
+    Returns:
+        pd.Series: Máscara booleana (True se válido ou vazio)
+    """
+    texto = texto_series(series)
+    return (texto == '') | texto.str.fullmatch(NINE_DIGITS_PATTERN)
+
+
+def is_valid_postal_code_series(series: pd.Series) -> pd.Series:
+    """Versão vetorizada de is_valid_postal_code (XXXX-XXX).
+
+    Args:
+        series (pd.Series): Códigos postais
+
+    Returns:
+        pd.Series: Máscara booleana (True se válido ou vazio)
+    """
+    texto = texto_series(series)
+    return (texto == '') | texto.str.fullmatch(POSTAL_CODE_PATTERN)
+
+
+def is_valid_email_series(series: pd.Series) -> pd.Series:
+    """Versão vetorizada de is_valid_email.
+
+    Args:
+        series (pd.Series): Emails
+
+    Returns:
+        pd.Series: Máscara booleana (True se válido ou vazio)
+    """
+    texto = texto_series(series)
+    return (texto == '') | texto.str.fullmatch(EMAIL_PATTERN)
+
+
+def parse_date_series(series: pd.Series) -> pd.Series:
+    """Converte uma coluna de datas em texto (DD/MM/AAAA ou ISO) em datetime.
+
+    Colunas que já são datetime são devolvidas tal como estão.
+
+    Args:
+        series (pd.Series): Datas
+
+    Returns:
+        pd.Series: Datas convertidas (NaT se vazias ou inválidas)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    texto = texto_series(series)
+    datas = pd.to_datetime(texto, format='%d/%m/%Y', errors='coerce')
+    iso = pd.to_datetime(texto.where(datas.isna() & (texto != '')), format='ISO8601', errors='coerce')
+    return datas.fillna(iso)
+
+
+def is_valid_date_series(series: pd.Series) -> pd.Series:
+    """Verifica uma coluna de datas (DD/MM/AAAA ou ISO).
+
+    Args:
+        series (pd.Series): Datas
+
+    Returns:
+        pd.Series: Máscara booleana (True se válida ou vazia)
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Series(True, index=series.index)
+    return (texto_series(series) == '') | parse_date_series(series).notna()
+
+
+# Validadores em lote por tipo de campo (mesmos tipos de validate_form_data)
+BATCH_VALIDATORS = {
+    'phone': (is_valid_phone_series, "Deve ter 9 dígitos"),
+    'nif': (is_valid_nif_series, "Deve ter 9 dígitos"),
+    'postal_code': (is_valid_postal_code_series, "Deve estar no formato XXXX-XXX"),
+    'email': (is_valid_email_series, "Formato inválido"),
+    'date': (is_valid_date_series, "Data inválida (DD/MM/AAAA)"),
+}
+
+
+def error_table(invalid: pd.Series, field: str, message: str) -> pd.DataFrame:
+    """Converte uma máscara de valores inválidos numa tabela de erros.
+
+    Args:
+        invalid (pd.Series): Máscara booleana (True nas linhas com erro)
+        field (str): Nome do campo
+        message (str): Mensagem de erro
+
+    Returns:
+        pd.DataFrame: Tabela com as colunas Linha (índice), Campo e Erro
+    """
+    linhas = invalid.index[invalid.fillna(False).astype(bool)]
+    return pd.DataFrame({'Linha': linhas, 'Campo': field, 'Erro': message}, columns=ERROR_TABLE_COLUMNS)
+
+
+def combine_error_tables(tables: List[pd.DataFrame]) -> pd.DataFrame:
+    """Junta várias tabelas de erros, ordenadas por linha e campo.
+
+    Args:
+        tables (List[pd.DataFrame]): Tabelas de error_table
+
+    Returns:
+        pd.DataFrame: Tabela única (vazia se não há erros)
+    """
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return pd.DataFrame(columns=ERROR_TABLE_COLUMNS)
+    return (pd.concat(tables, ignore_index=True)
+            .sort_values(['Linha', 'Campo'], kind='stable')
+            .reset_index(drop=True))
+
+
+@timed_function("validacao.lote")
+def validate_dataframe(df: pd.DataFrame, validation_rules: Dict[str, Any]) -> pd.DataFrame:
+    """Valida todas as linhas de um DataFrame de uma vez.
+
+    Usa as mesmas regras de validate_form_data ('required', 'type', 'label')
+    e ainda 'options' (lista de valores permitidos).
+
+    Args:
+        df (pd.DataFrame): Dados a validar
+        validation_rules (Dict[str, Any]): Regras de validação por coluna
+
+    Returns:
+        pd.DataFrame: Tabela de erros (Linha, Campo, Erro), onde Linha é o
+        índice da linha no DataFrame
+    """
+    tabelas = []
+    for field, rules in validation_rules.items():
+        label = rules.get('label', field)
+        if field not in df.columns:
+            if rules.get('required'):
+                tabelas.append(error_table(pd.Series(True, index=df.index), label, "Campo obrigatório"))
+            continue
+
+        coluna = df[field]
+        texto = texto_series(coluna)
+        vazio = texto == ''
+        if rules.get('required'):
+            tabelas.append(error_table(vazio, label, "Campo obrigatório"))
+
+        validador = BATCH_VALIDATORS.get(rules.get('type', 'text'))
+        if validador:
+            valido, mensagem = validador
+            tabelas.append(error_table(~vazio & ~valido(coluna), label, mensagem))
+
+        if rules.get('options'):
+            tabelas.append(error_table(~vazio & ~texto.isin(rules['options']), label,
+                                       f"Valor inválido (opções: {', '.join(rules['options'])})"))
+
+    return combine_error_tables(tabelas)
 
 
 def is_valid_date(date_obj: Any, min_date: Optional[date] = None, max_date: Optional[date] = None) -> bool:
@@ -0,0 +1,282 @@
+"""Background Writes to Google Sheets
+
+Sheets configured with async writes (SheetConfig.async_writes) do not wait
+for the Sheets API: crud queues the write, returns at once and the change is
+shown straight away in the data returned by crud.get_sheet_data (optimistic
+overlay). Writes run on one worker thread per worksheet, so they are applied
+in the order they were made.
+
+Worker threads only talk to gspread. Invalidating the cache, informing the
+write listeners and showing messages happen on the script thread, when a run
+notices that a write has finished (finalize_writes / render_write_status).
+An update refused because another user changed the same fields is handed to
+the session that made it as a pending conflict (utils.state.CONFLICT_STATE_KEY),
+and the record's edit view is reopened so the user can resolve it.
+"""
+
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from utils.metrics import logger, record_timing
+from utils.state import CONFLICT_STATE_KEY, section_state
+
+
+WRITE_JOBS_KEY = '_gravacoes_sessao'
+WRITE_ANNOUNCED_KEY = '_gravacoes_anunciadas'
+
+PENDING = 'pendente'
+COMMITTED = 'gravado'
+FAILED = 'falhou'
+
+STATUS_LABELS = {PENDING: "⏳ A gravar…", COMMITTED: "✅ Gravado", FAILED: "⚠️ Não gravado"}
+
+# Intervalo (segundos) entre verificações do estado das gravações da sessão
+WRITE_POLL_SECONDS = 1.0
+# Tempo (segundos) durante o qual as gravações terminadas ficam no registo
+WRITE_JOB_RETENTION = 600
+
+# Resultado de uma gravação: (linha antes, linha depois), como em crud.notify_sheet_write
+WriteResult = Optional[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]
+
+
+class WriteError(Exception):
+    """Gravação recusada (registo apagado ou alterado entretanto por outro utilizador).
+
+    Attributes:
+        conflict: Conflito a resolver pelo utilizador (formato de
+            CONFLICT_STATE_KEY), quando outro utilizador alterou os mesmos campos
+    """
+
+    def __init__(self, message: str, conflict: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.conflict = conflict
+
+
+@dataclass
+class WriteJob:
+    """Uma gravação em segundo plano.
+
+    Attributes:
+        id: Identificador da gravação
+        sheet: Nome da worksheet
+        operation: 'create', 'update' ou 'delete'
+        record_id: ID do registo gravado
+        id_column: Coluna de ID da worksheet (para a sobreposição otimista)
+        index: Índice do registo no DataFrame quando a gravação foi feita
+        row: Linha gravada (valores da folha), para 'create' e 'update'
+        success_message: Mensagem mostrada quando a gravação termina
+        on_commit: Executada na thread do script com o resultado da gravação
+        status: PENDING, COMMITTED ou FAILED
+        error: Motivo da falha
+        conflict: Conflito de uma atualização recusada (ver WriteError)
+        result: Resultado devolvido pela gravação
+        finalized: True depois de on_commit ter sido executada
+    """
+    id: str
+    sheet: str
+    operation: str
+    record_id: str
+    id_column: str
+    index: Any
+    row: Optional[Dict[str, Any]]
+    success_message: str
+    on_commit: Callable[[WriteResult], None]
+    status: str = PENDING
+    error: str = ''
+    conflict: Optional[Dict[str, Any]] = None
+    result: WriteResult = None
+    finalized: bool = False
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+
+@st.cache_resource
+def _write_registry() -> Dict[str, Any]:
+    """Registo partilhado das gravações e dos executores (um por worksheet)."""
+    return {'lock': threading.Lock(), 'jobs': {}, 'executors': {}}
+
+
+def _executor(sheet_name: str) -> ThreadPoolExecutor:
+    """Executor de uma worksheet (uma thread: as gravações seguem a ordem de chegada)."""
+    registry = _write_registry()
+    with registry['lock']:
+        executor = registry['executors'].get(sheet_name)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"gravar-{sheet_name}")
+            registry['executors'][sheet_name] = executor
+    return executor
+
+
+def _run_job(job: WriteJob, work: Callable[[], WriteResult]) -> None:
+    """Executa a gravação na thread de trabalho (sem chamadas ao Streamlit)."""
+    inicio = time.perf_counter()
+    try:
+        job.result = work()
+        job.status = COMMITTED
+    except Exception as e:
+        job.error = str(e)
+        job.conflict = getattr(e, 'conflict', None)
+        job.status = FAILED
+        logger.warning(f"Gravação em segundo plano falhou ({job.sheet}, {job.operation}, {job.record_id}): {e}")
+    finally:
+        job.finished_at = time.time()
+        record_timing("sheets.gravacao_segundo_plano", (time.perf_counter() - inicio) * 1000,
+                      folha=job.sheet, operacao=job.operation, estado=job.status)
+
+
+def submit_write(sheet_name: str,
+                 operation: str,
+                 record_id: Any,
+                 work: Callable[[], WriteResult],
+                 on_commit: Callable[[WriteResult], None],
+                 id_column: str = '',
+                 index: Any = None,
+                 row: Optional[Dict[str, Any]] = None,
+                 success_message: str = "Registo gravado com sucesso!") -> WriteJob:
+    """Coloca uma gravação na fila da worksheet e devolve-a de imediato.
+
+    Args:
+        sheet_name (str): Nome da worksheet
+        operation (str): 'create', 'update' ou 'delete'
+        record_id (Any): ID do registo
+        work (Callable[[], WriteResult]): Faz a gravação com o gspread (corre
+            noutra thread: não pode chamar o Streamlit)
+        on_commit (Callable[[WriteResult], None]): Executada na thread do script
+            depois da gravação (ex.: invalidar a cache)
+        id_column (str): Coluna de ID da worksheet
+        index (Any): Índice do registo no DataFrame em cache
+        row (Optional[Dict[str, Any]]): Linha gravada, para a sobreposição otimista
+        success_message (str): Mensagem mostrada quando a gravação termina
+
+    Returns:
+        WriteJob: A gravação, com o estado PENDING
+    """
+    job = WriteJob(id=uuid.uuid4().hex[:12], sheet=sheet_name, operation=operation,
+                   record_id=str(record_id), id_column=id_column, index=index, row=row,
+                   success_message=success_message, on_commit=on_commit)
+    registry = _write_registry()
+    with registry['lock']:
+        registry['jobs'][job.id] = job
+    st.session_state.setdefault(WRITE_JOBS_KEY, []).append(job.id)
+
+    # A cópia do contexto mantém a secção de origem na contagem de pedidos à API
+    contexto = contextvars.copy_context()
+    _executor(sheet_name).submit(contexto.run, _run_job, job, work)
+    return job
+
+
+def pending_writes(sheet_name: str) -> List[WriteJob]:
+    """Gravações desta sessão numa worksheet ainda não refletidas na cache (por ordem de chegada).
+
+    Inclui as que já terminaram com sucesso mas ainda não foram finalizadas.
+    As gravações de outras sessões não são incluídas: só aparecem depois de
+    gravadas, quando a cache da folha é atualizada.
+    """
+    sessao = set(st.session_state.get(WRITE_JOBS_KEY, []))
+    registry = _write_registry()
+    with registry['lock']:
+        return [job for job in registry['jobs'].values()
+                if job.id in sessao and job.sheet == sheet_name
+                and not job.finalized and job.status != FAILED]
+
+
+def pending_write_ids(sheet_name: str) -> Tuple[str, ...]:
+    """IDs das gravações pendentes desta sessão numa worksheet.
+
+    Para usar na chave de caches de vistas que incluem a sobreposição otimista.
+    """
+    return tuple(job.id for job in pending_writes(sheet_name))
+
+
+def finalize_writes(sheet_name: Optional[str] = None) -> None:
+    """Executa on_commit das gravações terminadas (na thread do script, uma única vez).
+
+    Args:
+        sheet_name (Optional[str]): Só as gravações desta worksheet (todas, se omitido)
+    """
+    registry = _write_registry()
+    agora = time.time()
+    with registry['lock']:
+        terminadas = [job for job in registry['jobs'].values()
+                      if job.status != PENDING and not job.finalized
+                      and (sheet_name is None or job.sheet == sheet_name)]
+        for job in terminadas:
+            job.finalized = True
+        for job_id in [job_id for job_id, job in registry['jobs'].items()
+                       if job.finalized and job.finished_at and job.finished_at < agora - WRITE_JOB_RETENTION]:
+            del registry['jobs'][job_id]
+
+    for job in terminadas:
+        try:
+            job.on_commit(job.result if job.status == COMMITTED else None)
+        except Exception as e:
+            logger.warning(f"Erro ao finalizar gravação em {job.sheet}: {e}")
+
+
+def write_status(sheet_name: str, record_id: Any) -> Optional[WriteJob]:
+    """Última gravação de um registo feita nesta sessão (se ainda estiver no registo).
+
+    Args:
+        sheet_name (str): Nome da worksheet
+        record_id (Any): ID do registo
+
+    Returns:
+        Optional[WriteJob]: A gravação mais recente do registo ou None
+    """
+    jobs = [job for job in _session_jobs() if job.sheet == sheet_name and job.record_id == str(record_id)]
+    return max(jobs, key=lambda job: job.submitted_at) if jobs else None
+
+
+def _session_jobs() -> List[WriteJob]:
+    """Gravações desta sessão ainda no registo (as removidas do registo são esquecidas)."""
+    registry = _write_registry()
+    with registry['lock']:
+        jobs = [registry['jobs'][job_id] for job_id in st.session_state.get(WRITE_JOBS_KEY, [])
+                if job_id in registry['jobs']]
+    st.session_state[WRITE_JOBS_KEY] = [job.id for job in jobs]
+    return jobs
+
+
+@st.fragment(run_every=WRITE_POLL_SECONDS)
+def _acompanhar_gravacoes() -> None:
+    """Verifica periodicamente as gravações da sessão; reexecuta a aplicação quando terminam."""
+    pendentes = [job for job in _session_jobs() if job.status == PENDING]
+    if not pendentes:
+        st.rerun(scope="app")
+    st.caption(f"⏳ A gravar {len(pendentes)} alteração(ões) no Google Sheets…")
+
+
+def render_write_status() -> None:
+    """Finaliza as gravações terminadas e mostra o estado das gravações desta sessão.
+
+    Cada gravação terminada é anunciada (toast) uma única vez; enquanto houver
+    gravações pendentes, um fragmento verifica o estado a cada WRITE_POLL_SECONDS.
+    Uma atualização recusada por conflito reabre a edição do registo, com o
+    conflito à espera de decisão (crud.render_conflict_resolution).
+    """
+    finalize_writes()
+
+    jobs = _session_jobs()
+    anunciadas = st.session_state.setdefault(WRITE_ANNOUNCED_KEY, set())
+    for job in jobs:
+        if job.status == PENDING or job.id in anunciadas:
+            continue
+        anunciadas.add(job.id)
+        if job.status == COMMITTED:
+            st.toast(job.success_message, icon="✅")
+        else:
+            st.toast(f"Não foi possível gravar o registo {job.record_id}: {job.error}", icon="⚠️")
+            if job.conflict:
+                st.session_state[CONFLICT_STATE_KEY] = job.conflict
+                section_state(job.sheet).start_edit(job.record_id)
+    anunciadas.intersection_update(job.id for job in jobs)
+
+    if any(job.status == PENDING for job in jobs):
+        _acompanhar_gravacoes()